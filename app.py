@@ -1,7 +1,10 @@
 import streamlit as st
-import os
-import tempfile
+import time
+import hashlib
 import main  # Imports your logic
+import job_queue
+import artifacts
+import telemetry
 
 # --- Page Config ---
 st.set_page_config(
@@ -48,9 +51,36 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+# --- Background Worker Pool ---
+# One queue per server process, shared by all sessions: the analysis runs off the
+# Streamlit script thread, so concurrent users don't wait for each other.
+@st.cache_resource
+def get_job_queue():
+    return job_queue.JobQueue(max_workers=4)
+
+
+# Optional Prometheus endpoint (set METRICS_PORT), started once per server process
+@st.cache_resource
+def start_metrics_server():
+    return telemetry.serve_metrics()
+
+
+# Model client + rate limiter + response cache, shared by every session and rerun.
+# Built on the first submitted analysis (not on page load), so the first page renders fast.
+@st.cache_resource
+def get_backend():
+    return main.get_backend()
+
+
+queue = get_job_queue()
+start_metrics_server()
+
 # --- Session State Management ---
 if 'results' not in st.session_state:
     st.session_state['results'] = None
+if 'job_id' not in st.session_state:
+    # A page refresh starts a new session: pick the running/finished job back up from the URL
+    st.session_state['job_id'] = st.query_params.get("job")
 
 # --- Main Header ---
 col_logo, col_title = st.columns([1, 5])
@@ -74,7 +104,8 @@ with st.sidebar:
     st.divider()
 
     st.info(
-        "🔒 **Privacy Note:**\nYour data is processed via Google Gemini API and is not stored permanently on this server.")
+        "🔒 **Privacy Note:**\nYour data is processed via Google Gemini API. To speed up repeat runs, results are "
+        "cached on this server for up to 7 days (resume text only with contact details removed), then deleted.")
 
     st.write("---")
     st.caption("v1.0.0 | Budget Mode")
@@ -103,33 +134,86 @@ if run_pressed:
         status_box = st.status("Agent is working...", expanded=True)
 
         try:
-            # 1. Save temp file
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-                tmp_file.write(uploaded_file.getvalue())
-                tmp_path = tmp_file.name
+            # 1. The upload is already in memory: no temp file, the bytes go straight to PyMuPDF
+            pdf_bytes = uploaded_file.getvalue()
 
-            # 2. Extract Text
+            # 2. Parse once: text, layout and page image all come from this single pass
+            #    (memoized per upload hash, so submitting the same file again doesn't re-parse)
             status_box.write("📄 Reading PDF content...")
-            resume_text = main.read_pdf(tmp_path)
+            parsed_resume = main.load_resume(pdf_bytes)
+            resume_text = main.read_pdf(parsed_resume)
 
             if not resume_text:
                 status_box.update(label="Error: Unreadable PDF", state="error")
                 st.error("Could not extract text. The PDF might be an image scan.")
             else:
-                # 3. Main Logic
-                status_box.write("🧠 Analyzing fit, checking visuals, and generating prep...")
-
-                # CALL MAIN LOGIC
-                st.session_state['results'] = main.process_application(tmp_path, resume_text, job_description)
-
-                status_box.update(label="Analysis Complete!", state="complete", expanded=False)
+                # 3. Main Logic: queue it (same resume + JD reuses the existing job)
+                key_hash = hashlib.sha256(pdf_bytes)
+                key_hash.update(job_description.encode("utf-8"))
+                # MemorySink: everything reaches the UI via results_pack, nothing is written to disk
+                job_id = queue.submit(main.process_application, parsed_resume, resume_text, job_description,
+                                      job_key=key_hash.hexdigest(), sink=artifacts.MemorySink(),
+                                      backend=get_backend())
+                st.session_state['job_id'] = job_id
+                st.session_state['results'] = None
+                st.query_params["job"] = job_id
+                status_box.update(label="Analysis queued", state="complete", expanded=False)
 
         except Exception as e:
             st.error(f"An unexpected error occurred: {e}")
 
-        finally:
-            if 'tmp_path' in locals() and os.path.exists(tmp_path):
-                os.remove(tmp_path)
+# --- Job Progress ---
+active_job = queue.get(st.session_state['job_id']) if st.session_state['job_id'] else None
+
+def render_live_preview(partial):
+    """Read-only preview of the fields that have already arrived (no widgets: it is redrawn on every poll)."""
+    if not partial:
+        return
+    tab1, tab2, tab3, tab4 = st.tabs(["📊 ATS Score", "📝 Feedback", "✉️ Cover Letter", "❓ Interview Prep"])
+    with tab1:
+        if "ats_score" in partial:
+            st.metric("Readability Score", f"{partial['ats_score']}/10")
+            st.text(partial.get("ats_report", ""))
+        else:
+            st.caption("⏳ Waiting for the ATS audit...")
+    with tab2:
+        st.markdown(partial.get("feedback") or "⏳ Writing feedback...")
+    with tab3:
+        st.text(partial.get("cover_letter") or "⏳ Writing cover letter...")
+    with tab4:
+        st.markdown(partial.get("interview_prep") or "⏳ Waiting for interview questions...")
+
+
+if active_job and st.session_state['results'] is None:
+    with st.status("Agent is working...", expanded=True) as status_box:
+        live_area = st.empty()
+        shown = 0
+        drawn = None
+        while True:
+            for message in active_job.events[shown:]:
+                status_box.write(message)
+            shown = len(active_job.events)
+            if active_job.finished:
+                break
+            # Redraw only when a new field (or a longer streamed one) has arrived
+            snapshot = dict(active_job.partial)
+            if snapshot != drawn:
+                with live_area.container():
+                    render_live_preview(snapshot)
+                drawn = snapshot
+            time.sleep(0.5)
+        live_area.empty()
+
+        if active_job.status == "done":
+            status_box.update(label="Analysis Complete!", state="complete", expanded=False)
+            st.session_state['results'] = active_job.result
+            if active_job.result.get("fatal_error") or active_job.result.get("failed_stages"):
+                # Let the user retry the same input (e.g. after the quota resets); finished stages
+                # come back from their checkpoints, so only the failed ones call the model again
+                queue.forget(active_job.job_id)
+        else:
+            status_box.update(label="Analysis Failed", state="error")
+            st.error(f"An unexpected error occurred: {active_job.error}")
 
 # --- Results Display ---
 if st.session_state['results']:
@@ -137,8 +221,11 @@ if st.session_state['results']:
     if results.get("fatal_error"):
         st.error("🚨 Operation Stopped")
         st.warning(results.get("fatal_error"))
-        st.stop()
-    st.success("Analysis Ready! See detailed breakdown below. 👇")
+        # Only stop if nothing was completed before the error
+        if not any(results.get(key) for key in ("ats_report", "feedback", "cover_letter", "interview_prep")):
+            st.stop()
+    else:
+        st.success("Analysis Ready! See detailed breakdown below. 👇")
 
     # Visual Warning (Collapsible to keep UI clean)
     if results.get("visual_warning"):
@@ -185,7 +272,16 @@ if st.session_state['results']:
 
         st.download_button("📥 Download Prep Sheet", results.get("interview_prep", ""), "interview_prep.txt")
 
+    # Where the time went (model calls, parsing, stages)
+    if results.get("timings"):
+        with st.expander("⏱️ Run Breakdown"):
+            st.table(results["timings"])
+
     # Reset Button
     if st.button("Start New Analysis"):
+        if st.session_state['job_id']:
+            queue.forget(st.session_state['job_id'])
         st.session_state['results'] = None
+        st.session_state['job_id'] = None
+        st.query_params.clear()
         st.rerun()
\ No newline at end of file
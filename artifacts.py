@@ -0,0 +1,92 @@
+import os
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+
+def new_run_id():
+    """Sortable, collision-free id for one pipeline run, e.g. '20250101_093000_a1b2c3'."""
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+
+
+def atomic_write(path, content):
+    """Writes to a temp file in the same folder, then renames: readers never see half a file."""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class MemorySink:
+    """
+    Keeps artifacts in a dict only. Used by the web app, which already gets
+    everything through results_pack and should not touch the disk.
+    """
+
+    location = None
+
+    def __init__(self):
+        self.artifacts = {}
+        self._lock = threading.Lock()
+
+    def write(self, name, content):
+        with self._lock:
+            self.artifacts[name] = content
+
+    def flush(self, background=False):
+        return None
+
+
+# Shared single writer thread for background flushes
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="artifact-writer")
+
+
+class DirectorySink(MemorySink):
+    """
+    Buffers artifacts in memory and writes them in one batch on flush().
+    Each run gets its own folder (root/run_id), so concurrent runs never
+    overwrite each other's reports. Pass run_id="" to write straight into root.
+    """
+
+    def __init__(self, root, run_id=None):
+        super().__init__()
+        self.run_id = new_run_id() if run_id is None else run_id
+        self.location = os.path.join(root, self.run_id) if self.run_id else root
+        self._written = set()
+
+    def _write_pending(self, pending):
+        os.makedirs(self.location, exist_ok=True)
+        for name, content in pending.items():
+            try:
+                atomic_write(os.path.join(self.location, name), content)
+            except Exception as e:
+                print(f"❌ Error saving {name}: {e}")
+        print(f"✅ Saved {len(pending)} file(s) to: {self.location}")
+
+    def flush(self, background=False):
+        """
+        Writes everything not yet on disk. With background=True the writes happen
+        on a shared writer thread and a Future is returned.
+        """
+        with self._lock:
+            pending = {name: content for name, content in self.artifacts.items() if name not in self._written}
+            self._written.update(pending)
+        if not pending:
+            return None
+        if background:
+            return _writer.submit(self._write_pending, pending)
+        self._write_pending(pending)
+        return None
+
+    def write(self, name, content):
+        with self._lock:
+            self.artifacts[name] = content
+            self._written.discard(name)  # Rewritten artifacts get flushed again
@@ -0,0 +1,197 @@
+"""
+Batch Mode: one resume against many job descriptions.
+
+The resume-only work (PDF parsing, validation, visual check, PII scrub, ATS audit)
+runs ONCE, and is kept in resume_store for later batches with the same PDF; only the JD-dependent Step 1 / Step 2 fan out, with bounded concurrency.
+
+Usage:
+    python batch.py inputs/resume.pdf inputs/jobs/          # folder of .txt files
+    python batch.py inputs/resume.pdf inputs/jobs.jsonl     # {"id": ..., "job_description": ...} per line
+
+Every JD gets its own folder under --out. Progress is kept in progress.json,
+so re-running the same command skips finished JDs and retries failed ones; a JD that
+failed part-way resumes from its stage checkpoints (see checkpoints.py).
+"""
+import argparse
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import main
+from artifacts import DirectorySink, atomic_write
+from checkpoints import RunCheckpoint, get_checkpoint_store
+from pii import redact_pii
+from resume_store import get_resume_store
+from stage_graph import StageGraph
+from telemetry import start_trace
+from web_research import get_researcher
+
+DEFAULT_BATCH_DIR = os.path.join(main.OUTPUT_DIR, "batch")
+
+
+def _safe_job_id(raw_id):
+    """Turns a JD id into something usable as a folder name."""
+    return re.sub(r'[^\w.-]+', '_', str(raw_id)).strip('_') or "job"
+
+
+def load_jobs(source):
+    """
+    Loads job descriptions from a folder of .txt/.md files or from a .jsonl file.
+    Returns a list of (job_id, job_description).
+    """
+    jobs = []
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if name.lower().endswith((".txt", ".md")):
+                text = main.read_text_file(os.path.join(source, name))
+                if text:
+                    jobs.append((_safe_job_id(os.path.splitext(name)[0]), text))
+    else:
+        with open(source, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                text = record.get("job_description") or record.get("text")
+                if text:
+                    jobs.append((_safe_job_id(record.get("id", f"job_{line_no}")), text))
+
+    # Duplicate ids would share an output folder
+    seen = {}
+    unique_jobs = []
+    for job_id, text in jobs:
+        if job_id in seen:
+            seen[job_id] += 1
+            job_id = f"{job_id}_{seen[job_id]}"
+        else:
+            seen[job_id] = 0
+        unique_jobs.append((job_id, text))
+    return unique_jobs
+
+
+class BatchProgress:
+    """Thread-safe progress.json: {job_id: {"status": "done"|"failed", "error": ...}}."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.jobs = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.jobs = json.load(f)
+
+    def is_done(self, job_id):
+        return self.jobs.get(job_id, {}).get("status") == "done"
+
+    def mark(self, job_id, status, error=None):
+        with self._lock:
+            self.jobs[job_id] = {"status": status, "error": error}
+            # Atomic, so a crash never leaves half a file
+            atomic_write(self.path, json.dumps(self.jobs, indent=2, ensure_ascii=False))
+
+
+def run_batch(resume_path, jobs, out_dir=DEFAULT_BATCH_DIR, max_workers=4, backend=None):
+    """
+    Runs one resume against a list of (job_id, job_description).
+    Returns {job_id: results_pack} for the JDs processed in this run,
+    or {"fatal_error": ...} if the resume itself cannot be used.
+    'backend' replaces the default model (see main.process_application).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    progress = BatchProgress(os.path.join(out_dir, "progress.json"))
+
+    # --- Resume-only work: done once for the whole batch (or reused from an earlier batch) ---
+    store = get_resume_store()
+    resume_text = main.read_pdf(resume_path)  # Also needed for Step 1; the store keeps only redacted text
+    if not resume_text:
+        return {"fatal_error": f"Could not extract text from {resume_path}"}
+
+    resume_graph = StageGraph()
+    resume_sink = DirectorySink(out_dir, run_id="")
+    main.add_resume_stages(resume_graph, resume_path, resume_text, resume_sink, backend=backend, store=store)
+    with start_trace("batch_resume"):
+        resume_results = resume_graph.run()
+    resume_sink.flush()
+    if resume_graph.halted is not None:
+        return {"fatal_error": str(resume_graph.halted)}
+    shared_pack = main.build_results_pack(resume_results)
+
+    pending = [(job_id, text) for job_id, text in jobs if not progress.is_done(job_id)]
+    print(f"\n--- 📦 Batch: {len(jobs)} JDs, {len(jobs) - len(pending)} already done, {len(pending)} to run ---")
+
+    stop_event = threading.Event()
+    researcher = get_researcher()
+    checkpoints = get_checkpoint_store()
+    redaction = redact_pii(resume_text)  # Checkpoints keep placeholders, not the contact details
+
+    def run_job(job_id, job_description):
+        if stop_event.is_set():
+            return None  # Left untouched in progress.json, so the next run picks it up
+        job_sink = DirectorySink(out_dir, run_id=job_id)
+        # A JD that failed part-way resumes from its checkpoints: only the unfinished stages call the model
+        run_id = main.application_run_id(resume_path, job_description, "batch", backend) if checkpoints else None
+        checkpoint = RunCheckpoint(checkpoints, run_id, redaction) if run_id else None
+        graph = StageGraph(max_workers=1, checkpoint=checkpoint,
+                           on_restore=lambda stage, result: main.replay_stage(stage, result, job_sink))
+        main.add_job_stages(graph, resume_text, job_description, job_sink, backend=backend, researcher=researcher)
+        with start_trace(job_id) as trace:
+            results = graph.run()
+
+        if graph.halted is not None:
+            stop_event.set()  # Quota is gone: don't burn through the remaining JDs
+            raise RuntimeError(str(graph.halted))
+        if "profile" in graph.errors:
+            raise RuntimeError(f"Step 1 failed: {graph.errors['profile']}")
+        unfinished = graph.unfinished()
+        if unfinished:
+            job_sink.flush()  # Keep what did finish; the retry only re-runs the rest
+            raise RuntimeError(f"Unfinished stages: {', '.join(unfinished)}")
+        if checkpoint is not None:
+            checkpoint.clear()
+
+        results_pack = dict(shared_pack)
+        results_pack.update(main.build_results_pack(results))
+        results_pack["stage_timings"] = graph.timings
+        results_pack["timings"] = trace.breakdown()
+        job_sink.write("results.json", json.dumps(results_pack, indent=2, ensure_ascii=False))
+        job_sink.flush()
+        return results_pack
+
+    batch_results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(run_job, job_id, text): job_id for job_id, text in pending}
+        for future in as_completed(futures):
+            job_id = futures[future]
+            try:
+                results_pack = future.result()
+            except Exception as e:
+                print(f"❌ [{job_id}] failed: {e}")
+                progress.mark(job_id, "failed", str(e))
+                continue
+            if results_pack is not None:
+                progress.mark(job_id, "done")
+                batch_results[job_id] = results_pack
+                print(f"✅ [{job_id}] done")
+
+    failed = [job_id for job_id, state in progress.jobs.items() if state["status"] == "failed"]
+    print(f"\n--- 🏁 Batch finished: {len(batch_results)} done now, {len(failed)} failed (re-run to retry) ---")
+    return batch_results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run one resume against many job descriptions.")
+    parser.add_argument("resume", help="Path to the resume PDF")
+    parser.add_argument("jobs", help="Folder of .txt JDs or a .jsonl file")
+    parser.add_argument("--out", default=DEFAULT_BATCH_DIR, help="Output folder (default: outputs/batch)")
+    parser.add_argument("--workers", type=int, default=4, help="Max JDs processed concurrently")
+    args = parser.parse_args()
+
+    job_list = load_jobs(args.jobs)
+    if not job_list:
+        print(f"❌ Error: No job descriptions found in '{args.jobs}'.")
+    else:
+        outcome = run_batch(args.resume, job_list, args.out, args.workers)
+        if outcome.get("fatal_error"):
+            print(f"🛑 {outcome['fatal_error']}")
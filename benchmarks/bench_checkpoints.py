@@ -0,0 +1,126 @@
+"""
+Benchmark: what an unusable model answer costs, with and without checkpoints.
+
+For each stage that calls the model, the stub backend garbles that stage's answer:
+    - once: the repair prompt fixes it inside the same run (one extra call, no failure);
+    - twice (answer and repair): the stage fails, and the application is run again,
+      resuming from its checkpoints versus starting over (a full run, as with CHECKPOINTS=0).
+Reports the calls that reach the model per run, so the cost of a retry can be compared directly.
+Backends go through main.wrap_backend (rate limiter + response cache, as in production), with a
+fresh response cache per scenario under a temporary folder.
+
+Usage:
+    python benchmarks/bench_checkpoints.py
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("COMPANY_RESEARCH", "0")  # Stay offline: no web searches from the benchmark
+os.environ.setdefault("RESUME_STORE", "0")  # Every application re-runs the resume checks
+os.environ.setdefault("VISUAL_CACHE", "0")  # ...including the vision call
+os.environ.setdefault("GEMINI_RPM", "100000")  # The stub has no quota to protect
+
+import main  # noqa: E402
+from artifacts import MemorySink  # noqa: E402
+from bench_pipeline import make_job_description, make_resume_pdf  # noqa: E402
+from checkpoints import CheckpointStore  # noqa: E402
+from llm_backend import FakeResponse, StubBackend  # noqa: E402
+
+# Prompt marker -> stage (the markers StubBackend's canned answers use)
+STAGE_MARKERS = {
+    "Interview Coach": "interview",
+    "experience_level": "profile",
+    "score_1_to_10": "ats",
+    "layout_risk": "visual",
+    "is_resume": "validate",
+    "proficiency_level": "interview",  # Only in the interview shape of a repair prompt
+}
+GARBLED = 'Sure! Here is the JSON you asked for:\n{"partial": "the answer was cut o'
+
+
+def stage_of(contents):
+    """(stage, is a repair prompt) for a request, by the markers in its prompt."""
+    parts = contents if isinstance(contents, (list, tuple)) else [contents]
+    prompt = " ".join(part for part in parts if isinstance(part, str))
+    stage = next((stage for marker, stage in STAGE_MARKERS.items() if marker in prompt), None)
+    return stage, "could not be used" in prompt
+
+
+class GarblingBackend(StubBackend):
+    """
+    StubBackend that garbles the next 'bad_answers' answers for one stage (its repair call included).
+    A repair prompt that isn't garbled gets the stage's canned answer, as a model fixing its JSON would.
+    """
+
+    def __init__(self, stage=None, bad_answers=0):
+        super().__init__()
+        self.stage = stage
+        self.bad_answers = bad_answers
+        self.calls_by_stage = {}
+        self._prompts = {}
+
+    def generate_content(self, contents, **kwargs):
+        stage, repair = stage_of(contents)
+        self.calls_by_stage[stage] = self.calls_by_stage.get(stage, 0) + 1
+        if stage == self.stage and self.bad_answers > 0:
+            self.bad_answers -= 1
+            self.stats["calls"] += 1
+            if not repair:
+                self._prompts[stage] = contents
+            return FakeResponse(GARBLED)
+        if repair:
+            self.stats["calls"] += 1
+            return FakeResponse(self._answer_for(self._prompts[stage]))
+        return super().generate_content(contents, **kwargs)
+
+
+def use_fresh_cache(cache_dir):
+    """Points the shared runtime (and so main.wrap_backend) at an empty response cache."""
+    main.runtime.cache_dir = cache_dir
+    main.runtime.reset()
+
+
+def run(backend, pdf_bytes, resume_text, job_description, checkpoints):
+    """(calls that reached 'backend', failed stages) for one application through the production wrappers."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = main.process_application(pdf_bytes, resume_text, job_description, sink=MemorySink(),
+                                           backend=main.wrap_backend(backend), checkpoints=checkpoints)
+    return backend.stats["calls"], results["failed_stages"]
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.parse_args()
+
+    pdf_bytes = make_resume_pdf()
+    job_description = make_job_description()
+    resume_text = main.read_pdf(pdf_bytes)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = CheckpointStore(os.path.join(tmp, "checkpoints.sqlite"))
+        use_fresh_cache(os.path.join(tmp, "clean"))
+        clean = GarblingBackend()
+        clean_calls, _ = run(clean, pdf_bytes, resume_text, job_description, store)
+        stages = [stage for stage in clean.calls_by_stage if stage]
+        print(f"clean run: {clean_calls} calls ({', '.join(stages)})\n")
+
+        print(f"{'garbled stage':<14} {'repaired':>9} {'failed run':>11} {'failed stages':<22} "
+              f"{'resume':>7} {'still failed':<13} {'start over':>11}")
+        for stage in stages:
+            use_fresh_cache(os.path.join(tmp, stage, "repaired"))
+            repaired_calls, _ = run(GarblingBackend(stage, 1), pdf_bytes, resume_text, job_description, store)
+            # The resumed run shares the failed run's cache: the broken answers must not be replayed from it
+            use_fresh_cache(os.path.join(tmp, stage, "failed"))
+            failed_calls, failed = run(GarblingBackend(stage, 2), pdf_bytes, resume_text, job_description, store)
+            resumed_calls, still_failed = run(GarblingBackend(), pdf_bytes, resume_text, job_description, store)
+            print(f"{stage:<14} {repaired_calls:>9} {failed_calls:>11} {', '.join(failed):<22} "
+                  f"{resumed_calls:>7} {', '.join(still_failed) or '-':<13} {clean_calls:>11}")
+
+
+if __name__ == "__main__":
+    main_cli()
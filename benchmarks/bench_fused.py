@@ -0,0 +1,135 @@
+"""
+Benchmark: staged pipeline vs. fused (one structured-output call) mode.
+
+For each mode, runs the same applications and reports per application:
+  - end-to-end latency (p50 / p95) and model round-trips
+  - prompt tokens (estimated, plus Gemini's own count when the backend reports usage)
+  - output tokens (Gemini's count, or estimated from the answer text with the stub)
+
+With the default stub backend every call costs the same fixed latency, so the latency
+column only shows what fewer round-trips buy; the token columns are the real prompts.
+Run it with --backend gemini (needs GEMINI_API_KEY and quota) to compare actual latency
+and billed tokens on a deployment before picking PIPELINE_MODE.
+
+Usage:
+    python benchmarks/bench_fused.py [--backend stub|gemini] [--apps 8] [--latency 0.8]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("COMPANY_RESEARCH", "0")  # Stay offline: no web searches from the benchmark
+os.environ.setdefault("RESUME_STORE", "0")  # Every staged application re-runs the resume checks
+os.environ.setdefault("VISUAL_CACHE", "0")  # ...including the vision call
+os.environ.setdefault("CHECKPOINTS", "0")  # A failed application starts over instead of resuming
+
+import main  # noqa: E402
+from artifacts import MemorySink  # noqa: E402
+from bench_pipeline import make_job_description, make_resume_pdf, summarize  # noqa: E402
+from llm_backend import StubBackend, create_backend  # noqa: E402
+from rate_limiter import RateLimitedModel  # noqa: E402
+from telemetry import METRICS  # noqa: E402
+from token_budget import estimate_text_tokens  # noqa: E402
+
+
+class MeteredBackend:
+    """Counts calls and output tokens of a backend (from usage metadata, else estimated from the text)."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.model_name = getattr(backend, "model_name", "unknown")
+        self.calls = 0
+        self.output_tokens = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, contents, **kwargs):
+        response = self.backend.generate_content(contents, **kwargs)
+        usage = getattr(response, "usage_metadata", None)
+        output = getattr(usage, "candidates_token_count", None)
+        if output is None:
+            output = estimate_text_tokens(response.text)
+        with self._lock:
+            self.calls += 1
+            self.output_tokens += output
+        return response
+
+
+def counter_total(name):
+    """Sum of a METRICS counter over all its label sets."""
+    return sum(value for (series, _), value in METRICS.counters.items() if series == name)
+
+
+def run_mode(mode, pdf_bytes, job_description, raw_backend, apps):
+    latencies = []
+    calls = []
+    prompt_estimated = []
+    prompt_billed = []
+    output_tokens = []
+    failures = 0
+    for _ in range(apps):
+        backend = MeteredBackend(raw_backend)
+        estimated_before = counter_total("prompt_tokens_estimated_total")
+        billed_before = counter_total("prompt_tokens_total")
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = main.process_application(pdf_bytes, main.read_pdf(pdf_bytes), job_description,
+                                               sink=MemorySink(), backend=backend, mode=mode)
+        latencies.append(time.perf_counter() - start)
+        if results.get("fatal_error") or "interview_prep" not in results:
+            failures += 1
+        calls.append(backend.calls)
+        prompt_estimated.append(counter_total("prompt_tokens_estimated_total") - estimated_before)
+        prompt_billed.append(counter_total("prompt_tokens_total") - billed_before)
+        output_tokens.append(backend.output_tokens)
+
+    def mean(values):
+        return round(sum(values) / len(values), 1)
+
+    return {"latency_ms": summarize(latencies), "model_calls": mean(calls),
+            "prompt_tokens_estimated": mean(prompt_estimated),
+            "prompt_tokens_billed": mean(prompt_billed) if any(prompt_billed) else None,
+            "output_tokens": mean(output_tokens), "failed_applications": failures,
+            "schema_failures": counter_total("schema_validation_failures_total")}
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default="stub", choices=["stub", "gemini"])
+    parser.add_argument("--apps", type=int, default=8, help="Applications per mode")
+    parser.add_argument("--latency", type=float, default=0.8, help="Stub latency per call (seconds)")
+    parser.add_argument("--out", help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    if args.backend == "stub":
+        raw_backend = StubBackend(latency=args.latency)
+    else:
+        # Real calls: the shared rate limiter keeps the benchmark inside the quota
+        raw_backend = RateLimitedModel(create_backend("gemini"), main.runtime.rate_limiter)
+
+    pdf_bytes = make_resume_pdf()
+    job_description = make_job_description()
+    report = {mode: run_mode(mode, pdf_bytes, job_description, raw_backend, args.apps)
+              for mode in main.PIPELINE_MODES}
+
+    print(f"{'mode':<8} {'p50 ms':>9} {'p95 ms':>9} {'calls':>6} {'prompt tok':>11} {'billed':>8} "
+          f"{'output tok':>11} {'failed':>7}")
+    for mode, row in report.items():
+        billed = row["prompt_tokens_billed"] if row["prompt_tokens_billed"] is not None else "-"
+        print(f"{mode:<8} {row['latency_ms']['p50']:>9.0f} {row['latency_ms']['p95']:>9.0f} {row['model_calls']:>6} "
+              f"{row['prompt_tokens_estimated']:>11} {billed:>8} {row['output_tokens']:>11} "
+              f"{row['failed_applications']:>7}")
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump({"backend": args.backend, "apps": args.apps, "modes": report}, f, indent=2)
+        print(f"✅ Saved report to: {args.out}")
+
+
+if __name__ == "__main__":
+    main_cli()
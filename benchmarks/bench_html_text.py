@@ -0,0 +1,123 @@
+"""
+Benchmark: page text extraction for company research.
+
+Compares, on a local corpus of large HTML pages:
+  - baseline : the original BeautifulSoup(html, 'html.parser').get_text(' ', strip=True)[:6000]
+  - stream   : html_text.extract_text (streaming, stops at the budget, skips boilerplate)
+and reports time per page plus how much script / nav / footer text ended up in each output.
+
+The corpus is every *.html file in --corpus. Save real pages there (e.g. with
+`curl -o benchmarks/data/html_corpus/acme.html https://acme.example/about`); if the folder
+is empty, a synthetic corpus (big menus, inline scripts, long articles) is written first.
+
+Usage:
+    python benchmarks/bench_html_text.py [--corpus DIR] [--limit 6000] [--repeats 5]
+"""
+import argparse
+import glob
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+import html_text  # noqa: E402
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "html_corpus")
+BOILERPLATE_MARKERS = ("function(", "Privacy Policy", "Menu item", "Cookie settings")
+
+WORDS = ("platform customers engineering team product mission build data cloud secure scale global "
+         "users growth founded million partners research design quality").split()
+
+
+def _paragraph(rng, sentences=6):
+    return " ".join(" ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize() + "."
+                    for _ in range(sentences))
+
+
+def make_page(rng, kind, size_kb):
+    """One synthetic page of roughly 'size_kb' KB; the layout depends on 'kind'."""
+    menu = "".join(f'<li><a href="/p{i}">Menu item {i}</a></li>' for i in range(300))
+    script = "<script>" + "window.__DATA__ = function(){ return %s };" % ("[" + "1," * 20000 + "1]") + "</script>"
+    style = "<style>" + ".c{color:red}" * 3000 + "</style>"
+    footer = "<footer>" + "<p>Privacy Policy | Terms | Cookie settings</p>" * 50 + "</footer>"
+    body = []
+    while sum(len(part) for part in body) < size_kb * 1024:
+        body.append(f"<h2>{rng.choice(WORDS).title()}</h2><p>{_paragraph(rng)}</p>")
+    content = "".join(body)
+    if kind == "article":
+        page_body = f"<header><nav><ul>{menu}</ul></nav></header><main><article>{content}</article></main>{footer}"
+    elif kind == "role_main":
+        page_body = f"<div class='top'><nav><ul>{menu}</ul></nav></div><div role='main'>{content}</div>{footer}"
+    else:  # "divs": no semantic markup at all
+        page_body = f"<div><ul>{menu}</ul></div><div class='content'>{content}</div><div>{footer}</div>"
+    return f"<!DOCTYPE html><html><head><title>Acme</title>{style}{script}</head><body>{page_body}{script}</body></html>"
+
+
+def write_synthetic_corpus(path, seed=0):
+    rng = random.Random(seed)
+    os.makedirs(path, exist_ok=True)
+    for kind in ("article", "role_main", "divs"):
+        for size_kb in (200, 800, 2000):
+            with open(os.path.join(path, f"{kind}_{size_kb}kb.html"), 'w', encoding='utf-8') as f:
+                f.write(make_page(rng, kind, size_kb))
+
+
+def baseline_extract(html, limit):
+    soup = BeautifulSoup(html, 'html.parser')
+    return soup.get_text(' ', strip=True)[:limit]
+
+
+def timed(func, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), result
+
+
+def boilerplate_share(text):
+    """Fraction of the output taken by script / nav / footer text (0 = none)."""
+    if not text:
+        return 0.0
+    hits = sum(text.count(marker) * len(marker) for marker in BOILERPLATE_MARKERS)
+    return min(1.0, hits / len(text))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Folder of saved *.html pages")
+    parser.add_argument("--limit", type=int, default=6000, help="Character budget per page")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.corpus, "*.html")))
+    if not paths:
+        print(f"📝 No pages in {args.corpus}: writing a synthetic corpus there.")
+        write_synthetic_corpus(args.corpus)
+        paths = sorted(glob.glob(os.path.join(args.corpus, "*.html")))
+
+    print(f"{'page':<24} {'KB':>7} {'bs4 ms':>9} {'stream ms':>10} {'speedup':>8} {'bs4 junk':>9} {'stream junk':>12}")
+    totals = {"baseline": 0.0, "stream": 0.0}
+    for path in paths:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            html = f.read()
+        baseline_s, baseline_text = timed(lambda: baseline_extract(html, args.limit), args.repeats)
+        stream_s, stream_text = timed(lambda: html_text.extract_text(html, args.limit), args.repeats)
+        totals["baseline"] += baseline_s
+        totals["stream"] += stream_s
+        print(f"{os.path.basename(path)[:24]:<24} {len(html) / 1024:>7.0f} {baseline_s * 1000:>9.1f} "
+              f"{stream_s * 1000:>10.1f} {baseline_s / stream_s:>7.1f}x "
+              f"{boilerplate_share(baseline_text):>9.0%} {boilerplate_share(stream_text):>12.0%}")
+
+    print(f"\nTotal: bs4 {totals['baseline']:.3f}s, stream {totals['stream']:.3f}s "
+          f"({totals['baseline'] / totals['stream']:.1f}x faster over {len(paths)} page(s))")
+
+
+if __name__ == "__main__":
+    main()
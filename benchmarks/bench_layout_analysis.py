@@ -0,0 +1,159 @@
+"""
+Benchmark: the local layout-risk check (layout_analysis) on generated resumes.
+
+Each fixture is a PDF with a known answer: single column, right-aligned dates, a label/value
+skills list, two columns, a ruled table, a header/footer splitting a sentence, skill bars.
+A header/footer between whole sentences and a photo can't be judged from the geometry,
+so they should go to the vision model (the label/value list may too, but must not be HIGH). Reports per fixture the local verdict, its
+confidence and time, and overall how many vision calls the check saves and whether any
+decided verdict disagrees with the expected one.
+
+Usage:
+    python benchmarks/bench_layout_analysis.py [--repeats 20]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fitz  # noqa: E402
+from layout_analysis import check_layout  # noqa: E402
+from pdf_ingest import parse_resume  # noqa: E402
+
+BODY = "\n".join(f"Backend developer at Acme ({i}): built REST APIs in Python, Django and PostgreSQL."
+                 for i in range(28))
+
+
+def _pdf(draw, pages=1):
+    doc = fitz.open()
+    for page_no in range(pages):
+        draw(doc.new_page(), page_no, pages)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def single_column(page, page_no, pages):
+    if page_no == 0:
+        page.insert_text((40, 50), "Dana Levi", fontsize=14)
+    page.insert_textbox(fitz.Rect(40, 70, 560, 790), "Experience\n" + BODY, fontsize=9)
+
+
+def right_aligned_dates(page, page_no, pages):
+    y = 50
+    for job in range(6):
+        page.insert_text((40, y), f"Backend Developer, Company {job}", fontsize=10)
+        page.insert_text((480, y), f"{2012 + job} - {2013 + job}", fontsize=10)
+        for bullet in range(3):
+            y += 14
+            page.insert_text((40, y), f"- Built and ran service {bullet} in Python and Go across three data centers.",
+                             fontsize=9)
+        y += 24
+
+
+def label_value_skills(page, page_no, pages):
+    page.insert_textbox(fitz.Rect(40, 40, 560, 400), "Experience\n" + BODY[:1200], fontsize=9)
+    skills = [("Languages:", "Python, Go, SQL, TypeScript"), ("Frameworks:", "Django, FastAPI, React, Flask"),
+              ("Databases:", "PostgreSQL, Redis, MongoDB, SQLite"), ("Tools:", "Docker, Kubernetes, Git, Terraform"),
+              ("Cloud:", "AWS Lambda, S3, RDS, CloudFront")]
+    page.insert_textbox(fitz.Rect(40, 420, 160, 520), "\n".join(label for label, _ in skills), fontsize=9)
+    page.insert_textbox(fitz.Rect(180, 420, 560, 520), "\n".join(value for _, value in skills), fontsize=9)
+
+
+def two_columns(page, page_no, pages):
+    page.insert_text((40, 50), "Dana Levi", fontsize=14)
+    page.insert_textbox(fitz.Rect(40, 80, 190, 790), "Skills\n" + "\n".join(f"Python / SQL {i}" for i in range(28)),
+                        fontsize=9)
+    page.insert_textbox(fitz.Rect(210, 80, 560, 790), "Experience\n" + BODY, fontsize=9)
+
+
+def ruled_table(page, page_no, pages):
+    page.insert_textbox(fitz.Rect(40, 40, 560, 300), "Experience\n" + BODY[:900], fontsize=9)
+    for y in (320, 350, 380, 410):
+        page.draw_line((40, y), (560, y))
+    for x in (40, 200, 380, 560):
+        page.draw_line((x, 320), (x, 410))
+    for row, y in enumerate((338, 368, 398)):
+        for col, x in enumerate((45, 205, 385)):
+            page.insert_text((x, y), f"Cell {row}.{col}", fontsize=9)
+
+
+def header_footer(page, page_no, pages):
+    page.insert_text((40, 30), "Dana Levi - Resume", fontsize=9)
+    page.insert_textbox(fitz.Rect(40, 70, 560, 780), "Experience\n" + BODY, fontsize=9)
+    page.insert_text((40, 825), f"Page {page_no + 1} of {pages}", fontsize=9)
+
+
+def header_footer_mid_sentence(page, page_no, pages):
+    page.insert_text((40, 30), "Dana Levi - Resume", fontsize=9)
+    if page_no == 0:
+        page.insert_textbox(fitz.Rect(40, 70, 560, 740), "Experience\n" + BODY, fontsize=9)
+        page.insert_text((40, 760), "Led the migration of the billing platform to an event-sourced design that",
+                         fontsize=9)
+    else:
+        page.insert_text((40, 80), "cut failed payments by 30% across three regions.", fontsize=9)
+        page.insert_textbox(fitz.Rect(40, 90, 560, 780), BODY, fontsize=9)
+    page.insert_text((40, 825), f"Page {page_no + 1} of {pages}", fontsize=9)
+
+
+def skill_bars(page, page_no, pages):
+    page.insert_textbox(fitz.Rect(40, 40, 560, 500), "Experience\n" + BODY, fontsize=9)
+    for i in range(5):
+        page.insert_text((40, 560 + i * 20), f"Skill {i}", fontsize=9)
+        page.draw_rect(fitz.Rect(150, 552 + i * 20, 180 + 30 * i, 560 + i * 20), color=None, fill=(0.2, 0.4, 0.8))
+
+
+def photo(page, page_no, pages):
+    single_column(page, page_no, pages)
+    pixmap = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 100, 100), 0)
+    pixmap.set_rect(pixmap.irect, (180, 120, 90))
+    page.insert_image(fitz.Rect(440, 30, 550, 140), pixmap=pixmap)
+
+
+# name -> (PDF factory, expected layout_risk, or None when only the vision model can tell)
+FIXTURES = {
+    "single column": (lambda: _pdf(single_column), "LOW"),
+    "single column, 2 pages": (lambda: _pdf(single_column, pages=2), "LOW"),
+    "right-aligned dates": (lambda: _pdf(right_aligned_dates), "LOW"),
+    "label/value skills": (lambda: _pdf(label_value_skills), "LOW"),
+    "two columns": (lambda: _pdf(two_columns), "HIGH"),
+    "ruled table": (lambda: _pdf(ruled_table), "HIGH"),
+    "header/footer": (lambda: _pdf(header_footer, pages=2), None),
+    "header/footer mid-sentence": (lambda: _pdf(header_footer_mid_sentence, pages=2), "HIGH"),
+    "skill bars": (lambda: _pdf(skill_bars), "HIGH"),
+    "photo": (lambda: _pdf(photo), None),
+}
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    decided = 0
+    wrong = []
+    print(f"{'fixture':<28} {'expected':>9} {'local':>7} {'conf':>5} {'ms':>6}")
+    for name, (make_pdf, expected) in FIXTURES.items():
+        parsed = parse_resume(make_pdf())
+        samples = []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            verdict, confidence, _ = check_layout(parsed)
+            samples.append(time.perf_counter() - start)
+        local = verdict["layout_risk"] if verdict else "vision"
+        print(f"{name:<28} {expected or 'vision':>9} {local:>7} {confidence:>5.2f} "
+              f"{statistics.median(samples) * 1000:>6.1f}")
+        if verdict:
+            decided += 1
+            if verdict["layout_risk"] != expected:
+                wrong.append(name)
+
+    print(f"\nvision calls avoided: {decided}/{len(FIXTURES)}")
+    print(f"decided verdicts that disagree with the expected one: {', '.join(wrong) or 'none'}")
+
+
+if __name__ == "__main__":
+    main_cli()
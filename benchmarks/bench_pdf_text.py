@@ -0,0 +1,103 @@
+"""
+Benchmark: PDF text extraction on synthetic resumes of 1..100 pages.
+
+Compares:
+  - baseline   : the original read_pdf (pdfplumber, page loop with text +=), if pdfplumber is installed
+  - sequential : PyMuPDF word/line extraction in one process
+  - parallel   : pdf_ingest.iter_page_texts (process pool for long documents)
+and reports time-to-first-page for the streaming API.
+
+Usage:
+    python benchmarks/bench_pdf_text.py [--pages 1 5 10 25 50 100] [--repeats 3]
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fitz  # noqa: E402
+import pdf_ingest  # noqa: E402
+
+try:
+    import pdfplumber
+except ImportError:
+    pdfplumber = None
+
+LINE = "Senior Python Developer at Acme Corp 2019 - 2024: built REST APIs, Docker, PostgreSQL, CI/CD."
+
+
+def make_synthetic_pdf(pages):
+    """Two-column pages full of resume-like lines."""
+    doc = fitz.open()
+    for page_no in range(pages):
+        page = doc.new_page()
+        left = "\n".join(f"Skill {page_no}-{i}: Python / SQL" for i in range(45))
+        right = "\n".join(f"{LINE} ({page_no}.{i})" for i in range(45))
+        page.insert_text((40, 50), left, fontsize=8)
+        page.insert_textbox(fitz.Rect(220, 40, 570, 800), right, fontsize=8)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def baseline_read(pdf_bytes):
+    """The original implementation (pdfplumber + quadratic string building)."""
+    text = ""
+    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+        for page in pdf.pages:
+            page_text = page.extract_text()
+            if page_text:
+                text += page_text
+    return text
+
+
+def sequential_read(pdf_bytes):
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        page_count = doc.page_count
+    return "\n".join(pdf_ingest._extract_page_range(pdf_bytes, 0, page_count))
+
+
+def parallel_read(pdf_bytes):
+    return "\n".join(page_text for _, page_text in pdf_ingest.iter_page_texts(pdf_bytes))
+
+
+def first_page_latency(pdf_bytes):
+    start = time.perf_counter()
+    next(iter(pdf_ingest.iter_page_texts(pdf_bytes)))
+    return time.perf_counter() - start
+
+
+def timed(func, pdf_bytes, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(pdf_bytes)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 5, 10, 25, 50, 100])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    # Start the worker processes up front so pool start-up is not billed to the first size
+    pdf_ingest._get_pool().submit(int).result()
+
+    print(f"{'pages':>6} {'baseline':>10} {'sequential':>11} {'parallel':>10} {'1st page':>9}  (median seconds)")
+    for pages in args.pages:
+        pdf_bytes = make_synthetic_pdf(pages)
+        baseline = f"{timed(baseline_read, pdf_bytes, args.repeats):.4f}" if pdfplumber else "n/a"
+        sequential = timed(sequential_read, pdf_bytes, args.repeats)
+        parallel = timed(parallel_read, pdf_bytes, args.repeats)
+        first = statistics.median(first_page_latency(pdf_bytes) for _ in range(args.repeats))
+        print(f"{pages:>6} {baseline:>10} {sequential:>11.4f} {parallel:>10.4f} {first:>9.4f}")
+
+
+if __name__ == "__main__":
+    main()
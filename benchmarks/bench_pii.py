@@ -0,0 +1,81 @@
+"""
+Benchmark: PII redaction on batch-sized inputs.
+
+Compares:
+  - baseline : the original scrub (two inline re.sub passes, emails + one phone format)
+  - engine   : pii.redact_pii (one precompiled scanner, all PII kinds, span map)
+on synthetic resume text of growing size, and reports seconds per MB, which should stay
+flat as the input grows (linear scaling). A few adversarial inputs (long digit / dot
+runs) check that no pattern backtracks badly.
+
+Usage:
+    python benchmarks/bench_pii.py [--sizes-mb 0.1 1 5 20] [--repeats 3]
+"""
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pii  # noqa: E402
+
+SAMPLE = """Dana Levi
+dana.levi@example.com | +972 54-123-4567 | linkedin.com/in/dana-levi | github.com/danalevi
+221 Baker Street, Apt 4B, London
+Experience
+Backend Developer, Acme Corp 2019 - 2024: built REST APIs in Python and PostgreSQL for 10,000 users.
+Data Engineer, Globex 2015-2019: ETL pipelines, Airflow, Spark. Contact: (555) 123-4567, SSN 123-45-6789.
+"""
+
+ADVERSARIAL = {
+    "digit_run": "1" * 200_000,
+    "digit_groups": "12 " * 70_000,
+    "dots": "a." * 100_000,
+    "at_signs": "a@" * 100_000,
+}
+
+
+def baseline_scrub(text):
+    text = re.sub(r'[\w.-]+@[\w.-]+\.\w+', '[EMAIL_HIDDEN]', text)
+    text = re.sub(r'(?:\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}', '[PHONE_HIDDEN]', text)
+    return text
+
+
+def timed(func, text, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(text)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[0.1, 1, 5, 20])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    redaction = pii.redact_pii(SAMPLE)
+    print("--- Coverage on one resume ---")
+    print(f"baseline placeholders: {baseline_scrub(SAMPLE).count('_HIDDEN]')}")
+    print(f"engine hits by kind:   {redaction.counts()}")
+
+    print(f"\n{'size MB':>8} {'baseline s':>11} {'engine s':>9} {'engine s/MB':>12}")
+    for size_mb in args.sizes_mb:
+        text = SAMPLE * max(1, int(size_mb * 1024 * 1024 / len(SAMPLE)))
+        baseline = timed(baseline_scrub, text, args.repeats)
+        engine = timed(pii.redact_pii, text, args.repeats)
+        actual_mb = len(text) / (1024 * 1024)
+        print(f"{actual_mb:>8.2f} {baseline:>11.4f} {engine:>9.4f} {engine / actual_mb:>12.4f}")
+
+    print("\n--- Adversarial inputs (engine seconds) ---")
+    for name, text in ADVERSARIAL.items():
+        print(f"{name:<14} {timed(pii.redact_pii, text, 1):.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""
+Benchmark: the whole job hunter pipeline, offline.
+
+Generated fixtures (two-column resume PDF, JD text) and llm_backend.StubBackend with a
+fixed latency stand in for the user and for Gemini, so numbers only move when our own
+code does. Reports:
+  - micro   : read_pdf, convert_first_page_to_image, render_resume_pages, PII scrub, prompt assembly
+              (prepare_section), JSON parsing and the Step 2 rendering loop
+  - pipeline: parse + process_application at each --concurrency level, with per-stage
+              p50/p95/p99 latency (from stage_timings) and applications per second
+  - peak RSS of the benchmark process
+Everything is also written to a JSON file, so two commits can be compared (--compare).
+
+Usage:
+    python benchmarks/bench_pipeline.py [--apps 16] [--concurrency 1 4 8] [--latency 0.05]
+    python benchmarks/bench_pipeline.py --compare benchmarks/results/pipeline_<old>.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("COMPANY_RESEARCH", "0")  # Stay offline: no web searches from the benchmark
+os.environ.setdefault("RESUME_STORE", "0")  # Every application re-runs the resume checks
+os.environ.setdefault("VISUAL_CACHE", "0")  # ...including the vision call
+os.environ.setdefault("CHECKPOINTS", "0")  # A failed application starts over instead of resuming
+
+import fitz  # noqa: E402
+import main  # noqa: E402
+from artifacts import MemorySink  # noqa: E402
+from llm_backend import CANNED_RESPONSES, StubBackend  # noqa: E402
+from pdf_ingest import parse_resume  # noqa: E402
+from streaming import IncrementalJSONParser  # noqa: E402
+from token_budget import STAGE_BUDGETS, prepare_section  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+RESUME_HEADER = "Dana Levi\ndana.levi@example.com | +972 54-123-4567 | linkedin.com/in/danalevi\nTel Aviv, Israel"
+EXPERIENCE_LINE = "Backend Developer, Acme Corp 2019 - 2024: built REST APIs in Python, Django, PostgreSQL, Docker."
+JD_LINES = [
+    "We are looking for a Backend Engineer to join our platform team.",
+    "Requirements: 3+ years of Python, SQL, REST APIs, Docker and Git.",
+    "Nice to have: Kubernetes, AWS, experience with high-traffic systems.",
+    "We are an equal opportunity employer and value diversity.",
+    "Apply now to join a fast-growing team!",
+]
+
+
+def make_resume_pdf(pages=2):
+    """Two-column resume: skills on the left, experience on the right (the case the visual check looks for)."""
+    doc = fitz.open()
+    for page_no in range(pages):
+        page = doc.new_page()
+        if page_no == 0:
+            page.insert_text((40, 50), RESUME_HEADER, fontsize=11)
+        left = "Skills\n" + "\n".join(f"Python / SQL / Git {i}" for i in range(35))
+        right = "Experience\n" + "\n".join(f"{EXPERIENCE_LINE} ({page_no}.{i})" for i in range(35))
+        page.insert_text((40, 110), left, fontsize=8)
+        page.insert_textbox(fitz.Rect(220, 100, 570, 800), right, fontsize=8)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def make_job_description(repeats=6):
+    """JD with the usual duplicate / boilerplate lines, so compaction has work to do."""
+    return "\n\n".join("\n".join(JD_LINES) for _ in range(repeats))
+
+
+def make_interview_items(count=6):
+    return [{"topic": f"Topic {i}", "type": "LeetCode" if i % 2 else "Theory", "proficiency_level": "MUST KNOW",
+             "is_real": bool(i % 2), "problem_name": f"Problem {i}", "verification_link": f"https://example.com/{i}",
+             "content": "Given an array of integers, return ... " * 5, "code_snippet": "def solve(nums):\n    pass",
+             "solution": "Use a hash map to ... " * 10, "complexity": "Time: O(n), Space: O(n)"}
+            for i in range(count)]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(samples):
+    """Seconds -> {"p50", "p95", "p99", "mean", "n"} in milliseconds."""
+    millis = [s * 1000 for s in samples]
+    return {"p50": round(statistics.median(millis), 3), "p95": round(percentile(millis, 95), 3),
+            "p99": round(percentile(millis, 99), 3), "mean": round(statistics.fmean(millis), 3), "n": len(millis)}
+
+
+def time_calls(func, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def canned(marker):
+    return next(json.dumps(answer) for key, answer in CANNED_RESPONSES if key == marker)
+
+
+def parse_like_pipeline(raw):
+    return json.loads(raw.replace("```json", "").replace("```", "").strip())
+
+
+def parse_streamed(raw, chunk_size=40):
+    parser = IncrementalJSONParser()
+    for start in range(0, len(raw), chunk_size):
+        parser.feed(raw[start:start + chunk_size])
+
+
+def render_interview(items):
+    q_file, sol_file = "", ""
+    for idx, item in enumerate(items, 1):
+        entry, sol_entry = main.format_interview_item(idx, item)
+        q_file += entry
+        sol_file += sol_entry
+    return q_file, sol_file
+
+
+def run_micro(pdf_bytes, job_description, repeats):
+    resume_text = main.read_pdf(pdf_bytes)
+    profile_raw = "```json\n" + canned("experience_level") + "\n```"
+    interview_raw = json.dumps(make_interview_items())
+    items = make_interview_items()
+
+    cases = {
+        "read_pdf": lambda: main.read_pdf(pdf_bytes),
+        "convert_first_page_to_image": lambda: main.convert_first_page_to_image(pdf_bytes),
+        "render_resume_pages": lambda: main.render_resume_pages(pdf_bytes),
+        "pii_scrub": lambda: main.sanitize_resume_text(resume_text),
+        "prompt_assembly": lambda: [prepare_section(job_description if stage == "profile_jd" else resume_text,
+                                                    stage, aggressive=stage == "profile_jd")
+                                    for stage in STAGE_BUDGETS],
+        "json_parse_profile": lambda: parse_like_pipeline(profile_raw),
+        "json_parse_interview": lambda: parse_like_pipeline(interview_raw),
+        "json_parse_streamed": lambda: parse_streamed(interview_raw),
+        "step2_render": lambda: render_interview(items),
+    }
+    report = {}
+    for name, func in cases.items():
+        report[name] = summarize(time_calls(func, repeats))
+    return report
+
+
+def run_application(pdf_bytes, job_description, backend):
+    """One user request as the web app runs it: parse the upload, then the stage graph."""
+    start = time.perf_counter()
+    parsed = parse_resume(pdf_bytes)
+    resume_text = main.read_pdf(parsed)
+    parse_seconds = time.perf_counter() - start
+    results = main.process_application(parsed, resume_text, job_description, sink=MemorySink(), backend=backend)
+    timings = dict(results["stage_timings"])
+    timings["parse"] = parse_seconds
+    timings["end_to_end"] = time.perf_counter() - start
+    return timings
+
+
+def run_pipeline(pdf_bytes, job_description, apps, concurrency, latency):
+    # Raw stub, no response cache / rate limiter: every application pays the full model latency
+    backend = StubBackend(latency=latency)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        all_timings = list(pool.map(lambda _: run_application(pdf_bytes, job_description, backend), range(apps)))
+    wall = time.perf_counter() - start
+
+    stages = {}
+    for timings in all_timings:
+        for stage, seconds in timings.items():
+            stages.setdefault(stage, []).append(seconds)
+    return {"applications": apps, "wall_seconds": round(wall, 3),
+            "throughput_per_second": round(apps / wall, 3), "model_calls": backend.stats["calls"],
+            "stages": {stage: summarize(samples) for stage, samples in sorted(stages.items())}}
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(old, new):
+    """Prints p50 changes for every metric present in both reports."""
+    print(f"\n--- Compared with {old['meta']['commit']} (p50 ms, + = slower) ---")
+    for name, stats in new["micro"].items():
+        if name in old.get("micro", {}):
+            before = old["micro"][name]["p50"]
+            print(f"{name:<30} {before:>10.3f} -> {stats['p50']:>10.3f}  ({stats['p50'] - before:+.3f})")
+    for level, run in new["pipeline"].items():
+        old_run = old.get("pipeline", {}).get(level)
+        if old_run:
+            print(f"concurrency {level:<18} {old_run['throughput_per_second']:>10.3f} -> "
+                  f"{run['throughput_per_second']:>10.3f} apps/s")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apps", type=int, default=16, help="Applications per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub model latency per call (seconds)")
+    parser.add_argument("--pages", type=int, default=2, help="Pages in the generated resume")
+    parser.add_argument("--repeats", type=int, default=50, help="Repetitions per micro benchmark")
+    parser.add_argument("--out", help="Output JSON (default: benchmarks/results/pipeline_<commit>.json)")
+    parser.add_argument("--compare", help="Previous JSON report to compare against")
+    args = parser.parse_args()
+
+    pdf_bytes = make_resume_pdf(args.pages)
+    job_description = make_job_description()
+
+    # The pipeline prints a lot: keep the benchmark output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        micro = run_micro(pdf_bytes, job_description, args.repeats)
+        pipeline = {str(level): run_pipeline(pdf_bytes, job_description, args.apps, level, args.latency)
+                    for level in args.concurrency}
+
+    report = {
+        "meta": {"commit": git_commit(), "created_at": datetime.now().isoformat(timespec="seconds"),
+                 "python": platform.python_version(), "platform": platform.platform(),
+                 "cpu_count": os.cpu_count(), "args": vars(args)},
+        "micro": micro,
+        "pipeline": pipeline,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+    print(f"{'micro (ms)':<30} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for name, stats in micro.items():
+        print(f"{name:<30} {stats['p50']:>9.3f} {stats['p95']:>9.3f} {stats['p99']:>9.3f}")
+    for level, run in pipeline.items():
+        print(f"\n--- concurrency {level}: {run['throughput_per_second']:.2f} apps/s "
+              f"({run['applications']} apps in {run['wall_seconds']:.2f}s) ---")
+        for stage, stats in run["stages"].items():
+            print(f"{stage:<30} {stats['p50']:>9.1f} {stats['p95']:>9.1f} {stats['p99']:>9.1f}")
+    print(f"\npeak RSS: {report['peak_rss_mb']} MB")
+
+    out_path = args.out or os.path.join(RESULTS_DIR, f"pipeline_{report['meta']['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Saved report to: {out_path}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,125 @@
+"""
+Benchmark: the shared rate limiter and retry wrapper (rate_limiter), offline and in simulated time.
+
+Everything runs against fakes.FakeClock and fakes.FakeModel, so no key, network or real waiting is needed:
+    - throughput: requests sent through RateLimitedModel at a given RPM / TPM; reports the simulated
+      time they take, how many were throttled, and the busiest 60 s window (the quota plus at most
+      the one full bucket a cold start may spend);
+    - retries: scripted 429/5xx failures are retried with backoff, other errors are raised at once,
+      and a failure that outlives max_retries is re-raised;
+    - error classification: which errors is_transient_error treats as worth a retry
+      (status codes only count as the error's code or at the start of its message).
+
+Usage:
+    python benchmarks/bench_rate_limiter.py [--requests 60] [--rpm 15] [--tpm 1000000] [--prompt-tokens 2000]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fakes import FakeClock, FakeModel  # noqa: E402
+from llm_backend import StubAPIError  # noqa: E402
+from rate_limiter import RateLimitedModel, RateLimiter, is_transient_error  # noqa: E402
+
+# (error, expected is_transient_error)
+ERRORS = [
+    (StubAPIError(429), True),
+    (StubAPIError(503), True),
+    (Exception("429 Resource exhausted: quota exceeded"), True),
+    (Exception("504 Deadline Exceeded"), True),
+    (Exception("Service Unavailable, try again later"), True),
+    (Exception("400 Request payload is 5000 bytes over the limit"), False),
+    (ValueError("Prompt is 500 tokens over the limit"), False),
+    (Exception("Invalid model name gemini-1.5-flash-503"), False),
+    (ValueError("API Key not found! Check your .env file."), False),
+]
+
+
+def make_model(clock, script=None, rpm=15, tpm=1_000_000, max_retries=5):
+    limiter = RateLimiter(requests_per_minute=rpm, tokens_per_minute=tpm, clock=clock, sleep=clock.sleep)
+    model = FakeModel(script)
+    # rng=1.0: always the longest backoff, so the simulated waits are reproducible
+    return RateLimitedModel(model, limiter, max_retries=max_retries, rng=lambda: 1.0), model, limiter
+
+
+def busiest_minute(times):
+    """Most requests sent within any 60 s window."""
+    return max((sum(1 for t in times if start <= t < start + 60) for start in times), default=0)
+
+
+def bench_throughput(requests, rpm, tpm, prompt_tokens):
+    clock = FakeClock()
+    wrapped, _, limiter = make_model(clock, rpm=rpm, tpm=tpm)
+    prompt = "word " * prompt_tokens
+    sent_at = []
+    for _ in range(requests):
+        wrapped.generate_content(prompt)
+        sent_at.append(clock())
+    peak = busiest_minute(sent_at)
+    print(f"{'requests':>9} {'rpm':>5} {'tpm':>9} {'simulated s':>12} {'throttled':>10} {'busiest 60s':>12}")
+    print(f"{requests:>9} {rpm:>5} {tpm:>9} {clock():>12.1f} {limiter.stats['throttled']:>10} {peak:>12}")
+    # A full bucket lets one extra minute's worth through at the start, never more
+    return [] if peak <= 2 * rpm else [f"busiest minute sent {peak} requests at {rpm} RPM"]
+
+
+def bench_retries():
+    failures = []
+    scenarios = [
+        ("two 429s, then an answer", [StubAPIError(429), StubAPIError(429), "{}"], 5, None),
+        ("503, then an answer", [StubAPIError(503), "{}"], 5, None),
+        ("non-transient error", [ValueError("bad request"), "{}"], 5, ValueError),
+        ("429 past max_retries", [StubAPIError(429)] * 4, 2, StubAPIError),
+    ]
+    print(f"\n{'scenario':<26} {'calls':>6} {'retries':>8} {'backoff s':>10} {'raised':<14}")
+    for name, script, max_retries, expected_error in scenarios:
+        clock = FakeClock()
+        wrapped, model, _ = make_model(clock, script=script, max_retries=max_retries)
+        raised = None
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):  # Hide the per-retry prints
+                wrapped.generate_content("hi")
+        except Exception as e:
+            raised = type(e)
+        print(f"{name:<26} {len(model.calls):>6} {wrapped.retries:>8} {sum(clock.sleeps):>10.1f} "
+              f"{raised.__name__ if raised else '-':<14}")
+        if raised is not expected_error:
+            failures.append(f"{name}: raised {raised}, expected {expected_error}")
+        transient = sum(1 for item in script[:len(model.calls)] if isinstance(item, StubAPIError))
+        if wrapped.retries != min(transient, max_retries):
+            failures.append(f"{name}: {wrapped.retries} retries")
+    return failures
+
+
+def bench_errors():
+    failures = []
+    print(f"\n{'error':<58} {'transient':>9}")
+    for error, expected in ERRORS:
+        transient = is_transient_error(error)
+        print(f"{str(error)[:58]:<58} {str(transient):>9}")
+        if transient != expected:
+            failures.append(f"is_transient_error({error!r}) = {transient}")
+    return failures
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--rpm", type=int, default=15)
+    parser.add_argument("--tpm", type=int, default=1_000_000)
+    parser.add_argument("--prompt-tokens", type=int, default=2000)
+    args = parser.parse_args()
+
+    failures = bench_throughput(args.requests, args.rpm, args.tpm, args.prompt_tokens)
+    failures += bench_retries()
+    failures += bench_errors()
+    print(f"\nchecks failed: {'; '.join(failures) or 'none'}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,124 @@
+"""
+Benchmark: the company research stage (web_research) against a local HTTP stand-in server.
+
+A http.server on 127.0.0.1 plays the company's site: a fast "about" page, a 404, and a page
+that answers only after --slow seconds. The search function is injected (no DuckDuckGo), and
+can be made slow too. Scenarios:
+    - fast        : searches and pages answer at once;
+    - slow search : the searches use most of the deadline, so the slow page must be dropped;
+    - slow both   : searches and a page each take longer than half the deadline;
+    - cached      : the "fast" scenario again on the same page cache (no requests expected).
+Reports per scenario the wall time, the requests that reached the server and the text kept, and
+checks that no scenario outlives RESEARCH_DEADLINE (searches and fetches share one budget).
+
+Usage:
+    python benchmarks/bench_research.py [--deadline 2] [--slow 1.4]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from page_cache import PageCache  # noqa: E402
+from web_research import CompanyResearcher, HttpPool  # noqa: E402
+
+JOB_DESCRIPTION = "About Acme\nAcme is hiring a backend developer to build our Python platform."
+ABOUT_HTML = ("<html><body><main><h1>About Acme</h1>"
+              "<p>Acme was founded in 2012 and builds a logistics platform for 3 million users.</p>"
+              "<p>Our engineering team ships Python and PostgreSQL services every day.</p>"
+              "</main></body></html>")
+SLACK = 0.5  # Seconds allowed past the deadline (thread start-up, the final condense)
+
+
+class StandInSite(BaseHTTPRequestHandler):
+    slow_seconds = 1.0
+    requests_seen = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with StandInSite.lock:
+            StandInSite.requests_seen += 1
+        if self.path == "/slow":
+            time.sleep(self.slow_seconds)
+        if self.path == "/missing":
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = ABOUT_HTML.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def make_search(base_url, paths, delay=0.0):
+    """Search stand-in: every query returns the same local links after 'delay' seconds."""
+    def search(query, max_results):
+        time.sleep(delay)
+        return [{"href": base_url + path} for path in paths][:max_results]
+    return search
+
+
+def run(search, cache, deadline):
+    """(seconds, server requests, chars kept) for one research() call."""
+    researcher = CompanyResearcher(search=search, pool=HttpPool(), cache=cache, deadline=deadline)
+    seen = StandInSite.requests_seen
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        context = researcher.research(JOB_DESCRIPTION)
+    return time.perf_counter() - start, StandInSite.requests_seen - seen, len(context)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--deadline", type=float, default=2.0)
+    parser.add_argument("--slow", type=float, default=1.4, help="seconds the slow page and slow search take")
+    args = parser.parse_args()
+
+    StandInSite.slow_seconds = args.slow
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInSite)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    scenarios = [
+        ("fast", make_search(base_url, ["/about", "/missing"]), "fast"),
+        ("slow search", make_search(base_url, ["/about", "/slow"], delay=args.deadline - 0.5), "slow search"),
+        ("slow both", make_search(base_url, ["/slow", "/about"], delay=args.slow), "slow both"),
+        ("cached", make_search(base_url, ["/about", "/missing"]), "fast"),
+    ]
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        caches = {}
+        print(f"{'scenario':<12} {'seconds':>8} {'requests':>9} {'chars kept':>11}")
+        for name, search, cache_name in scenarios:
+            if cache_name not in caches:
+                caches[cache_name] = PageCache(os.path.join(tmp, f"{len(caches)}.sqlite"))
+            seconds, requests, chars = run(search, caches[cache_name], args.deadline)
+            print(f"{name:<12} {seconds:>8.2f} {requests:>9} {chars:>11}")
+            if seconds > args.deadline + SLACK:
+                failures.append(f"{name} took {seconds:.2f}s with a {args.deadline:g}s deadline")
+            if name in ("fast", "cached") and not chars:
+                failures.append(f"{name} kept no text")
+            if name == "cached" and requests:
+                failures.append(f"cached run sent {requests} request(s)")
+    server.shutdown()
+
+    print(f"\nchecks failed: {'; '.join(failures) or 'none'}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,77 @@
+"""
+Report: accuracy and latency of the local resume pre-classifier.
+
+Runs resume_classifier.classify_resume_text over the labelled corpus in
+benchmarks/data/resume_corpus.jsonl and prints, per sample, the score and verdict
+(True / False / None = would fall back to the LLM), then accuracy and latency.
+
+Usage:
+    python benchmarks/bench_resume_classifier.py [--corpus path.jsonl] [--repeats 200]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import resume_classifier  # noqa: E402
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "resume_corpus.jsonl")
+
+
+def load_corpus(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--repeats", type=int, default=200, help="Timing repetitions per sample")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    correct = wrong = ambiguous = 0
+    latencies = []
+
+    print(f"{'kind':<28} {'label':>6} {'score':>6} {'verdict':>8}")
+    for sample in corpus:
+        verdict, score, _ = resume_classifier.classify_resume_text(sample["text"])
+        if verdict is None:
+            ambiguous += 1
+            mark = ""
+        elif verdict == sample["label"]:
+            correct += 1
+            mark = ""
+        else:
+            wrong += 1
+            mark = "  <-- WRONG"
+        print(f"{sample['kind']:<28} {str(sample['label']):>6} {score:>6.1f} {str(verdict):>8}{mark}")
+
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            resume_classifier.classify_resume_text(sample["text"])
+            latencies.append(time.perf_counter() - start)
+
+    decided = correct + wrong
+    print("\n--- Accuracy ---")
+    print(f"samples: {len(corpus)}  decided locally: {decided}  sent to LLM: {ambiguous}")
+    print(f"accuracy on decided: {correct / decided:.1%}" if decided else "accuracy on decided: n/a")
+    print(f"wrong verdicts: {wrong}")
+
+    print("\n--- Latency per call (microseconds) ---")
+    micro = [s * 1e6 for s in latencies]
+    print(f"p50: {statistics.median(micro):.1f}  p95: {percentile(micro, 95):.1f}  "
+          f"p99: {percentile(micro, 99):.1f}  max: {max(micro):.1f}")
+
+
+if __name__ == "__main__":
+    main()
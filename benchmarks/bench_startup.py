@@ -0,0 +1,120 @@
+"""
+Benchmark: cold start of the entry points.
+
+Each measurement runs in a fresh interpreter (`python -X importtime`), so nothing is
+already imported or cached:
+  - import time of main and batch (cumulative microseconds reported by -X importtime)
+    and their slowest direct imports
+  - which heavy third-party modules were loaded just by importing main (should be none:
+    google.generativeai, PyMuPDF, PIL, requests, duckduckgo_search, jsonschema)
+  - time to the first rendered page of the web app (streamlit.testing AppTest, if installed)
+
+With --check the script exits non-zero when a heavy module is imported at startup or
+'import main' exceeds --max-ms, so it can run as a test in CI.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--check] [--max-ms 400] [--no-app]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ["google.generativeai", "fitz", "pymupdf", "PIL.Image", "requests", "duckduckgo_search",
+                 "jsonschema", "bs4"]
+
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+_FIRST_PAGE_SNIPPET = """
+import time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file("app.py", default_timeout=120)
+app.run()
+assert not app.exception, app.exception
+print(time.perf_counter() - start)
+"""
+
+
+def _python(args, **kwargs):
+    return subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True, **kwargs)
+
+
+def import_profile(module):
+    """(total_ms, [(child, ms)] slowest direct imports first) for one cold 'import module'."""
+    result = _python(["-X", "importtime", "-c", f"import {module}"])
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    total = None
+    children = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        cumulative, indent, name = int(match.group(2)), len(match.group(3)), match.group(4)
+        if indent == 1 and name == module:
+            total = cumulative / 1000
+        elif indent == 3:
+            children.append((name, cumulative / 1000))
+    # -X importtime prints children before their parent; the last top-level block is 'module'
+    return total, sorted(children, key=lambda item: item[1], reverse=True)
+
+
+def heavy_modules_loaded(module):
+    snippet = (f"import json, sys; import {module}; "
+               f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))")
+    result = _python(["-c", snippet])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def first_page_seconds():
+    result = _python(["-c", _FIRST_PAGE_SNIPPET], env={**os.environ, "COMPANY_RESEARCH": "0"})
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Cold starts per measurement")
+    parser.add_argument("--check", action="store_true", help="Fail on heavy imports or a slow 'import main'")
+    parser.add_argument("--max-ms", type=float, default=400, help="Budget for 'import main' with --check")
+    parser.add_argument("--no-app", action="store_true", help="Skip the Streamlit first-page measurement")
+    args = parser.parse_args()
+
+    failures = []
+    for module in ("main", "batch"):
+        profiles = [import_profile(module) for _ in range(args.runs)]
+        median = statistics.median(total for total, _ in profiles)
+        print(f"\nimport {module}: {median:.1f} ms (median of {args.runs} cold starts)")
+        for name, ms in profiles[-1][1][:6]:
+            print(f"    {name:<28} {ms:>8.1f} ms")
+        if module == "main" and median > args.max_ms:
+            failures.append(f"import main took {median:.1f} ms (budget {args.max_ms:.0f} ms)")
+
+    heavy = heavy_modules_loaded("main")
+    print(f"\nheavy modules loaded by 'import main': {heavy or 'none'}")
+    if heavy:
+        failures.append(f"'import main' loads {heavy}")
+
+    if not args.no_app:
+        try:
+            samples = [first_page_seconds() for _ in range(args.runs)]
+            print(f"web app first page (AppTest, incl. streamlit import): {statistics.median(samples) * 1000:.0f} ms")
+        except (ImportError, RuntimeError) as e:
+            print(f"⚠️ First-page measurement skipped: {str(e).strip().splitlines()[-1]}")
+
+    if args.check:
+        if failures:
+            print("\n❌ " + "\n❌ ".join(failures))
+            sys.exit(1)
+        print("\n✅ Startup checks passed.")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,97 @@
+"""
+Benchmark: what the visual check sends to the vision model.
+
+Compares the old payload (page 1 only, full-color 72 dpi raster, which the Gemini SDK
+encodes as lossless WebP) with visual_render at each color mode and DPI. Per setting:
+pages covered, images, bytes on the wire, estimated image tokens and render+encode time.
+Then checks the perceptual hash: a lightly edited revision of the resume should land
+within the cache distance, a different layout should not.
+
+Usage:
+    python benchmarks/bench_visual_render.py [--pages 3] [--dpi 48 64 96] [--repeats 10]
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fitz  # noqa: E402
+import visual_render  # noqa: E402
+from bench_pipeline import make_resume_pdf  # noqa: E402
+from pdf_ingest import parse_resume  # noqa: E402
+from token_budget import image_tokens  # noqa: E402
+
+
+def make_revision(pdf_bytes):
+    """Same resume with one line reworded (what a user re-uploads after a small fix)."""
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    doc[0].insert_text((40, 95), "Updated: open to relocation", fontsize=8)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def make_single_column_pdf(pages):
+    doc = fitz.open()
+    for _ in range(pages):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(40, 50, 570, 800), "\n".join(f"Single column line {i}" for i in range(60)),
+                            fontsize=9)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def median_ms(func, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000, result
+
+
+def legacy_payload(pdf_bytes):
+    image = parse_resume(pdf_bytes).first_page_image
+    buffer = io.BytesIO()
+    image.save(buffer, format="webp", lossless=True)  # What google.generativeai does with a PIL image
+    return image.size, len(buffer.getvalue())
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=3, help="Pages in the generated resume")
+    parser.add_argument("--dpi", type=int, nargs="+", default=[48, visual_render.VISUAL_DPI, 96])
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+
+    pdf_bytes = make_resume_pdf(pages=args.pages)
+
+    print(f"{'setting':<22} {'pages':>6} {'images':>7} {'KB':>8} {'img tok':>8} {'ms':>7}")
+    ms, (size, payload) = median_ms(lambda: legacy_payload(pdf_bytes), args.repeats)
+    print(f"{'legacy rgb 72dpi':<22} {f'1/{args.pages}':>6} {1:>7} {payload / 1024:>8.1f} "
+          f"{image_tokens(*size):>8} {ms:>7.1f}")
+    for color in visual_render.COLOR_MODES:
+        for dpi in args.dpi:
+            ms, rendered = median_ms(lambda: visual_render.render_for_visual(pdf_bytes, dpi=dpi, color=color),
+                                     args.repeats)
+            print(f"{f'{color} {dpi}dpi':<22} {f'{rendered.pages_rendered}/{rendered.page_count}':>6} "
+                  f"{len(rendered.parts):>7} {rendered.payload_bytes / 1024:>8.1f} {rendered.estimated_tokens:>8} "
+                  f"{ms:>7.1f}")
+
+    base = visual_render.render_for_visual(pdf_bytes).page_hash
+    pages = len(base.split("-"))
+    threshold = visual_render.HASH_DISTANCE_PER_PAGE * pages
+    revision = visual_render.hash_distance(base, visual_render.render_for_visual(make_revision(pdf_bytes)).page_hash)
+    other = visual_render.hash_distance(base, visual_render.render_for_visual(make_single_column_pdf(args.pages)).page_hash)
+    print(f"\nperceptual hash distance (cache hit at <= {threshold} bits over {pages} pages):")
+    print(f"    revised resume      {revision:>4} bits {'-> reuses verdict' if revision <= threshold else '-> new call'}")
+    print(f"    different layout    {other:>4} bits {'-> reuses verdict' if other <= threshold else '-> new call'}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,128 @@
+"""
+Stage checkpoints.
+
+Every stage result of a run is saved under the run id as soon as the stage succeeds.
+If the run fails part-way (a quota stop, an unusable answer), running it again with the
+same run id restores the finished stages and only calls the model for the rest:
+
+    checkpoint = RunCheckpoint(get_checkpoint_store(), run_id)
+    graph = StageGraph(checkpoint=checkpoint)     # restores what it can, saves the rest
+    ...
+    checkpoint.clear()                             # the run completed: nothing to resume
+
+Results are stored as JSON, so tuples come back as lists. Given the run's pii.Redaction,
+contact details put back into a result (cover letter, feedback) are stored as their
+placeholders and restored on load. A completed run clears its checkpoints; leftovers of
+abandoned runs expire after 'max_age_seconds'.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+CHECKPOINT_PATH = os.path.join(".cache", "checkpoints.sqlite")
+
+
+class CheckpointStore:
+    """SQLite table of (run_id, stage) -> JSON result."""
+
+    def __init__(self, db_path, max_age_seconds=7 * 24 * 3600):
+        self.db_path = db_path
+        self.max_age_seconds = max_age_seconds
+        self.stats = {"restored": 0, "saved": 0, "expired": 0}
+        self._lock = threading.Lock()
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoints ("
+            "run_id TEXT, stage TEXT, created_at REAL, result TEXT, PRIMARY KEY (run_id, stage))"
+        )
+        self._db.commit()
+        self.expire()
+
+    def load(self, run_id):
+        """{stage: result} saved for the run ({} for an unknown run)."""
+        with self._lock:
+            rows = self._db.execute("SELECT stage, result FROM checkpoints WHERE run_id = ?", (run_id,)).fetchall()
+            self.stats["restored"] += len(rows)
+        return {stage: json.loads(result) for stage, result in rows}
+
+    def save(self, run_id, stage, result):
+        payload = json.dumps(result, ensure_ascii=False)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO checkpoints (run_id, stage, created_at, result) VALUES (?, ?, ?, ?)",
+                (run_id, stage, time.time(), payload),
+            )
+            self._db.commit()
+            self.stats["saved"] += 1
+
+    def clear(self, run_id):
+        with self._lock:
+            self._db.execute("DELETE FROM checkpoints WHERE run_id = ?", (run_id,))
+            self._db.commit()
+
+    def expire(self):
+        """Drops checkpoints older than max_age_seconds. Returns the count."""
+        with self._lock:
+            cur = self._db.execute("DELETE FROM checkpoints WHERE created_at < ?",
+                                   (time.time() - self.max_age_seconds,))
+            self._db.commit()
+            self.stats["expired"] += cur.rowcount
+            return cur.rowcount
+
+
+def _map_strings(value, func):
+    """Applies func to every string inside a JSON-like result (dicts, lists, tuples)."""
+    if isinstance(value, str):
+        return func(value)
+    if isinstance(value, dict):
+        return {key: _map_strings(item, func) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_map_strings(item, func) for item in value]
+    return value
+
+
+class RunCheckpoint:
+    """
+    The checkpoints of one run, in the form StageGraph(checkpoint=...) uses.
+    'redaction' (pii.Redaction of the resume text) keeps real contact details out of the store.
+    """
+
+    def __init__(self, store, run_id, redaction=None):
+        self.store = store
+        self.run_id = run_id
+        self.redaction = redaction
+
+    def load(self):
+        saved = self.store.load(self.run_id)
+        if self.redaction is None:
+            return saved
+        return {stage: _map_strings(result, self.redaction.rehydrate) for stage, result in saved.items()}
+
+    def save(self, stage, result):
+        if self.redaction is not None:
+            result = _map_strings(result, self.redaction.redact_values)
+        self.store.save(self.run_id, stage, result)
+
+    def clear(self):
+        self.store.clear(self.run_id)
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_checkpoint_store():
+    """Process-wide CheckpointStore, or None when CHECKPOINTS=0 (every run starts from scratch)."""
+    global _default_store
+    if os.getenv("CHECKPOINTS", "1") == "0":
+        return None
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = CheckpointStore(CHECKPOINT_PATH)
+        return _default_store
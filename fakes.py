@@ -0,0 +1,55 @@
+"""
+Offline test doubles: a controllable clock and a scripted model.
+They let the rate limiter / retry logic (and the pipeline) run without a key or network.
+
+    clock = FakeClock()
+    model = FakeModel(["{}", Exception("429 Resource exhausted"), '{"ok": true}'])
+    limiter = RateLimiter(requests_per_minute=2, tokens_per_minute=1000, clock=clock, sleep=clock.sleep)
+    RateLimitedModel(model, limiter, rng=lambda: 1.0).generate_content("hi")
+
+benchmarks/bench_rate_limiter.py runs the limiter and retries this way.
+"""
+import threading
+
+from llm_backend import FakeResponse, FakeStream
+
+
+class FakeClock:
+    """Monotonic clock whose sleep() just moves time forward."""
+
+    def __init__(self, start=0.0):
+        self.now = start
+        self.sleeps = []
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        with self._lock:
+            self.sleeps.append(seconds)
+            self.now += max(0.0, seconds)
+
+
+class FakeModel:
+    """
+    Plays back a script: each item is either response text or an Exception to raise.
+    Once the script runs out, 'default_text' is returned.
+    """
+
+    def __init__(self, script=None, default_text="{}", model_name="models/fake"):
+        self.script = list(script or [])
+        self.default_text = default_text
+        self.model_name = model_name
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def generate_content(self, contents, **kwargs):
+        with self._lock:
+            self.calls.append(contents)
+            item = self.script.pop(0) if self.script else self.default_text
+        if isinstance(item, Exception):
+            raise item
+        if kwargs.get("stream"):
+            return FakeStream(item)
+        return FakeResponse(item)
@@ -0,0 +1,115 @@
+"""
+Streaming HTML-to-text extraction for scraped pages.
+
+html.parser.HTMLParser is fed the page in chunks and we stop as soon as enough text
+has been collected, instead of building a whole BeautifulSoup tree and throwing most
+of get_text() away. Boilerplate subtrees (script, style, nav, header, footer, forms...)
+are skipped, and text inside <main> / <article> / role="main" is preferred:
+
+    text = extract_text(html, limit=6000)
+"""
+from html.parser import HTMLParser
+
+SKIP_TAGS = frozenset({"script", "style", "noscript", "template", "svg", "canvas", "iframe", "nav", "header",
+                       "footer", "aside", "form", "button", "select", "head"})
+MAIN_TAGS = frozenset({"main", "article"})
+CHUNK_SIZE = 16 * 1024
+MIN_MAIN_CHARS = 200      # Shorter main regions (a teaser card) don't beat the page text
+BODY_SCAN_FACTOR = 3      # Without a main region, stop after limit * factor chars of page text
+
+
+class _Done(Exception):
+    """Raised from a handler once the budget is reached, to stop feeding."""
+
+
+class _TextCollector(HTMLParser):
+
+    def __init__(self, limit):
+        super().__init__(convert_charrefs=True)
+        self.limit = limit
+        self.main_parts = []
+        self.body_parts = []
+        self.main_chars = 0
+        self.body_chars = 0
+        self._skip_tag = None
+        self._skip_depth = 0
+        self._main_tag = None
+        self._main_depth = 0
+        self._pending = []  # Text since the last tag: feed() may split a word across chunks
+
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth += 1
+            elif tag == "body" and self._skip_tag == "head":
+                self._skip_tag = None  # </head> left out
+            return
+        if tag in SKIP_TAGS:
+            self._skip_tag, self._skip_depth = tag, 1
+            return
+        if self._main_tag is not None:
+            if tag == self._main_tag:
+                self._main_depth += 1
+        elif tag in MAIN_TAGS or ("role", "main") in attrs:
+            self._main_tag, self._main_depth = tag, 1
+
+    def handle_startendtag(self, tag, attrs):
+        self._flush()  # <br/>, <img/>, <svg/>: no text, and no subtree to skip
+
+    def handle_endtag(self, tag):
+        self._flush()
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth -= 1
+                if self._skip_depth == 0:
+                    self._skip_tag = None
+            return
+        if tag == self._main_tag:
+            self._main_depth -= 1
+            if self._main_depth == 0:
+                self._main_tag = None
+                if self.main_chars >= MIN_MAIN_CHARS:
+                    raise _Done()  # The main region is over: nothing after it is worth parsing
+
+    def handle_data(self, data):
+        if self._skip_tag is None:
+            self._pending.append(data)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        data = " ".join("".join(self._pending).split())
+        self._pending = []
+        if not data:
+            return
+        if self.body_chars < self.limit:
+            self.body_parts.append(data)  # Main text too: the fallback when the main region is too short
+        self.body_chars += len(data) + 1
+        if self._main_tag is not None:
+            self.main_parts.append(data)
+            self.main_chars += len(data) + 1
+            if self.main_chars >= self.limit:
+                raise _Done()
+        elif self.main_chars == 0 and self.body_chars >= self.limit * BODY_SCAN_FACTOR:
+            raise _Done()  # Plenty of page text and still no main region: give up looking
+
+    def text(self):
+        parts = self.main_parts if self.main_chars >= MIN_MAIN_CHARS else self.body_parts
+        return " ".join(parts)[:self.limit]
+
+
+def extract_text(html, limit=6000, chunk_size=CHUNK_SIZE):
+    """Visible text of 'html' (main content first), whitespace-collapsed, at most 'limit' chars."""
+    collector = _TextCollector(limit)
+    try:
+        for start in range(0, len(html), chunk_size):
+            collector.feed(html[start:start + chunk_size])
+        collector.close()
+    except _Done:
+        pass
+    return collector.text()
@@ -0,0 +1,103 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Job:
+    """One submitted analysis: status, progress messages, partial results and the final result."""
+
+    def __init__(self, job_id, job_key=None):
+        self.job_id = job_id
+        self.job_key = job_key
+        self.status = "queued"  # queued -> running -> done | failed
+        self.events = []  # Human-readable progress lines, in order
+        self.partial = {}  # Result fields available before the job finishes
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    def report(self, message):
+        self.events.append(message)
+
+    def update(self, key, value):
+        self.partial[key] = value
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed")
+
+
+class JobQueue:
+    """
+    In-process job broker: work runs on a worker pool, callers get a job id back
+    immediately and poll get(job_id) for progress and results.
+    Submissions with the same 'job_key' (e.g. hash of resume + JD) reuse the
+    existing job, so a rerun or page refresh never starts the analysis twice.
+    """
+
+    def __init__(self, max_workers=4, max_jobs=200):
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job-worker")
+        self._jobs = OrderedDict()
+        self._by_key = {}
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args, job_key=None, **kwargs):
+        """
+        Queues func(*args, on_progress=job.report, on_partial=job.update, **kwargs) and returns the job id.
+        A job that failed with an exception is not reused; anything else with the same key is.
+        """
+        with self._lock:
+            existing = self._jobs.get(self._by_key.get(job_key)) if job_key else None
+            if existing and existing.status != "failed":
+                return existing.job_id
+
+            job = Job(uuid.uuid4().hex[:12], job_key)
+            job.report("⏳ Queued...")
+            self._jobs[job.job_id] = job
+            if job_key:
+                self._by_key[job_key] = job.job_id
+            self._evict()
+
+        self._executor.submit(self._run, job, func, args, kwargs)
+        return job.job_id
+
+    def _run(self, job, func, args, kwargs):
+        job.status = "running"
+        try:
+            job.result = func(*args, on_progress=job.report, on_partial=job.update, **kwargs)
+            job.status = "done"
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+            job.report(f"❌ Failed: {e}")
+        finally:
+            job.finished_at = time.time()
+
+    def _evict(self):
+        """Keeps at most 'max_jobs' records, dropping the oldest finished ones first."""
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            job = self._jobs[job_id]
+            if job.finished:
+                self._forget(job)
+
+    def _forget(self, job):
+        self._jobs.pop(job.job_id, None)
+        if job.job_key and self._by_key.get(job.job_key) == job.job_id:
+            del self._by_key[job.job_key]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def forget(self, job_id):
+        """Drops a job so the same input can be analysed again from scratch."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                self._forget(job)
@@ -0,0 +1,357 @@
+"""
+Local, model-free layout-risk check.
+
+The parsing risks the visual check looks for can mostly be read off the PDF's own geometry
+(text lines and blocks with their coordinates, plus the vector drawings of each page):
+  1. Columns: consecutive text rows split at the same gutter, with separate multi-line prose
+     blocks on both sides. The ATS view reads each row straight across the page
+     (pdf_ingest._words_to_text), so those paragraphs are certain to mix.
+  2. Tables: a grid of ruling lines (at least two vertical and two horizontal) around text.
+  3. Headers/footers: the same block text in the top or bottom margin of several pages,
+     where a sentence of the body runs on across the page break (and so around it).
+  4. Graphics: skill bars (rows of filled bars with no text) and icon-font glyphs.
+Raster images, borderless grids, gutters without prose on both sides (a "Languages:   Python,
+Go" list reads fine across) and page headers between whole sentences are ambiguous, so
+they only lower the confidence.
+
+check_layout() returns a verdict only when the confidence is at least MIN_CONFIDENCE;
+otherwise it returns None and the caller falls back to the vision model.
+"""
+import re
+from collections import defaultdict
+
+from pdf_ingest import LINE_TOLERANCE, load_resume
+
+# Below this the vision model decides
+MIN_CONFIDENCE = 0.75
+
+# Columns: at least COLUMN_MIN_ROWS consecutive text rows split by a gap of COLUMN_MIN_GAP
+# points at the same place (the gutter)
+COLUMN_MIN_ROWS = 4
+COLUMN_MIN_GAP = 15
+# A column side counts as prose when one of its blocks has 2+ lines of this many words on average
+PROSE_MIN_WORDS = 3
+
+# Top / bottom share of the page treated as header / footer margin
+MARGIN_SHARE = 0.08
+
+# Filled bars (skill meters): height range in points and how many must line up
+BAR_HEIGHT = (2, 14)
+BAR_MIN_WIDTH = 20
+BAR_MIN_COUNT = 3
+
+# Icon fonts and broken encodings extract as private-use or replacement characters
+_ODD_CHARS_RE = re.compile("[\ue000-\uf8ff\ufffd]")
+ODD_CHAR_SHARE = 0.02
+
+# Raster images larger than this share of the page may hold text the ATS can't see
+IMAGE_MIN_AREA = 0.01
+
+_DIGITS_RE = re.compile(r"\d+")
+_SENTENCE_END_RE = re.compile(r"[.!?:;)\]]['\"]?$")
+_SPACES_RE = re.compile(r"\s+")
+
+
+class LayoutFinding:
+    """One detected risk: what the verdict says about it and how sure the geometry is."""
+
+    def __init__(self, kind, issue, advice, confidence):
+        self.kind = kind
+        self.issue = issue
+        self.advice = advice
+        self.confidence = confidence
+
+
+def _snippet(text, limit=30):
+    text = _SPACES_RE.sub(" ", text).strip()
+    return text if len(text) <= limit else text[:limit].rstrip() + "..."
+
+
+def page_lines(words):
+    """PyMuPDF text lines of a page as (x0, y0, x1, y1, text, block_no), from get_text("words") tuples."""
+    lines = {}
+    for x0, y0, x1, y1, word, block_no, line_no, _ in words:
+        key = (block_no, line_no)
+        if key in lines:
+            lx0, ly0, lx1, ly1, text, _ = lines[key]
+            lines[key] = (min(lx0, x0), min(ly0, y0), max(lx1, x1), max(ly1, y1), f"{text} {word}", block_no)
+        else:
+            lines[key] = (x0, y0, x1, y1, word, block_no)
+    return list(lines.values())
+
+
+def visual_rows(lines):
+    """Lines grouped the way the ATS view reads them: same top (within LINE_TOLERANCE), left to right."""
+    rows = []
+    for line in sorted(lines, key=lambda line: (round(line[1], 1), line[0])):
+        if rows and line[1] - rows[-1][0][1] <= LINE_TOLERANCE:
+            rows[-1].append(line)
+        else:
+            rows.append([line])
+    return [sorted(row, key=lambda line: line[0]) for row in rows]
+
+
+def _gutters(row):
+    """(x0, x1) of every horizontal gap of at least COLUMN_MIN_GAP between neighbouring lines of a row."""
+    return [(left[2], right[0]) for left, right in zip(row, row[1:]) if right[0] - left[2] >= COLUMN_MIN_GAP]
+
+
+def find_column_runs(rows):
+    """
+    (left lines, right lines) of every run of COLUMN_MIN_ROWS or more consecutive rows split
+    by a shared gutter. Right-aligned dates split a row too, but only here and there: body
+    lines between them cross the gutter and end the run.
+    """
+    runs = []
+    run_start, run_gutter, run_length = None, None, 0
+    for index, row in enumerate(rows + [[]]):  # The empty row closes the last run
+        shared = None
+        if run_gutter is not None:
+            shared = next(((max(g[0], run_gutter[0]), min(g[1], run_gutter[1])) for g in _gutters(row)
+                           if max(g[0], run_gutter[0]) < min(g[1], run_gutter[1])), None)
+        if shared is not None:
+            run_gutter, run_length = shared, run_length + 1
+            continue
+        if run_length >= COLUMN_MIN_ROWS:
+            middle = (run_gutter[0] + run_gutter[1]) / 2
+            run_lines = [line for run_row in rows[run_start:index] for line in run_row]
+            runs.append(([line for line in run_lines if (line[0] + line[2]) / 2 < middle],
+                         [line for line in run_lines if (line[0] + line[2]) / 2 >= middle]))
+        gutters = _gutters(row)
+        run_start, run_gutter, run_length = (index, gutters[0], 1) if gutters else (None, None, 0)
+    return runs
+
+
+def _has_prose_block(lines):
+    words_by_block = defaultdict(list)
+    for line in lines:
+        words_by_block[line[5]].append(len(line[4].split()))
+    return any(len(counts) >= 2 and sum(counts) / len(counts) >= PROSE_MIN_WORDS
+               for counts in words_by_block.values())
+
+
+def is_interleaved_prose(left, right):
+    """
+    True when each side of a column run holds its own multi-line prose block, so reading
+    across alternates between two paragraphs. A label / value list ("Languages:   Python, Go")
+    or one block laid out with tab stops reads fine across and is left to the vision model.
+    """
+    if {line[5] for line in left} & {line[5] for line in right}:
+        return False
+    return _has_prose_block(left) and _has_prose_block(right)
+
+
+def count_grid_rows(rows):
+    """Rows split into three or more pieces (a borderless table, or just a skills grid)."""
+    return sum(1 for row in rows if len(_gutters(row)) >= 2)
+
+
+def _segments(drawings):
+    """Horizontal and vertical ruling lines of a page, as (x0, y0, x1, y1)."""
+    horizontal, vertical = [], []
+    for drawing in drawings:
+        for item in drawing.get("items", []):
+            if item[0] == "l":
+                (x0, y0), (x1, y1) = (item[1].x, item[1].y), (item[2].x, item[2].y)
+            elif item[0] == "re":
+                x0, y0, x1, y1 = item[1]
+            else:
+                continue
+            width, height = abs(x1 - x0), abs(y1 - y0)
+            if height <= 2 and width >= 20:
+                horizontal.append((min(x0, x1), y0, max(x0, x1), y1))
+            elif width <= 2 and height >= 10:
+                vertical.append((x0, min(y0, y1), x1, max(y0, y1)))
+    return horizontal, vertical
+
+
+def find_ruled_table(drawings, page_blocks):
+    """True when two or more vertical and horizontal rules cross around text blocks (a ruled table)."""
+    horizontal, vertical = _segments(drawings)
+    if len(vertical) < 2 or len(horizontal) < 2:
+        return False
+    x0 = min(v[0] for v in vertical)
+    x1 = max(v[2] for v in vertical)
+    y0 = min(v[1] for v in vertical)
+    y1 = max(v[3] for v in vertical)
+    crossing = [h for h in horizontal if y0 - 2 <= h[1] <= y1 + 2 and h[0] <= x1 and h[2] >= x0]
+    if len({round(h[1]) for h in crossing}) < 2 or len({round(v[0]) for v in vertical}) < 2:
+        return False
+    inside = [b for b in page_blocks if b["type"] == "text" and b["text"]
+              and x0 - 2 <= b["bbox"][0] and b["bbox"][2] <= x1 + 2 and y0 - 2 <= b["bbox"][1] and b["bbox"][3] <= y1 + 2]
+    return len(inside) >= 2
+
+
+def count_skill_bars(drawings, page_blocks):
+    """Filled bars with no text on them, in the largest group sharing a left edge."""
+    text_boxes = [b["bbox"] for b in page_blocks if b["type"] == "text" and b["text"]]
+    by_left_edge = defaultdict(int)
+    for drawing in drawings:
+        if drawing.get("fill") is None:
+            continue
+        rect = drawing["rect"]
+        if not (BAR_HEIGHT[0] <= rect.height <= BAR_HEIGHT[1] and rect.width >= BAR_MIN_WIDTH):
+            continue
+        if any(bx0 < rect.x1 and rect.x0 < bx1 and by0 < rect.y1 and rect.y0 < by1
+               for bx0, by0, bx1, by1 in text_boxes):
+            continue  # Text drawn on a colored band (e.g. a section header)
+        by_left_edge[round(rect.x0)] += 1
+    return max(by_left_edge.values(), default=0)
+
+
+def _margin_key(text):
+    """Margin text with page numbers masked, so "Page 1 of 2" matches "Page 2 of 2"."""
+    return _DIGITS_RE.sub("#", _SPACES_RE.sub(" ", text.lower()).strip())
+
+
+def _in_margin(top, bottom, height):
+    return bottom <= MARGIN_SHARE * height or top >= (1 - MARGIN_SHARE) * height
+
+
+def find_repeated_margins(blocks, page_sizes):
+    """(margin text, sorted pages) for each header/footer text that appears on two or more pages."""
+    pages_by_text = defaultdict(set)
+    for block in blocks:
+        if block["type"] != "text" or not block["text"]:
+            continue
+        if _in_margin(block["bbox"][1], block["bbox"][3], page_sizes[block["page"]][1]):
+            pages_by_text[_margin_key(block["text"])].add(block["page"])
+    return [(text, sorted(pages)) for text, pages in pages_by_text.items() if len(pages) >= 2]
+
+
+def body_edges(rows, height):
+    """(first, last) body line of a page as read across, margins left out ("" when there is none)."""
+    body = [" ".join(line[4] for line in row) for row in rows
+            if not _in_margin(min(line[1] for line in row), max(line[3] for line in row), height)]
+    return (body[0], body[-1]) if body else ("", "")
+
+
+def breaks_sentence(last_line, next_line):
+    """True when a page ends mid-sentence: no closing punctuation, and the next page goes on in lowercase."""
+    return bool(last_line and next_line) and not _SENTENCE_END_RE.search(last_line) and next_line[0].islower()
+
+
+def analyze_layout(source):
+    """
+    Returns (findings, doubts): LayoutFinding per detected risk, and the reasons the
+    geometry can't be trusted on its own (each lowers the confidence of a LOW verdict).
+    Text lines come from the words pdf_ingest already extracted; drawings and images are
+    read from the document it left open.
+    """
+    parsed = load_resume(source)
+    findings = []
+    doubts = []
+    blocks_by_page = defaultdict(list)
+    for block in parsed.blocks:
+        blocks_by_page[block["page"]].append(block)
+
+    grid_rows = 0
+    gutter_rows = 0
+    image_area = 0.0
+    edges = []
+    with parsed.open_document() as doc:
+        for page_no, (width, height) in enumerate(parsed.page_sizes):
+            page = doc[page_no]
+            page_blocks = blocks_by_page[page_no]
+            words = parsed.page_words[page_no]
+            rows = visual_rows(page_lines(words if words is not None else page.get_text("words")))
+            edges.append(body_edges(rows, height))
+            for left, right in find_column_runs(rows):
+                if not is_interleaved_prose(left, right):
+                    gutter_rows += len({round(line[1]) for line in left + right})
+                elif not any(f.kind == "columns" for f in findings):
+                    findings.append(LayoutFinding(
+                        "columns",
+                        f"Two columns side by side on page {page_no + 1} ('{_snippet(left[0][4])}' next to "
+                        f"'{_snippet(right[0][4])}', {len(left) + len(right)} lines): an ATS reads straight "
+                        "across and mixes them.",
+                        "Switch to a single-column layout: move the side column above or below the main one.",
+                        0.9,
+                    ))
+
+            drawings = page.get_drawings()
+            if find_ruled_table(drawings, page_blocks) and not any(f.kind == "table" for f in findings):
+                findings.append(LayoutFinding(
+                    "table",
+                    f"Ruled table on page {page_no + 1}: its cells are read row by row and lose their structure.",
+                    "Remove tables: use plain lines or bullet points.",
+                    0.8,
+                ))
+            bars = count_skill_bars(drawings, page_blocks)
+            if bars >= BAR_MIN_COUNT and not any(f.kind == "graphics" for f in findings):
+                findings.append(LayoutFinding(
+                    "graphics",
+                    f"{bars} skill bars drawn as graphics on page {page_no + 1}: the levels they show are missing "
+                    "from the text.",
+                    "Replace skill bars with words (e.g. 'Python - advanced').",
+                    0.8,
+                ))
+
+            grid_rows += count_grid_rows(rows)
+            image_area += sum((x1 - x0) * (y1 - y0) / (width * height)
+                              for x0, y0, x1, y1 in (info["bbox"] for info in page.get_image_info()))
+            if not any(b["type"] == "text" and b["text"] for b in page_blocks):
+                doubts.append(f"page {page_no + 1} has no text blocks")
+
+    uncut_margins = 0
+    for text, pages in find_repeated_margins(parsed.blocks, parsed.page_sizes):
+        # Only a sentence running on across the page break gets the margin text spliced into it
+        cut = next((page_no for page_no in pages[:-1] if page_no + 1 < len(edges)
+                    and breaks_sentence(edges[page_no][1], edges[page_no + 1][0])), None)
+        if cut is None:
+            uncut_margins += 1
+        elif not any(f.kind == "margins" for f in findings):
+            findings.append(LayoutFinding(
+                "margins",
+                f"Header/footer repeated on {len(pages)} pages ('{_snippet(text)}'): a sentence runs on from "
+                f"page {cut + 1} to page {cut + 2}, and the ATS reads the header/footer into the middle of it.",
+                "Remove page headers/footers; keep contact details in the body of page 1.",
+                0.8,
+            ))
+
+    if uncut_margins and not any(f.kind == "margins" for f in findings):
+        doubts.append(f"{uncut_margins} repeated header/footer text(s) between whole sentences")
+
+    odd_chars = len(_ODD_CHARS_RE.findall(parsed.text))
+    if odd_chars and odd_chars >= ODD_CHAR_SHARE * max(len(parsed.text), 1):
+        findings.append(LayoutFinding(
+            "encoding",
+            f"{odd_chars} characters extract as icon glyphs or unknown symbols.",
+            "Remove icon fonts and use standard fonts for all text.",
+            0.75,
+        ))
+    elif odd_chars:
+        doubts.append(f"{odd_chars} icon glyphs")
+
+    if image_area >= IMAGE_MIN_AREA:
+        doubts.append(f"images cover {image_area:.0%} of a page")
+    if grid_rows >= 3:
+        doubts.append(f"{grid_rows} grid-like rows")
+    if gutter_rows:
+        doubts.append(f"{gutter_rows} rows split at a gutter without prose on both sides")
+    return findings, doubts
+
+
+def check_layout(source):
+    """
+    Returns (verdict, confidence, reason).
+    verdict is the visual check's {"layout_risk", "issue_detected", "advice"} dict when the
+    geometry is decisive (confidence >= MIN_CONFIDENCE), None when the vision model should look.
+    """
+    findings, doubts = analyze_layout(source)
+    if findings:
+        confidence = max(f.confidence for f in findings)
+        verdict = {"layout_risk": "HIGH", "issue_detected": " ".join(f.issue for f in findings),
+                   "advice": " ".join(f.advice for f in findings)}
+        reason = f"Local check: {', '.join(f.kind for f in findings)} found"
+    else:
+        # Each doubt is something only the rendered page can settle
+        confidence = max(0.0, 0.9 - 0.25 * len(doubts))
+        verdict = {"layout_risk": "LOW", "issue_detected": "None", "advice": "No layout changes needed."}
+        reason = "Local check: no columns, tables, repeated headers or graphics found"
+    if doubts:
+        reason += f" ({'; '.join(doubts)})"
+
+    if confidence >= MIN_CONFIDENCE:
+        return verdict, confidence, reason
+    return None, confidence, reason.replace("Local check:", "Local check inconclusive:", 1)
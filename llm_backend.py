@@ -0,0 +1,191 @@
+"""
+LLM backends: everything the pipeline needs from a model is generate_content().
+
+    GeminiBackend  the real thing (needs GEMINI_API_KEY)
+    StubBackend    deterministic local stand-in with latency, 429/5xx injection and canned JSON,
+                   for running / load-testing the pipeline on a machine with no key or network
+
+main.get_backend() picks one from the LLM_BACKEND environment variable ("gemini" or "stub").
+"""
+import json
+import os
+import random
+import threading
+import time
+
+DEFAULT_MODEL_NAME = "gemini-flash-latest"
+
+
+class LLMBackend:
+    """
+    Interface: generate_content(contents, stream=False) returns an object with '.text'
+    (iterable of chunks with '.text' when streaming), plus a 'model_name' attribute.
+    Backends are shared between threads, so implementations must be thread-safe.
+    """
+
+    model_name = "unknown"
+
+    def generate_content(self, contents, **kwargs):
+        raise NotImplementedError
+
+
+class GeminiBackend(LLMBackend):
+    """Google Gemini through google-generativeai. Raises ValueError if no API key is available."""
+
+    def __init__(self, model_name=DEFAULT_MODEL_NAME, api_key=None):
+        api_key = api_key or os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise ValueError("API Key not found! Check your .env file.")
+        import google.generativeai as genai  # ~1 s of imports: only paid when Gemini is actually used
+
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model_name)
+        self.model_name = self.model.model_name
+
+    def generate_content(self, contents, **kwargs):
+        return self.model.generate_content(contents, **kwargs)
+
+
+class FakeUsage:
+    def __init__(self, total_token_count):
+        self.total_token_count = total_token_count
+
+
+class FakeResponse:
+    def __init__(self, text, total_token_count=None):
+        self.text = text
+        self.usage_metadata = FakeUsage(total_token_count) if total_token_count is not None else None
+
+
+class FakeStream:
+    """Streamed response: yields the text in small chunks, '.text' is the whole answer."""
+
+    def __init__(self, text, chunk_size=40):
+        self.text = text
+        self.usage_metadata = None
+        self._chunk_size = chunk_size
+
+    def __iter__(self):
+        for start in range(0, len(self.text), self._chunk_size):
+            yield FakeResponse(self.text[start:start + self._chunk_size])
+
+
+class StubAPIError(Exception):
+    """Injected failure. Carries the HTTP 'code' like the real client errors do."""
+
+    REASONS = {429: "Resource exhausted", 500: "Internal error", 502: "Bad gateway",
+               503: "Service unavailable", 504: "Deadline exceeded"}
+
+    def __init__(self, code):
+        self.code = code
+        super().__init__(f"{code} {self.REASONS.get(code, 'Error')} (injected by StubBackend)")
+
+
+# (marker found in the prompt, canned answer), checked in order.
+# The markers are the JSON field names each pipeline prompt asks for.
+_STUB_INTERVIEW_ITEMS = [{"topic": topic, "type": "Theory", "proficiency_level": "MUST KNOW", "is_real": False,
+                          "problem_name": f"{topic} basics", "verification_link": "N/A",
+                          "content": f"Explain a core {topic} concept.", "code_snippet": "N/A",
+                          "solution": "Stub solution.", "complexity": "N/A"}
+                         for topic in ("Python", "SQL", "Git")]
+
+CANNED_RESPONSES = [
+    # Fused mode asks for everything at once, and its prompt mentions the other markers too
+    ("interview_items", {"resume_check": {"is_resume": True, "reason": "Stub: looks like a resume."},
+                         "visual": {"layout_risk": "LOW", "issue_detected": "None",
+                                    "advice": "Stub: no changes needed."},
+                         "ats": {"is_readable": True, "score_1_to_10": 8, "extracted_name": "Stub Candidate",
+                                 "recommended_filename": "Stub_Candidate_CV.pdf",
+                                 "critical_issues": ["Stub: dates use mixed formats"],
+                                 "deduction_reasoning": "Stub reasoning."},
+                         "profile": {"feedback": "Stub feedback: quantify the impact of each project.",
+                                     "cover_letter": "Dear Hiring Team,\n\nStub cover letter.\n\n"
+                                                     "Sincerely,\nStub Candidate",
+                                     "keywords": ["Python", "SQL", "Git"], "experience_level": "Junior"},
+                         "interview_items": _STUB_INTERVIEW_ITEMS}),
+    ("is_resume", {"is_resume": True, "reason": "Stub: looks like a resume."}),
+    ("layout_risk", {"layout_risk": "LOW", "issue_detected": "None", "advice": "Stub: no changes needed."}),
+    ("score_1_to_10", {"score_1_to_10": 8, "critical_issues": ["Stub: dates use mixed formats"],
+                       "extracted_name": "Stub Candidate"}),
+    ("experience_level", {"feedback": "Stub feedback: quantify the impact of each project.",
+                          "cover_letter": "Dear Hiring Team,\n\nStub cover letter.\n\nSincerely,\nStub Candidate",
+                          "keywords": ["Python", "SQL", "Git"],
+                          "experience_level": "Junior"}),
+    ("Interview Coach", _STUB_INTERVIEW_ITEMS),
+]
+
+
+class StubBackend(LLMBackend):
+    """
+    Offline backend. Each call sleeps 'latency' (+ up to 'jitter') seconds, then either raises
+    a StubAPIError or returns the first canned answer whose marker appears in the prompt.
+
+    'error_rates' maps an HTTP code to the probability of injecting it, e.g. {429: 0.05, 503: 0.01}.
+    Randomness comes from one seeded generator, so a run with the same seed and call order
+    sees the same latencies and failures.
+    """
+
+    model_name = "models/stub"
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rates=None, responses=None, default_response="{}",
+                 seed=0, sleep=time.sleep):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rates = dict(error_rates or {})
+        self.responses = [(marker, answer if isinstance(answer, str) else json.dumps(answer, ensure_ascii=False))
+                          for marker, answer in (responses if responses is not None else CANNED_RESPONSES)]
+        self.default_response = default_response
+        self.sleep = sleep
+        self.stats = {"calls": 0, "errors": 0}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _answer_for(self, contents):
+        parts = contents if isinstance(contents, (list, tuple)) else [contents]
+        prompt = " ".join(part for part in parts if isinstance(part, str))
+        for marker, answer in self.responses:
+            if marker in prompt:
+                return answer
+        return self.default_response
+
+    def generate_content(self, contents, **kwargs):
+        with self._lock:
+            self.stats["calls"] += 1
+            delay = self.latency + self._rng.random() * self.jitter
+            error_code = None
+            for code, rate in self.error_rates.items():
+                if self._rng.random() < rate:
+                    error_code = code
+                    break
+            if error_code is not None:
+                self.stats["errors"] += 1
+
+        self.sleep(delay)
+        if error_code is not None:
+            raise StubAPIError(error_code)
+
+        text = self._answer_for(contents)
+        if kwargs.get("stream"):
+            return FakeStream(text)
+        return FakeResponse(text)
+
+
+def create_backend(name=None):
+    """Builds the backend named by 'name' or $LLM_BACKEND (default: gemini)."""
+    name = (name or os.getenv("LLM_BACKEND") or "gemini").lower()
+    if name == "gemini":
+        return GeminiBackend()
+    if name == "stub":
+        return StubBackend(latency=float(os.getenv("STUB_LATENCY", "0")))
+    raise ValueError(f"Unknown LLM backend '{name}' (expected 'gemini' or 'stub').")
+
+
+def backend_model_name(name=None):
+    """The 'model_name' create_backend(name) would report, without building it (no SDK import, no key needed)."""
+    name = (name or os.getenv("LLM_BACKEND") or "gemini").lower()
+    if name == "gemini":
+        # google.generativeai prefixes bare names the same way
+        return DEFAULT_MODEL_NAME if DEFAULT_MODEL_NAME.startswith("models/") else f"models/{DEFAULT_MODEL_NAME}"
+    if name == "stub":
+        return StubBackend.model_name
+    raise ValueError(f"Unknown LLM backend '{name}' (expected 'gemini' or 'stub').")
@@ -0,0 +1,224 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from telemetry import METRICS
+
+
+class CachedResponse:
+    """
+    Minimal stand-in for a Gemini response: the pipeline only reads '.text'.
+    Iterating it yields itself once, so it also works where a stream is expected.
+    """
+
+    usage_metadata = None
+
+    def __init__(self, text):
+        self.text = text
+
+    def __iter__(self):
+        yield self
+
+
+class _StreamRecorder:
+    """Passes a streamed response through and caches the full text once it has been read to the end."""
+
+    def __init__(self, stream, cache, key):
+        self._stream = stream
+        self._cache = cache
+        self._key = key
+        self._chunks = []
+
+    def __iter__(self):
+        for chunk in self._stream:
+            try:
+                self._chunks.append(chunk.text or "")
+            except ValueError:
+                pass  # Chunk without text parts (e.g. finish metadata)
+            yield chunk
+        self._cache.put(self._key, self.text)
+
+    @property
+    def text(self):
+        return "".join(self._chunks)
+
+    @property
+    def usage_metadata(self):
+        return getattr(self._stream, "usage_metadata", None)
+
+
+class ResponseCache:
+    """
+    Two-tier, content-addressed store for model responses.
+    - Tier 1: in-memory LRU (fast path for repeats inside one process).
+    - Tier 2: SQLite file (survives restarts / Streamlit reruns).
+    Entries expire after 'ttl_seconds'; the disk tier is trimmed to 'max_disk_entries'.
+    """
+
+    def __init__(self, db_path, max_memory_entries=256, max_disk_entries=5000, ttl_seconds=7 * 24 * 3600):
+        self.db_path = db_path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+        self._memory = OrderedDict()  # key -> (created_at, text)
+        self._lock = threading.Lock()
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, created_at REAL, last_used REAL, text TEXT)"
+        )
+        self._db.commit()
+
+    def _expired(self, created_at):
+        return self.ttl_seconds is not None and time.time() - created_at > self.ttl_seconds
+
+    def _remember(self, key, created_at, text):
+        self._memory[key] = (created_at, text)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Returns the cached text or None."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and not self._expired(entry[0]):
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                METRICS.inc("llm_cache_hits_total", tier="memory")
+                return entry[1]
+            self._memory.pop(key, None)
+
+            row = self._db.execute("SELECT created_at, text FROM responses WHERE key = ?", (key,)).fetchone()
+            if row and not self._expired(row[0]):
+                self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+                self._db.commit()
+                self._remember(key, row[0], row[1])
+                self.stats["disk_hits"] += 1
+                METRICS.inc("llm_cache_hits_total", tier="disk")
+                return row[1]
+            if row:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.commit()
+
+            self.stats["misses"] += 1
+            METRICS.inc("llm_cache_misses_total")
+            return None
+
+    def put(self, key, text):
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, text)
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, created_at, last_used, text) VALUES (?, ?, ?, ?)",
+                (key, now, now, text),
+            )
+            self.stats["stores"] += 1
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        """Drops expired rows, then the least recently used ones above the size cap."""
+        if self.ttl_seconds is not None:
+            cur = self._db.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+            self.stats["evictions"] += cur.rowcount
+        count = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        overflow = count - self.max_disk_entries
+        if overflow > 0:
+            cur = self._db.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_used ASC LIMIT ?)",
+                (overflow,),
+            )
+            self.stats["evictions"] += cur.rowcount
+
+    def delete(self, key):
+        """Drops one entry from both tiers (e.g. an answer that turned out to be unusable)."""
+        with self._lock:
+            self._memory.pop(key, None)
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+
+
+def _hash_part(hasher, part):
+    """Feeds one prompt part (text or image) into the hash."""
+    if isinstance(part, str):
+        hasher.update(b"text:")
+        hasher.update(part.encode("utf-8"))
+    elif isinstance(part, (bytes, bytearray, memoryview)):
+        hasher.update(b"bytes:")
+        hasher.update(bytes(part))
+    elif isinstance(part, dict) and "data" in part:
+        # Inline blob ({"mime_type", "data"}), e.g. the encoded pages from visual_render
+        hasher.update(f"blob:{part.get('mime_type')}:".encode("utf-8"))
+        hasher.update(bytes(part["data"]))
+    elif hasattr(part, "tobytes") and hasattr(part, "mode"):
+        # PIL Image: hash the raw pixels plus geometry, not an encoded file
+        hasher.update(f"image:{part.mode}:{part.size}:".encode("utf-8"))
+        hasher.update(part.tobytes())
+    else:
+        hasher.update(b"repr:")
+        hasher.update(repr(part).encode("utf-8"))
+
+
+def make_cache_key(model_name, contents, **kwargs):
+    """sha256 over the model name, every prompt part and any generation options."""
+    hasher = hashlib.sha256()
+    hasher.update(f"model:{model_name}\n".encode("utf-8"))
+    parts = contents if isinstance(contents, (list, tuple)) else [contents]
+    for part in parts:
+        _hash_part(hasher, part)
+        hasher.update(b"\x00")
+    if kwargs:
+        hasher.update(json.dumps(kwargs, sort_keys=True, default=repr).encode("utf-8"))
+    return hasher.hexdigest()
+
+
+class CachedModel:
+    """
+    Wraps a model object and serves repeated generate_content() calls from the cache.
+    Streaming and non-streaming calls share entries; failed calls are never cached.
+    """
+
+    def __init__(self, model, cache):
+        self.model = model
+        self.cache = cache
+        self.model_name = getattr(model, "model_name", type(model).__name__)
+
+    def generate_content(self, contents, **kwargs):
+        stream = kwargs.get("stream", False)
+        key_options = {name: value for name, value in kwargs.items() if name != "stream"}
+        key = make_cache_key(self.model_name, contents, **key_options)
+        cached_text = self.cache.get(key)
+        if cached_text is not None:
+            return CachedResponse(cached_text)
+
+        response = self.model.generate_content(contents, **kwargs)
+        if stream:
+            return _StreamRecorder(response, self.cache, key)
+        self.cache.put(key, response.text)
+        return response
+
+    def forget(self, contents, **kwargs):
+        """Drops the cached answer to this request, so asking again reaches the model."""
+        key_options = {name: value for name, value in kwargs.items() if name != "stream"}
+        self.cache.delete(make_cache_key(self.model_name, contents, **key_options))
+
+    def __getattr__(self, name):
+        # Anything else (count_tokens, model_name, ...) goes to the real model
+        return getattr(self.model, name)
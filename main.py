@@ -1,50 +1,220 @@
 import os
 import time
 import json
-import re
-import google.generativeai as genai
+import hashlib
 from dotenv import load_dotenv
-import pdfplumber
-from duckduckgo_search import DDGS
-import requests
-from bs4 import BeautifulSoup
-import fitz  # PyMuPDF: To convert PDF pages to images
-from PIL import Image
-import io
+from datetime import datetime
+from stage_graph import StageGraph, HaltPipeline
+from llm_cache import CachedResponse
+from runtime import RuntimeContext
+from llm_backend import backend_model_name
+from pdf_ingest import MIN_TEXT_CHARS, ParsedResume, load_resume
+from resume_classifier import classify_resume_text
+from layout_analysis import check_layout
+from artifacts import DirectorySink
+from token_budget import UsageLog, estimate_tokens, prepare_section
+from streaming import IncrementalJSONParser, chunk_text, extract_json
+from telemetry import METRICS, span, start_trace, traced
+from pii import redact_pii
+from rate_limiter import error_status
+from response_schemas import FUSED_RESPONSE_SCHEMA, SchemaError, structured_output_config, validate_response
+from resume_store import fingerprint, get_resume_store
+from checkpoints import RunCheckpoint, get_checkpoint_store
+from visual_render import get_visual_cache, render_for_visual
+from web_research import ddg_search, fetch_page_text, get_researcher
 
 # --- 1. Configuration & Setup ---
 load_dotenv()
-api_key = os.getenv("GEMINI_API_KEY")
-
-if not api_key:
-    raise ValueError("API Key not found! Check your .env file.")
-
-genai.configure(api_key=api_key)
-
-# Use the stable Flash model
-model = genai.GenerativeModel('gemini-flash-latest')
 
 # Define input/output directories
 OUTPUT_DIR = "outputs"
 INPUT_DIR = "inputs"
+CACHE_DIR = ".cache"
+
+# Rate limiter (calls wait for a free slot, transient 429/5xx are retried with backoff),
+# response cache and the default backend (stable Flash model, or the offline stub with
+# LLM_BACKEND=stub). All are built on first use, so importing this module is cheap and
+# needs no API key or network.
+runtime = RuntimeContext(CACHE_DIR)
+
+# Bump when the validate / visual / ATS prompts change: stored resume analyses are then redone
+RESUME_PROMPT_VERSION = "4"
+
+# Estimated vs. actual prompt tokens per stage (see token_budget.STAGE_BUDGETS to tune)
+usage_log = UsageLog()
+
+
+def __getattr__(name):
+    # main.rate_limiter / main.response_cache still work, without building them at import
+    if name in ("rate_limiter", "response_cache"):
+        return getattr(runtime, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # --- 2. Helper Functions ---
 
-def validate_content_is_resume(text_snippet):
+def wrap_backend(backend):
+    """Puts the shared rate limiter and response cache in front of a raw backend."""
+    return runtime.wrap(backend)
+
+
+def get_backend():
+    """The default backend (see llm_backend.create_backend), wrapped and built once."""
+    return runtime.backend
+
+
+def _generate(stage, contents, on_json_member=None, backend=None, options=None):
+    """
+    Single entry point for model calls: logs estimated vs. actual prompt tokens per stage.
+    With 'on_json_member(key, value)' the response is streamed and every top-level JSON
+    field (or array item) is passed on as soon as it is complete.
+    'backend' is any object with generate_content() (default: get_backend()).
+    'options' are extra generate_content() kwargs (e.g. response_schemas.structured_output_config()).
+    """
+    options = options or {}
+    if backend is None:
+        backend = get_backend()
+    estimated = estimate_tokens(contents)
+    METRICS.inc("model_calls_total", stage=stage)
+    METRICS.inc("prompt_tokens_estimated_total", estimated, stage=stage)
+    with span("model_call", stage=stage, streamed=on_json_member is not None):
+        if on_json_member is None:
+            response = backend.generate_content(contents, **options)
+        else:
+            stream = backend.generate_content(contents, stream=True, **options)
+            parser = IncrementalJSONParser()
+            for chunk in stream:
+                for key, value in parser.feed(chunk_text(chunk)):
+                    on_json_member(key, value)
+            response = CachedResponse(parser.text)
+            response.usage_metadata = getattr(stream, "usage_metadata", None)
+
+    usage = getattr(response, "usage_metadata", None)
+    prompt_tokens = getattr(usage, "prompt_token_count", None)
+    output_tokens = getattr(usage, "candidates_token_count", None)
+    if prompt_tokens is not None:
+        METRICS.inc("prompt_tokens_total", prompt_tokens, stage=stage)
+        METRICS.inc("output_tokens_total", output_tokens or 0, stage=stage)
+    usage_log.record(stage, estimated, prompt_tokens, output_tokens)
+    return response
+
+
+def _loads(stage, text):
+    """
+    Parses a model answer with the shared tolerant extractor (fences, intro text, trailing commas:
+    see streaming.extract_json) and counts failures per stage (json_parse_failures_total).
+    """
+    try:
+        return extract_json(text)
+    except json.JSONDecodeError:
+        METRICS.inc("json_parse_failures_total", stage=stage)
+        raise
+
+
+# What each stage's JSON answer must be: (root type, required keys, shape quoted in the repair prompt)
+JSON_SHAPES = {
+    "validate": (dict, ("is_resume",), '{"is_resume": true/false, "reason": "..."}'),
+    "visual": (dict, ("layout_risk",), '{"layout_risk": "HIGH" or "LOW", "issue_detected": "...", "advice": "..."}'),
+    "ats": (dict, ("score_1_to_10",),
+            '{"is_readable": true/false, "score_1_to_10": 8, "extracted_name": "...", "recommended_filename": "...", '
+            '"critical_issues": ["..."], "deduction_reasoning": "..."}'),
+    "profile": (dict, ("keywords", "experience_level"),
+                '{"feedback": "...", "cover_letter": "...", "keywords": ["..."], "experience_level": "..."}'),
+    "interview": (list, (),
+                  '[{"topic": "...", "type": "...", "proficiency_level": "...", "is_real": true, "problem_name": "...", '
+                  '"verification_link": "...", "content": "...", "code_snippet": "...", "solution": "...", '
+                  '"complexity": "..."}]'),
+}
+
+
+def _check_shape(stage, data, schema=None):
+    """Returns 'data' if it has the stage's shape (or matches 'schema'), else raises SchemaError."""
+    if schema is not None:
+        return validate_response(data, schema)
+    root, keys, _ = JSON_SHAPES[stage]
+    if not isinstance(data, root):
+        raise SchemaError(f"<root>: expected a JSON {'object' if root is dict else 'array'}")
+    missing = [key for key in keys if key not in data]
+    if missing:
+        raise SchemaError(f"<root>: missing {', '.join(missing)}")
+    return data
+
+
+def build_repair_prompt(stage, answer, error, schema=None):
+    """Asks the model to turn its own unusable answer into valid JSON (no resume / JD / image resent)."""
+    shape = "the response schema of this request" if schema is not None else JSON_SHAPES[stage][2]
+    return f"""
+    Your previous answer could not be used: {error}
+
+    PREVIOUS ANSWER:
+    ---------------------
+    {answer}
+    ---------------------
+
+    Return the same content as ONE valid JSON document in this shape: {shape}
+    Fix the syntax, add any missing field and finish anything that was cut off; keep every value already there.
+    CRITICAL: Output ONLY the JSON. No intro text, no ``` fences.
     """
-    Uses Gemini to quickly check if the text looks like a Resume/CV.
+
+
+def _forget_answer(contents, backend=None, options=None):
+    """Drops an unusable answer from the response cache (if the backend has one), so a retry asks the model."""
+    forget = getattr(backend if backend is not None else get_backend(), "forget", None)
+    if callable(forget):
+        try:
+            forget(contents, **(options or {}))
+        except Exception as e:
+            print(f"⚠️ Could not drop the cached answer: {e}")
+
+
+def _generate_json(stage, contents, on_json_member=None, backend=None, options=None, schema=None):
+    """
+    _generate() + _loads() + a shape check, with one targeted retry: an answer that doesn't
+    parse or lacks required fields is sent back with a repair prompt (json_repairs_total),
+    instead of re-running the stage's full prompt. Raises if the repaired answer fails too.
+    Unusable answers are dropped from the response cache, so re-running the stage calls the model.
+    """
+    response = _generate(stage, contents, on_json_member, backend, options)
+    try:
+        return _check_shape(stage, _loads(stage, response.text), schema)
+    except ValueError as e:  # json.JSONDecodeError and SchemaError are both ValueErrors
+        if isinstance(e, SchemaError):
+            METRICS.inc("schema_validation_failures_total", stage=stage)
+        _forget_answer(contents, backend, options)
+        print(f"🔧 [{stage}] Unusable answer ({e}). Asking the model to repair it...")
+        METRICS.inc("json_repairs_total", stage=stage)
+        repair_prompt = build_repair_prompt(stage, response.text, e, schema)
+        repaired = _generate(f"{stage}_repair", repair_prompt, backend=backend, options=options)
+        try:
+            return _check_shape(stage, _loads(stage, repaired.text), schema)
+        except ValueError:
+            _forget_answer(repair_prompt, backend, options)
+            raise
+
+
+@traced()
+def validate_content_is_resume(text_snippet, backend=None):
+    """
+    Checks if the text looks like a Resume/CV.
+    A local scorer decides the clear cases in well under a millisecond;
+    only ambiguous texts are sent to Gemini.
     Returns: (bool, reason)
     """
     print("🕵️‍♀️ sanity check: Verifying if file is actually a resume...")
 
-    # We only send the first 1000 characters to save tokens
+    verdict, score, reason = classify_resume_text(text_snippet)
+    if verdict is not None:
+        print(f"⚡ Decided locally (score {score:.1f}): {reason}")
+        return verdict, reason
+    print(f"🤔 {reason} (score {score:.1f}). Asking Gemini...")
+
+    # We only send the head of the text (STAGE_BUDGETS["validate"]) to save tokens
     prompt_check = f"""
     Analyze the following text snippet. 
     Does this look like a Resume, CV, or Professional Profile?
 
     TEXT:
-    {text_snippet[:1000]}
+    {prepare_section(redact_pii(text_snippet).text, "validate")}
 
     OUTPUT JSON ONLY:
     {{
@@ -54,32 +224,39 @@ def validate_content_is_resume(text_snippet):
     """
 
     try:
-        response = model.generate_content(prompt_check)
-        data = json.loads(response.text.replace("```json", "").replace("```", "").strip())
+        data = _generate_json("validate", prompt_check, backend=backend)
         return data.get("is_resume", False), data.get("reason", "Unknown")
     except Exception as e:
         print(f"⚠️ Validation skipped due to error: {e}")
         return True, "Validation Error (Defaulting to True)"
 
+def _describe_source(source):
+    """Readable name for a PDF source in log messages."""
+    if isinstance(source, ParsedResume):
+        return source.source_name or "uploaded PDF"
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return "uploaded PDF"
+    return source
+
+
+@traced()
 def read_pdf(file_path):
-    """Extracts text from a PDF file."""
+    """
+    Extracts text from a PDF (path, raw bytes or ParsedResume).
+    The parse is shared with the visual check, so the file is only opened once.
+    """
     try:
-        text = ""
-        with pdfplumber.open(file_path) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text
-
         # *************** Added "Censor" Logic: Check if the PDF is actually readable
         # If text is empty or very short (< 50 chars), it is likely an image scan or corrupted.
-        if len(text.strip()) < 50:
-            print(f"❌ BLOCKING: The PDF ({file_path}) contains almost no text. It might be an image/scan.")
+        # Streamed page by page on the same open document, so a scan is turned away before the full parse.
+        parsed = load_resume(file_path, min_chars=MIN_TEXT_CHARS)
+        if parsed is None:
+            print(f"❌ BLOCKING: The PDF ({_describe_source(file_path)}) contains almost no text. It might be an image/scan.")
             return None
 
-        return text
+        return parsed.text
     except Exception as e:
-        print(f"Error reading PDF ({file_path}): {e}")
+        print(f"Error reading PDF ({_describe_source(file_path)}): {e}")
         return None
 
 
@@ -93,86 +270,124 @@ def read_text_file(file_path):
         return None
 
 
-def save_to_file(filename, content):
-    """Saves content to a specific file inside the output directory."""
-    if not os.path.exists(OUTPUT_DIR):
-        os.makedirs(OUTPUT_DIR)
-        print(f"📁 Created directory: {OUTPUT_DIR}")
-
-    filepath = os.path.join(OUTPUT_DIR, filename)
-
-    try:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
-        print(f"✅ Saved successfully: {filepath}")
-    except Exception as e:
-        print(f"❌ Error saving {filename}: {e}")
+def save_to_file(filename, content, sink=None):
+    """
+    Hands a report to the run's artifact sink (see artifacts.py), which writes it on flush.
+    Without a sink, the file is written straight into OUTPUT_DIR.
+    """
+    if sink is None:
+        sink = DirectorySink(OUTPUT_DIR, run_id="")
+        sink.write(filename, content)
+        sink.flush()
+    else:
+        sink.write(filename, content)
 
 
+@traced()
 def search_web(query, max_results=1):
     """Searches the web using DuckDuckGo."""
     print(f"🌐 Searching: '{query}'...")
     try:
-        results = list(DDGS().text(query, max_results=max_results))
-        return results
+        return ddg_search(query, max_results)
     except Exception as e:
         print(f"Search error: {e}")
         return []
 
 
+@traced()
 def fetch_website_content(url):
-    """Scrapes text content from a given URL."""
+    """Scrapes text content from a given URL (pooled session, see web_research.HttpPool)."""
     print(f"🕷️ Scraping: {url}...")
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=10)
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.text, 'html.parser')
-            text = soup.get_text(' ', strip=True)
-            return text[:6000]  # Limit text length
-        else:
-            return None
+        return fetch_page_text(url)  # None for a non-200 answer, text is capped at 6000 chars
     except Exception as e:
         print(f"Could not scrape {url}: {e}")
         return ""
 
 
 # ************** START CHANGE: Added Visual ATS Check Functions **************
+@traced()
 def convert_first_page_to_image(pdf_path):
     """
-    Converts the first page of a PDF into a PIL Image object.
-    Required for the visual comparison logic.
+    Converts the first page of a PDF into a PIL Image object (72 dpi RGB, rendered on first
+    use from the parsed document, see ParsedResume.first_page_image).
+    The visual check doesn't use it: it sends render_resume_pages() instead.
     """
     try:
-        doc = fitz.open(pdf_path)
-        page = doc.load_page(0)  # Get first page
-        pix = page.get_pixmap()  # Render page to an image
-        img_data = pix.tobytes("png")  # Convert to PNG bytes
-        return Image.open(io.BytesIO(img_data))
+        return load_resume(pdf_path).first_page_image
     except Exception as e:
         print(f"⚠️ Error converting PDF to image: {e}")
         return None
 
 
-def check_ats_compatibility_visual(pdf_path, extracted_text):
+@traced()
+def render_resume_pages(pdf_path):
+    """
+    The first pages, compact and tiled for the vision model (see visual_render for
+    VISUAL_DPI / VISUAL_COLOR / VISUAL_MAX_PAGES / VISUAL_PAGES_PER_IMAGE). None on failure.
+    """
+    try:
+        rendered = render_for_visual(load_resume(pdf_path))
+    except Exception as e:
+        print(f"⚠️ Error converting PDF to image: {e}")
+        return None
+    return rendered or None
+
+
+@traced()
+def local_layout_check(pdf_path):
+    """
+    The visual verdict from the PDF's block coordinates and drawings (see layout_analysis),
+    or None when the geometry is inconclusive (or unreadable) and the vision model should look.
+    """
+    try:
+        verdict, confidence, reason = check_layout(load_resume(pdf_path))
+    except Exception as e:
+        print(f"⚠️ Local layout check failed: {e}")
+        return None
+    if verdict is not None:
+        print(f"⚡ Decided locally (confidence {confidence:.2f}): {reason}")
+        METRICS.inc("local_layout_checks_total", outcome="decided")
+        return verdict
+    print(f"🤔 {reason} (confidence {confidence:.2f}). Asking Gemini...")
+    METRICS.inc("local_layout_checks_total", outcome="deferred")
+    return None
+
+
+@traced()
+def check_ats_compatibility_visual(pdf_path, extracted_text, backend=None):
     """
     Sends the VISUAL image of the resume AND the EXTRACTED text to Gemini.
     Asks Gemini to judge if the extraction ruined the layout (e.g., mixed columns).
+    Layouts the local geometry check can decide (local_layout_check) never reach Gemini.
     """
     print("\n--- 👁️ Running Visual ATS Logic Check (Image vs. Text) ---")
 
-    # 1. Get the image
-    resume_image = convert_first_page_to_image(pdf_path)
-    if not resume_image:
+    # 0. Most layouts are clear from the PDF's own block geometry: no vision call needed
+    local_verdict = local_layout_check(pdf_path)
+    if local_verdict:
+        return local_verdict
+
+    # 1. Get the images (first pages, grayscale, tiled side by side)
+    rendered = render_resume_pages(pdf_path)
+    if not rendered:
         print("❌ Could not generate image from PDF. Skipping visual check.")
         return None
 
+    # A near-identical layout was judged before (e.g. an earlier revision): reuse that verdict
+    visual_cache = get_visual_cache()
+    cache_version = resume_store_version(backend)
+    if visual_cache is not None:
+        hit = visual_cache.lookup(rendered.page_hash, cache_version)
+        if hit:
+            verdict, distance = hit
+            print(f"♻️ Layout matches a previous visual check ({distance} bits apart): reusing its verdict.")
+            return verdict
+
     # 2. Prepare the prompt
     prompt_visual = """
     I am providing you with two things:
-    1. An IMAGE of a resume (how a human sees it).
+    1. IMAGES of a resume (how a human sees it). Consecutive pages may be tiled side by side, left to right.
     2. The RAW TEXT extracted from that resume by a computer (how an ATS sees it).
 
     YOUR TASK:
@@ -201,16 +416,16 @@ def check_ats_compatibility_visual(pdf_path, extracted_text):
     }}
     """
 
-    # Inject first 1500 chars of text into prompt (enough to spot column mixing)
-    final_prompt = prompt_visual.format(text_snippet=extracted_text[:1500])
+    # Inject the head of the text into prompt (enough to spot column mixing)
+    final_prompt = prompt_visual.format(text_snippet=prepare_section(extracted_text, "visual"))
 
     try:
         # Send both Image and Text prompt to Gemini
-        response = model.generate_content([final_prompt, resume_image])
-
-        # Clean json
-        cleaned_json = response.text.replace("```json", "").replace("```", "").strip()
-        data = json.loads(cleaned_json)
+        print(f"🖼️ Sending {rendered.describe()}")
+        METRICS.inc("visual_image_bytes_total", rendered.payload_bytes)
+        data = _generate_json("visual", [final_prompt, *rendered.parts], backend=backend)
+        if visual_cache is not None:
+            visual_cache.put(rendered.page_hash, cache_version, data)
         return data
 
     except Exception as e:
@@ -222,63 +437,71 @@ def check_ats_compatibility_visual(pdf_path, extracted_text):
 
 # --- 3. Main Logic ---
 
-# ************** START CHANGE: Updated arguments and added Visual Check Logic **************
-def process_application(resume_path, resume_text, job_description):
+QUOTA_ERROR_MESSAGE = "out of API KEY tokens. Try again tomorrow."
+
+
+def _is_quota_error(e):
     """
-    Orchestrates the process.
-    NOW ACCEPTS 'resume_path' to enable visual checking.
+    Gemini reports an exhausted quota as HTTP 429.
+    Short-lived 429s are already retried by the rate limiter, so one that reaches
+    the pipeline means the daily quota is really gone.
     """
-    from datetime import datetime
+    return error_status(e) == 429
 
-    # Initialize a results dictionary to return to the UI
-    results_pack = {}
 
-    is_resume, reason = validate_content_is_resume(resume_text)
+@traced()
+def sanitize_resume_text(resume_text):
+    """Returns a copy of the resume with PII (emails, phones, URLs, addresses, IDs) replaced by placeholders."""
+    print("🔒 Hiding personal info before it reaches the AI...")
 
-    if not is_resume:
-        print(f"⛔ STOPPING: This does not look like a resume. Reason: {reason}")
-        return {
-            "fatal_error": f"This does not look like a resume. Reason: {reason}"
-        }
+    redaction = redact_pii(resume_text)
 
-    print("\n--- 📉 Running BUDGET Mode (Simulated Agent) ---")
+    print(f"✅ Privacy check complete. Hidden: {redaction.counts() or 'nothing found'}")
+    return redaction.text
 
-    # --- [NEW] Visual Layout Check (Does NOT stop execution, just reports) ---
-    visual_report = check_ats_compatibility_visual(resume_path, resume_text)
-    visual_risk_level = "LOW"
-    visual_issue_desc = "None"
 
+def run_visual_check(resume_path, resume_text, sink=None, backend=None):
+    """Visual Layout Check (Does NOT stop execution, just reports)."""
+    print("\n--- 📉 Running BUDGET Mode (Simulated Agent) ---")
+
+    visual_report = check_ats_compatibility_visual(resume_path, resume_text, backend)
     if visual_report:
-        visual_risk_level = visual_report.get('layout_risk', 'LOW')
-        visual_issue_desc = visual_report.get('issue_detected', 'None')
+        save_visual_report(visual_report, sink)
 
-        print(f"\n📸 Visual Layout Risk: {visual_risk_level}")
-        print(f"⚠️ Issue: {visual_issue_desc}")
+    return visual_report
 
-        visual_warning = f"--- VISUAL FORMAT CHECK ---\n"
-        visual_warning += f"DATE: {datetime.now().strftime('%Y-%m-%d %H:%M')}\n"
-        visual_warning += f"RISK LEVEL: {visual_risk_level}\n"
-        visual_warning += f"ISSUE: {visual_issue_desc}\n"
-        visual_warning += f"ADVICE: {visual_report.get('advice')}\n"
-        save_to_file("ats_visual_check.txt", visual_warning)
 
-        if visual_risk_level == "HIGH":
-            results_pack["visual_warning"] = visual_report
-    # -------------------------------------------------------------------------
+def save_visual_report(visual_report, sink=None):
+    """Prints the visual verdict and writes ats_visual_check.txt."""
+    visual_risk_level = visual_report.get('layout_risk', 'LOW')
+    visual_issue_desc = visual_report.get('issue_detected', 'None')
 
-    print("🔒 Creating sanitized version for logs (Keeping original for LLM)...")
+    print(f"\n📸 Visual Layout Risk: {visual_risk_level}")
+    print(f"⚠️ Issue: {visual_issue_desc}")
 
-    # We create a COPY for safe logging, but keep resume_text INTAC for the LLM
-    resume_text_safe = resume_text
-    resume_text_safe = re.sub(r'[\w.-]+@[\w.-]+\.\w+', '[EMAIL_HIDDEN]', resume_text_safe)
-    resume_text_safe = re.sub(r'(?:\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}', '[PHONE_HIDDEN]', resume_text_safe)
+    visual_warning = f"--- VISUAL FORMAT CHECK ---\n"
+    visual_warning += f"DATE: {datetime.now().strftime('%Y-%m-%d %H:%M')}\n"
+    visual_warning += f"RISK LEVEL: {visual_risk_level}\n"
+    visual_warning += f"ISSUE: {visual_issue_desc}\n"
+    visual_warning += f"ADVICE: {visual_report.get('advice')}\n"
+    save_to_file("ats_visual_check.txt", visual_warning, sink)
 
-    print("✅ Privacy check complete. Personal info hidden from AI.")
 
-    # =========================================================================
-    # STEP 0: Advanced ATS Technical Check
-    # =========================================================================
+# =========================================================================
+# STEP 0: Advanced ATS Technical Check
+# =========================================================================
+def run_ats_audit(resume_text_safe, visual_report, sink=None, backend=None):
+    """
+    Asks Gemini to simulate a strict ATS parser.
+    Returns (score, readable_report) or None if the audit failed.
+    """
     print("\n--- Step 0: Performing Deep ATS Technical Analysis ---")
+    visual_risk_level = "LOW"
+    visual_issue_desc = "None"
+    if visual_report:
+        visual_risk_level = visual_report.get('layout_risk', 'LOW')
+        visual_issue_desc = visual_report.get('issue_detected', 'None')
+
     visual_context_injection = ""
     if visual_risk_level.upper() == "HIGH":
         print("🚨 INJECTION ACTIVE: Forcing ATS to penalize score due to visual mismatch.")  # DEBUG PRINT
@@ -297,18 +520,18 @@ def process_application(resume_path, resume_text, job_description):
     # We ask Gemini to simulate a strict parser
     prompt_ats = f"""
     Act as a strict ATS (Applicant Tracking System) Parser algorithm.
-    
+
     {visual_context_injection}  <-- This inserts the warning if needed
 
     Here is the RAW TEXT extracted from a candidate's PDF resume:
     ---------------------
-    {resume_text_safe[:3000]} ... (truncated)
+    {prepare_section(resume_text_safe, "ats")}
     ---------------------
     *** IMPORTANT NOTE ON PRIVACY ***
-    The text "[EMAIL_HIDDEN]" and "[PHONE_HIDDEN]" are placeholders inserted by our security system. 
-    IF YOU SEE THESE PLACEHOLDERS, TREAT THEM AS VALID, PERFECTLY FORMATTED CONTACT INFO. 
+    Tags like "[EMAIL_1]", "[PHONE_1]", "[LINKEDIN_1]", "[URL_1]", "[ADDRESS_1]", "[ID_1]" are placeholders inserted by our security system.
+    IF YOU SEE THESE PLACEHOLDERS, TREAT THEM AS VALID, PERFECTLY FORMATTED CONTACT INFO.
     DO NOT penalize the score for missing contact info if these tags are present.
-    
+
     TASK: Perform a deep technical audit on readability.
     Output a JSON report with "is_readable", "score_1_to_10", "critical_issues", "deduction_reasoning".
     Check for these specific fatal errors:
@@ -333,78 +556,87 @@ def process_application(resume_path, resume_text, job_description):
     """
 
     try:
-        response_ats = model.generate_content(prompt_ats)
-        raw_text = response_ats.text
-        json_match = re.search(r'\{.*\}', raw_text, re.DOTALL)
-
-        if json_match:
-            cleaned_json_ats = json_match.group(0)
-            try:
-                ats_data = json.loads(cleaned_json_ats)
-            except json.JSONDecodeError:
-                print(f"⚠️ JSON Decode Error. The extracted text was: {cleaned_json_ats[:100]}...")
-                raise  # Re-raise to trigger the except block below
-        else:
-            print(f"⚠️ Could not find JSON braces in response: {raw_text[:100]}...")
-            raise Exception("No JSON found in response")
+        ats_data = _generate_json("ats", prompt_ats, backend=backend)
+        return save_ats_report(ats_data, sink)
 
-        score = ats_data.get('score_1_to_10', 0)
+    except Exception as e:
+        if _is_quota_error(e):
+            print("🛑 Quota Exceeded. Stopping execution.")
+            raise HaltPipeline(QUOTA_ERROR_MESSAGE)
+        print(f"⚠️ Could not perform ATS check: {e}")
+        return None
 
-        print(f"\n🤖 ATS Readability Score: {score}/10")
 
-        readable_report = f"--- 🤖 ATS READABILITY REPORT ---\n"
-        readable_report += f"DATE: {datetime.now().strftime('%Y-%m-%d %H:%M')}\n"
-        readable_report += f"==========================================\n\n"
+def save_ats_report(ats_data, sink=None):
+    """Renders the ATS audit JSON as ats_readability_report.txt. Returns (score, readable_report)."""
+    score = ats_data.get('score_1_to_10', 0)
 
-        readable_report += f"📊 SCORE: {score}/10\n"
-        readable_report += f"📂 RECOMMENDED FILENAME: {ats_data.get('recommended_filename', 'N/A')}\n"
-        readable_report += f"👤 NAME DETECTED: {ats_data.get('extracted_name', 'Not Found')}\n\n"
+    print(f"\n🤖 ATS Readability Score: {score}/10")
 
-        readable_report += f"--- ⚠️ CRITICAL ISSUES FOUND ---\n"
-        if ats_data.get('critical_issues'):
-            for issue in ats_data.get('critical_issues', []):
-                readable_report += f"[X] {issue}\n"
-        else:
-            readable_report += "✅ No critical issues found. Great job!\n"
+    readable_report = f"--- 🤖 ATS READABILITY REPORT ---\n"
+    readable_report += f"DATE: {datetime.now().strftime('%Y-%m-%d %H:%M')}\n"
+    readable_report += f"==========================================\n\n"
 
-        readable_report += f"\n--- 📉 DETAILED REASONING ---\n"
-        readable_report += f"{ats_data.get('deduction_reasoning', 'N/A')}\n"
+    readable_report += f"📊 SCORE: {score}/10\n"
+    readable_report += f"📂 RECOMMENDED FILENAME: {ats_data.get('recommended_filename', 'N/A')}\n"
+    readable_report += f"👤 NAME DETECTED: {ats_data.get('extracted_name', 'Not Found')}\n\n"
 
-        readable_report += f"\n==========================================\n"
-        readable_report += f"NOTE: If the score is below 8, please fix the layout issues in Canva/Word."
+    readable_report += f"--- ⚠️ CRITICAL ISSUES FOUND ---\n"
+    if ats_data.get('critical_issues'):
+        for issue in ats_data.get('critical_issues', []):
+            readable_report += f"[X] {issue}\n"
+    else:
+        readable_report += "✅ No critical issues found. Great job!\n"
 
-        save_to_file("ats_readability_report.txt", readable_report)
-        results_pack["ats_score"] = score
-        results_pack["ats_report"] = readable_report
+    readable_report += f"\n--- 📉 DETAILED REASONING ---\n"
+    readable_report += f"{ats_data.get('deduction_reasoning', 'N/A')}\n"
+
+    readable_report += f"\n==========================================\n"
+    readable_report += f"NOTE: If the score is below 8, please fix the layout issues in Canva/Word."
+
+    save_to_file("ats_readability_report.txt", readable_report, sink)
+    return score, readable_report
 
-    except Exception as e:
-        if "429" in str(e):
-            print("🛑 Quota Exceeded. Stopping execution.")
-            return {
-                "fatal_error": "out of API KEY tokens. Try again tomorrow."
-            }
-        print(f"⚠️ Could not perform ATS check: {e}")
-        print(f"DEBUG info - Raw Response was: {raw_text if 'raw_text' in locals() else 'No response'}")
 
-    # =========================================================================
-    # STEP 1: Analyze Profile & Detect Experience Level
-    # =========================================================================
+# =========================================================================
+# STEP 1: Analyze Profile & Detect Experience Level
+# =========================================================================
+def _feedback_text(feedback_data):
+    """The model sometimes returns the feedback as a list of points."""
+    if isinstance(feedback_data, list):
+        return "\n- ".join(str(point) for point in feedback_data)
+    return feedback_data
+
+
+def analyze_profile(resume_text, job_description, sink=None, on_partial=None, backend=None, company_context=None):
+    """
+    Single batched call: feedback, cover letter, JD keywords and experience level.
+    Raises on failure, since Step 2 cannot run without the keywords.
+    'on_partial(key, value)' receives feedback / cover_letter while the answer streams in.
+    'company_context' is the condensed web research on the employer (see web_research.py).
+    """
     print("\n--- Step 1: Analyzing Profile & Detecting Experience Level ---")
 
     # Get current date for the cover letter
     current_date = datetime.now().strftime("%B %d, %Y")
 
+    # The model only sees placeholders; real contact details are put back into its answer
+    redaction = redact_pii(resume_text)
+
     prompt_batch = f"""
     Act as a Hiring Manager and Technical Recruiter.
-    Job Description: {job_description}
-    Resume: {resume_text}
+    Job Description: {prepare_section(job_description, "profile_jd", aggressive=True)}
+    Resume: {prepare_section(redaction.text, "profile_resume")}
+    (Contact details in the resume are placeholders like [EMAIL_1] / [PHONE_1]. They are valid:
+    copy them exactly as written wherever contact info is needed.)
+    Company Research (public web pages, may be incomplete): {company_context or "Not available."}
 
     TASK: Perform 4 actions and output a JSON.
 
     1. "feedback": Provide a structured critique to improve the resume SPECIFICALLY for this job.
        - **PERSPECTIVE:** Analyze as both an **HR Recruiter** (scanning for clarity/keywords) and a **Tech Team Lead** (looking for technical depth).
        - **RULE:** Do NOT encourage inventing skills or experiences the candidate does not have. Focus exclusively on how to better frame and highlight the *existing* truth.
-       - **LANGUAGE & GRAMMAR:** Strictly check for spelling errors, typos, and awkward phrasing. 
+       - **LANGUAGE & GRAMMAR:** Strictly check for spelling errors, typos, and awkward phrasing.
        - **PROFESSIONAL SUMMARY:** Analyze the "Summary" or "About" section. Is it tailored to this specific Job Description? Suggest edits to sharpen the focus while maintaining the candidate's original voice.
        - **KEYWORDS & BUZZWORDS:** Identify high-impact keywords from the Job Description that are missing in the resume. Suggest where to add them (e.g., in Skills or descriptions).
        - **AMBIGUITY & IMPACT:** Identify vague adjectives or "fluff" (e.g., "significantly improved," "played a key role," "extensive experience") that inflate achievements without substance. Suggest replacing them with concrete verbs and specific metrics (What exactly did you do?).
@@ -414,7 +646,7 @@ def process_application(resume_path, resume_text, job_description):
        - **Experienced:** Work Experience should come first.
        - If the order is wrong, flag it.
        - **OTHER CRITICAL OBSERVATIONS:** **Do NOT limit your feedback to the categories above.** If you spot *any* other issues (e.g., formatting logic, tone inconsistencies, missing sections, red flags) or have creative suggestions to make the resume stand out, please include them here.
-       
+
     2. "cover_letter": Write a professional, concise, and sincere cover letter.
        - **FORMATTING RULES (Strict):No more then 3 paragraphs and no double hyphen **
              1. **NO TOP HEADER:** Do NOT put the candidate's name or contact info at the top.
@@ -427,6 +659,7 @@ def process_application(resume_path, resume_text, job_description):
                 - **Layout:** Name on one line. Email | Phone on the next line.
        - **TONE:** Authentic, direct, and conversational. Avoid overly formal words, "fluff", or "AI-sounding" language. Keep it brief.
        - **CONTENT:** Do NOT summarize the resume (the recruiter already has it). Focus on **"Why THIS company and THIS team?"**.
+         Use concrete facts from the Company Research when available; never invent facts about the company.
        - **THE HOOK:** Identify a specific project, hobby, or technical interest from the resume (e.g., an AI/Computer Vision project) and factually connect it to the company's product/domain. Show genuine passion through facts, not flattery.
 
     3. "keywords": Extract the top 3 most critical technical skills **FROM THE JOB DESCRIPTION**.
@@ -445,39 +678,117 @@ def process_application(resume_path, resume_text, job_description):
     }}
     """
 
-    keywords = []
-    experience_level = "Entry-Level/Student"
+    def on_member(key, value):
+        if key == "feedback":
+            on_partial("feedback", redaction.rehydrate(_feedback_text(value)))
+        elif key == "cover_letter":
+            on_partial("cover_letter", redaction.rehydrate(value))
 
     try:
-        response = model.generate_content(prompt_batch)
-        cleaned_json = response.text.replace("```json", "").replace("```", "").strip()
-        data = json.loads(cleaned_json)
-
-        # --- FIX: Handle List vs String for Feedback ---
-        feedback_data = data.get("feedback", "")
-        if isinstance(feedback_data, list):
-            feedback_data = "\n- ".join(feedback_data)  # Convert list to string
-
-        save_to_file("resume_feedback.txt", feedback_data)
-        save_to_file("cover_letter.txt", data.get("cover_letter", ""))
-        results_pack["feedback"] = feedback_data
-        results_pack["cover_letter"] = data.get("cover_letter", "")
-        keywords = data.get("keywords", [])
-        experience_level = data.get("experience_level", "Entry-Level/Student")
-
-        print(f"🎓 Detected Experience Level: {experience_level}")
-        print(f"🔍 Extracted Keywords (Based on JD): {keywords}")
+        data = _generate_json("profile", prompt_batch, on_member if on_partial else None, backend)
+        return save_profile(data, redaction, sink)
 
     except Exception as e:
-        if "429" in str(e):
-            return {
-                "fatal_error": "out of API KEY tokens. Try again tomorrow."            }
+        if _is_quota_error(e):
+            raise HaltPipeline(QUOTA_ERROR_MESSAGE)
         print(f"❌ Critical Error in Step 1: {e}")
-        return results_pack
-
-    # =========================================================================
-    # STEP 2: Generate Hybrid Questions (Verified & Linked)
-    # =========================================================================
+        raise
+
+
+def save_profile(data, redaction, sink=None):
+    """Puts the contact details back into the Step 1 JSON, writes feedback / cover letter, returns the profile dict."""
+    # --- FIX: Handle List vs String for Feedback ---
+    feedback_data = redaction.rehydrate(_feedback_text(data.get("feedback", "")))
+    cover_letter = redaction.rehydrate(data.get("cover_letter", ""))
+
+    save_to_file("resume_feedback.txt", feedback_data, sink)
+    save_to_file("cover_letter.txt", cover_letter, sink)
+    keywords = data.get("keywords", [])
+    experience_level = data.get("experience_level", "Entry-Level/Student")
+
+    print(f"🎓 Detected Experience Level: {experience_level}")
+    print(f"🔍 Extracted Keywords (Based on JD): {keywords}")
+
+    return {
+        "feedback": feedback_data,
+        "cover_letter": cover_letter,
+        "keywords": keywords,
+        "experience_level": experience_level,
+    }
+
+
+# =========================================================================
+# STEP 2: Generate Hybrid Questions (Verified & Linked)
+# =========================================================================
+def format_interview_item(idx, item):
+    """Renders one interview item as (question_entry, solution_entry)."""
+    topic = item.get('topic', 'General')
+    q_type = item.get('type', 'General')
+    level = item.get('proficiency_level', 'General Info')  # שדה חדש לרמת קושי
+    is_real = item.get('is_real', False)
+    prob_name = item.get('problem_name', 'Question')
+    link = item.get('verification_link', 'N/A')
+    content = item.get('content', '')
+    code = item.get('code_snippet', '')
+    solution = item.get('solution', '')
+    complexity = item.get('complexity', 'N/A')
+
+    # --- Dynamic Header Logic ---
+    if "LeetCode" in q_type:
+        source_label = "[REAL LEETCODE]" if is_real else "[AI CHALLENGE]"
+        header = f"🧩 [{topic}] {source_label} [{level}]: {prob_name}"
+    elif "Scenario" in q_type:
+        source_label = "[REAL SCENARIO]" if is_real else "[AI SCENARIO]"
+        header = f"⚙️ [{topic}] {source_label} [{level}]: {prob_name}"
+    else:
+        source_label = "[REAL THEORY]" if is_real else "[AI THEORY]"
+        header = f"📚 [{topic}] {source_label} [{level}]: {prob_name}"
+
+    # --- Question Entry ---
+    entry = f"{header}\n{'-' * 50}\n"
+    if link and link != "N/A":
+        entry += f"🔗 Verify Here: {link}\n"
+    entry += f"{'-' * 50}\n"
+    entry += f"Description/Question:\n{content}\n"
+    if code and code != "N/A":
+        entry += f"\n💻 Starter Code:\n{code}\n"
+    entry += f"\n\n"
+
+    # --- Solution Entry ---
+    sol_entry = f"Question {idx}: {header}\n"
+    if link and link != "N/A":
+        sol_entry += f"🔗 Source/Verify: {link}\n"
+    sol_entry += f"Answer/Solution:\n{solution}\n"
+    if complexity and complexity != "N/A":
+        sol_entry += f"\n📊 Complexity Analysis: {complexity}\n"
+    sol_entry += f"{'=' * 50}\n\n"
+    return entry, sol_entry
+
+
+def _interview_headers(experience_level):
+    return (f"--- INTERVIEW PREPARATION ({experience_level.upper()}) ---\n\n",
+            f"--- SOLUTIONS & EXPLANATIONS ---\n\n")
+
+
+def save_interview_prep(qa_list, experience_level, sink=None):
+    """Renders the Step 2 items into the question / solution sheets and writes them. Returns both."""
+    q_file, sol_file = _interview_headers(experience_level)
+    for idx, item in enumerate(qa_list, 1):
+        entry, sol_entry = format_interview_item(idx, item)
+        q_file += entry
+        sol_file += sol_entry
+
+    save_to_file("interview_questions.txt", q_file, sink)
+    save_to_file("interview_solutions.txt", sol_file, sink)
+    return q_file, sol_file
+
+
+def generate_interview_prep(keywords, experience_level, sink=None, on_partial=None, backend=None):
+    """
+    Builds the interview question and solution sheets for the JD keywords.
+    Returns (questions_text, solutions_text) or None if the step failed.
+    'on_partial("interview_prep", text)' receives the sheets so far as items stream in.
+    """
     print("\n--- Step 2: Generating Hybrid Interview Prep (With Verification Links) ---")
 
     prompt_extraction = f"""
@@ -524,12 +835,12 @@ def process_application(resume_path, resume_text, job_description):
 
     Output Format (JSON ONLY):
     [
-        {{ 
-            "topic": "Python", 
-            "type": "LeetCode", 
+        {{
+            "topic": "Python",
+            "type": "LeetCode",
             "proficiency_level": "MUST KNOW",
             "is_real": true,
-            "problem_name": "Two Sum", 
+            "problem_name": "Two Sum",
             "verification_link": "https://leetcode.com/problems/two-sum/",
             "content": "Given an array...",
             "code_snippet": "def twoSum...",
@@ -539,66 +850,518 @@ def process_application(resume_path, resume_text, job_description):
     ]
     """
 
+    q_file, sol_file = _interview_headers(experience_level)
+    streamed = []  # (question_entry, solution_entry) per item received so far
+
+    def on_item(idx, item):
+        if not isinstance(item, dict):
+            return
+        streamed.append(format_interview_item(len(streamed) + 1, item))
+        on_partial("interview_prep", q_file + "".join(q for q, _ in streamed) + "\n\n"
+                   + sol_file + "".join(sol for _, sol in streamed))
+
     try:
-        response_q = model.generate_content(prompt_extraction)
-        cleaned_json_q = response_q.text.replace("```json", "").replace("```", "").strip()
-        qa_list = json.loads(cleaned_json_q)
-
-        q_file = f"--- INTERVIEW PREPARATION ({experience_level.upper()}) ---\n\n"
-        sol_file = f"--- SOLUTIONS & EXPLANATIONS ---\n\n"
-
-        for idx, item in enumerate(qa_list, 1):
-            topic = item.get('topic', 'General')
-            q_type = item.get('type', 'General')
-            level = item.get('proficiency_level', 'General Info')  # שדה חדש לרמת קושי
-            is_real = item.get('is_real', False)
-            prob_name = item.get('problem_name', 'Question')
-            link = item.get('verification_link', 'N/A')
-            content = item.get('content', '')
-            code = item.get('code_snippet', '')
-            solution = item.get('solution', '')
-            complexity = item.get('complexity', 'N/A')
-
-            # --- Dynamic Header Logic ---
-            if "LeetCode" in q_type:
-                source_label = "[REAL LEETCODE]" if is_real else "[AI CHALLENGE]"
-                header = f"🧩 [{topic}] {source_label} [{level}]: {prob_name}"
-            elif "Scenario" in q_type:
-                source_label = "[REAL SCENARIO]" if is_real else "[AI SCENARIO]"
-                header = f"⚙️ [{topic}] {source_label} [{level}]: {prob_name}"
-            else:
-                source_label = "[REAL THEORY]" if is_real else "[AI THEORY]"
-                header = f"📚 [{topic}] {source_label} [{level}]: {prob_name}"
-
-            # --- Write Question File ---
-            entry = f"{header}\n{'-' * 50}\n"
-            if link and link != "N/A":
-                entry += f"🔗 Verify Here: {link}\n"
-            entry += f"{'-' * 50}\n"
-            entry += f"Description/Question:\n{content}\n"
-            if code and code != "N/A":
-                entry += f"\n💻 Starter Code:\n{code}\n"
-            q_file += entry + f"\n\n"
-
-            # --- Write Solution File ---
-            sol_file += f"Question {idx}: {header}\n"
-            if link and link != "N/A":
-                sol_file += f"🔗 Source/Verify: {link}\n"
-            sol_file += f"Answer/Solution:\n{solution}\n"
-            if complexity and complexity != "N/A":
-                sol_file += f"\n📊 Complexity Analysis: {complexity}\n"
-            sol_file += f"{'=' * 50}\n\n"
-
-        save_to_file("interview_questions.txt", q_file)
-        save_to_file("interview_solutions.txt", sol_file)
-        results_pack["interview_prep"] = q_file + "\n\n" + sol_file
+        qa_list = _generate_json("interview", prompt_extraction, on_item if on_partial else None, backend)
+        return save_interview_prep(qa_list, experience_level, sink)
 
     except Exception as e:
-        if "429" in str(e):
-            return {
-                "fatal_error": "out of API KEY tokens. Try again tomorrow."            }
+        if _is_quota_error(e):
+            raise HaltPipeline(QUOTA_ERROR_MESSAGE)
         print(f"❌ Error in Step 2: {e}")
+        return None
+
+
+def _publishing(stage, func, on_partial):
+    """Wraps a stage so its finished result reaches 'on_partial' right away, as results_pack keys."""
+    if on_partial is None:
+        return func
+
+    def run(deps):
+        result = func(deps)
+        for key, value in build_results_pack({stage: result}).items():
+            on_partial(key, value)
+        return result
+    return run
+
+
+def resume_store_version(backend=None):
+    """
+    Version tag for stored resume analyses: the prompt version plus the model that answers.
+    backend=None resolves to the default backend's model name without building it, so the
+    CLI / batch (no backend passed) and the web app (its own default backend) share records.
+    """
+    if backend is None:
+        model_name = runtime.backend.model_name if runtime.is_built("backend") else backend_model_name()
+    else:
+        model_name = getattr(backend, "model_name", type(backend).__name__)
+    return f"{RESUME_PROMPT_VERSION}:{model_name}"
+
+
+def lookup_resume(resume_path, store, backend=None):
+    """Returns (fingerprint, stored record or None); (None, None) when the PDF can't be read."""
+    try:
+        key = fingerprint(resume_path)
+    except Exception as e:
+        print(f"⚠️ Could not fingerprint the resume: {e}")
+        return None, None
+    return key, store.get(key, resume_store_version(backend))
+
+
+def _add_stored_resume_stages(graph, record, sink=None, on_partial=None):
+    """Same stages as add_resume_stages, answered from a resume_store record (no model calls)."""
+    def stage_visual(deps):
+        if record["visual_report"]:
+            save_visual_report(record["visual_report"], sink)
+        return record["visual_report"]
+
+    def stage_ats(deps):
+        score, readable_report = record["ats"]
+        print(f"\n🤖 ATS Readability Score: {score}/10")
+        save_to_file("ats_readability_report.txt", readable_report, sink)
+        return score, readable_report
+
+    graph.add_stage("validate", lambda deps: "Known resume (validated before)")
+    graph.add_stage("sanitize", lambda deps: record["sanitized"])
+    graph.add_stage("visual", _publishing("visual", stage_visual, on_partial), depends_on=["validate"])
+    graph.add_stage("ats", _publishing("ats", stage_ats, on_partial), depends_on=["sanitize", "visual"])
+
+
+def add_resume_stages(graph, resume_path, resume_text, sink=None, on_partial=None, backend=None, store=None):
+    """
+    Registers the stages that depend only on the resume:
+
+        validate ──> visual ──> ats <── sanitize
+
+    With a 'store' (resume_store.ResumeStore), a resume seen before is answered from its
+    stored record, and a new one is stored once its visual check and ATS audit succeed.
+    """
+    key = None
+    if store is not None:
+        key, record = lookup_resume(resume_path, store, backend)
+        if record is not None:
+            print("♻️ Known resume: reusing its visual check and ATS audit.")
+            _add_stored_resume_stages(graph, record, sink, on_partial)
+            return
+
+    def stage_ats(deps):
+        result = run_ats_audit(deps["sanitize"], deps["visual"], sink, backend)
+        if key is not None and result and deps["visual"]:
+            store.put(key, resume_store_version(backend), {"sanitized": deps["sanitize"],
+                                                           "visual_report": deps["visual"], "ats": result})
+        return result
+
+    def stage_validate(deps):
+        is_resume, reason = validate_content_is_resume(resume_text, backend)
+        if not is_resume:
+            print(f"⛔ STOPPING: This does not look like a resume. Reason: {reason}")
+            raise HaltPipeline(f"This does not look like a resume. Reason: {reason}")
+        return reason
+
+    graph.add_stage("validate", stage_validate)
+    graph.add_stage("sanitize", lambda deps: sanitize_resume_text(resume_text))
+    graph.add_stage("visual", _publishing("visual", lambda deps: run_visual_check(resume_path, resume_text, sink, backend),
+                                          on_partial),
+                    depends_on=["validate"])
+    graph.add_stage("ats", _publishing("ats", stage_ats, on_partial), depends_on=["sanitize", "visual"])
+
+
+def run_company_research(researcher, job_description):
+    """Research never fails the run: without it Step 1 just lacks company context."""
+    try:
+        return researcher.research(job_description)
+    except Exception as e:
+        print(f"⚠️ Company research failed: {e}")
+        return ""
+
+
+def add_job_stages(graph, resume_text, job_description, sink=None, depends_on=(), on_partial=None, backend=None,
+                   researcher=None):
+    """
+    Registers the JD-dependent stages:
+
+        [research] ──> profile (Step 1) ──> interview (Step 2)
+
+    The research stage is only added when a 'researcher' (web_research.CompanyResearcher) is given.
+    """
+    def stage_profile(deps):
+        return analyze_profile(resume_text, job_description, sink, on_partial, backend, deps.get("research"))
+
+    def stage_interview(deps):
+        profile = deps["profile"]
+        return generate_interview_prep(profile["keywords"], profile["experience_level"], sink, on_partial, backend)
+
+    profile_deps = list(depends_on)
+    if researcher is not None:
+        graph.add_stage("research", lambda deps: run_company_research(researcher, job_description),
+                        depends_on=depends_on)
+        profile_deps.append("research")
+
+    graph.add_stage("profile", stage_profile, depends_on=profile_deps)
+    graph.add_stage("interview", stage_interview, depends_on=["profile"])
+
+
+# =========================================================================
+# FUSED MODE: the whole application in one structured-output call
+# =========================================================================
+PIPELINE_MODES = ("staged", "fused")
+VISUAL_MISMATCH_ISSUE = "Visual-Text Mismatch (Severe Truncation)"
+
+
+def _fused_visual_instructions(rendered, local_verdict):
+    """(what the model gets, what to put in "visual") for the images actually attached to the fused call."""
+    if rendered:
+        shown, total = rendered.pages_rendered, rendered.page_count
+        if shown == 1:
+            pages = "first page" if total > 1 else "page"
+        else:
+            pages = f"first {shown} of its {total} pages" if total > shown else f"{shown} pages"
+        tiling = "; consecutive pages are tiled side by side, left to right" if shown > 1 else ""
+        attached = (f"{len(rendered.parts)} IMAGE(S) of the resume's {pages} (how a human sees it{tiling}), "
+                    f"the RAW TEXT extracted from the PDF")
+        visual = ('compare the page image(s) with the raw text. "layout_risk" is "HIGH" if the text mixes the '
+                  'columns,\n       jumbles tables, misses text shown in the image (skill bars, logos) or has '
+                  'headers/footers inside\n       sentences; otherwise "LOW". Describe the mismatch in '
+                  '"issue_detected" and give actionable "advice".')
+        return attached, visual
+    attached = "NO IMAGE, only the RAW TEXT extracted from the PDF"
+    if local_verdict:
+        visual = (f'the layout was already checked from the PDF itself; copy this verdict: "layout_risk" '
+                  f'"{local_verdict["layout_risk"]}",\n       "issue_detected" "{local_verdict["issue_detected"]}", '
+                  f'"advice" "{local_verdict["advice"]}".')
+    else:
+        visual = 'there is no image to compare with: "layout_risk" "LOW", "issue_detected" and "advice" "N/A".'
+    return attached, visual
+
+
+def build_fused_prompt(resume_text_safe, job_description, company_context=None, rendered=None, local_verdict=None):
+    """
+    The validate / visual / ATS / Step 1 / Step 2 instructions as one prompt (answer shape: FUSED_RESPONSE_SCHEMA).
+    'rendered' is the RenderedPages sent with it (None: no image); 'local_verdict' the layout verdict already decided.
+    """
+    current_date = datetime.now().strftime("%B %d, %Y")
+    attached, visual = _fused_visual_instructions(rendered, local_verdict)
+    return f"""
+    Act as a strict ATS parser, a Hiring Manager / Technical Recruiter and a Technical Interview Coach.
+    You get {attached}
+    (how an ATS sees it) and a Job Description.
+
+    Job Description: {prepare_section(job_description, "profile_jd", aggressive=True)}
+    Raw resume text:
+    ---------------------
+    {prepare_section(resume_text_safe, "profile_resume")}
+    ---------------------
+    (Contact details are placeholders like [EMAIL_1] / [PHONE_1]. Treat them as valid contact info and
+    copy them exactly as written wherever contact info is needed.)
+    Company Research (public web pages, may be incomplete): {company_context or "Not available."}
+
+    Fill in every field of the JSON schema:
+    1. "resume_check": does the text look like a Resume, CV or Professional Profile? Give a brief "reason".
+    2. "visual": {visual}
+    3. "ats": a strict readability audit of the raw text: broken multi-column sentences, missing email/phone,
+       non-standard section headers, a spaced-out name, skill bars or graphs. If layout_risk is "HIGH", the
+       "score_1_to_10" is at most 5 and "critical_issues" includes "{VISUAL_MISMATCH_ISSUE}".
+       "recommended_filename" is FirstName_LastName_CV.pdf (never "Student" or "Junior").
+    4. "profile":
+       - "feedback": a structured critique for THIS job, as an HR Recruiter and a Tech Team Lead: spelling and
+         grammar, how well the summary fits the JD, missing JD keywords and where to add them, vague "fluff" to
+         replace with concrete verbs and metrics, content density, section order for the candidate's level,
+         and anything else you notice. Never encourage inventing skills or experience.
+       - "cover_letter": at most 3 paragraphs, no double hyphens. The date "{current_date}" at the very top, no
+         header with the candidate's name or contact info, "Dear Hiring Team,", and end with "Sincerely,", the
+         name on one line and "Email | Phone" on the next. Authentic, direct and brief; focus on "Why THIS
+         company and THIS team?" with a concrete hook from the resume. Use only facts about the company from
+         the research above.
+       - "keywords": the top 3 technical skills FROM THE JOB DESCRIPTION most likely to come up in the interview.
+       - "experience_level": based STRICTLY on the Job Description requirements.
+    5. "interview_items": exactly 2 items per keyword, calibrated to experience_level and labelled "MUST KNOW"
+       or "ADVANCED/BONUS".
+       - Programming language: a "Theory" question (GeeksforGeeks / Javatpoint / W3Schools) and a REAL
+         "LeetCode" problem with its direct URL.
+       - Tool, concept or unsure: a "Theory" question and a StackOverflow "Scenario" with a link.
+       Coding items need starter code, the full solution and the complexity. "verification_link" is a URL
+       or "N/A"; "is_real" is false for anything generated.
+    """
+
+
+def _run_staged_fallback(resume_path, resume_text, job_description, sink=None, on_partial=None, backend=None,
+                         company_context=None):
+    """
+    The staged prompts one after the other, for when the fused answer is unusable.
+    If Step 1 fails, the visual and ATS results are still returned (profile / interview None).
+    """
+    print("↩️ Falling back to the staged prompts.")
+    is_resume, reason = validate_content_is_resume(resume_text, backend)
+    if not is_resume:
+        raise HaltPipeline(f"This does not look like a resume. Reason: {reason}")
+    visual_report = run_visual_check(resume_path, resume_text, sink, backend)
+    ats = run_ats_audit(sanitize_resume_text(resume_text), visual_report, sink, backend)
+    try:
+        profile = analyze_profile(resume_text, job_description, sink, on_partial, backend, company_context)
+    except HaltPipeline:
+        raise
+    except Exception:
+        # analyze_profile already printed the error; keep what the visual check and ATS audit found
+        return {"visual": visual_report, "ats": ats, "profile": None, "interview": None}
+    interview = generate_interview_prep(profile["keywords"], profile["experience_level"], sink, on_partial, backend)
+    return {"visual": visual_report, "ats": ats, "profile": profile, "interview": interview}
+
+
+def run_fused_application(resume_path, resume_text, job_description, sink=None, on_partial=None, backend=None,
+                          company_context=None):
+    """
+    One call, with structured output, for the resume check, visual check, ATS audit, Step 1 and Step 2.
+    The answer is validated against FUSED_RESPONSE_SCHEMA; if the call fails or the answer doesn't
+    match, the staged prompts run instead. Returns the staged results
+    {"visual", "ats", "profile", "interview"}. Raises HaltPipeline for a non-resume or an exhausted quota.
+    """
+    print("\n--- ⚡ Fused mode: one call for the whole application ---")
+    redaction = redact_pii(resume_text)
+    # A decisive local layout verdict replaces the image (and the model's visual answer)
+    local_verdict = local_layout_check(resume_path)
+    rendered = None if local_verdict else render_resume_pages(resume_path)
+    contents = [build_fused_prompt(redaction.text, job_description, company_context, rendered, local_verdict)]
+    if rendered:
+        contents.extend(rendered.parts)
+        METRICS.inc("visual_image_bytes_total", rendered.payload_bytes)
+
+    def on_member(key, value):
+        if key == "profile" and isinstance(value, dict):
+            on_partial("feedback", redaction.rehydrate(_feedback_text(value.get("feedback", ""))))
+            on_partial("cover_letter", redaction.rehydrate(value.get("cover_letter", "")))
+
+    try:
+        data = _generate_json("fused", contents, on_member if on_partial else None, backend,
+                              structured_output_config(FUSED_RESPONSE_SCHEMA), schema=FUSED_RESPONSE_SCHEMA)
+    except Exception as e:
+        if _is_quota_error(e):
+            raise HaltPipeline(QUOTA_ERROR_MESSAGE)
+        print(f"⚠️ Fused answer unusable: {e}")
+        return _run_staged_fallback(resume_path, resume_text, job_description, sink, on_partial, backend,
+                                    company_context)
+
+    if not data["resume_check"]["is_resume"]:
+        reason = data["resume_check"]["reason"]
+        print(f"⛔ STOPPING: This does not look like a resume. Reason: {reason}")
+        raise HaltPipeline(f"This does not look like a resume. Reason: {reason}")
+
+    # No image and no local verdict: the model's visual answer would be a guess
+    visual_report = local_verdict or (data["visual"] if rendered else None)
+    ats_data = data["ats"]
+    if visual_report:
+        save_visual_report(visual_report, sink)
+        if visual_report["layout_risk"] == "HIGH":
+            # Same rule the staged ATS prompt gets injected, enforced in case the model ignored it
+            ats_data["score_1_to_10"] = min(ats_data["score_1_to_10"], 5)
+            if VISUAL_MISMATCH_ISSUE not in ats_data["critical_issues"]:
+                ats_data["critical_issues"].append(VISUAL_MISMATCH_ISSUE)
+
+    profile = save_profile(data["profile"], redaction, sink)
+    return {
+        "visual": visual_report,
+        "ats": save_ats_report(ats_data, sink),
+        "profile": profile,
+        "interview": save_interview_prep(data["interview_items"], profile["experience_level"], sink),
+    }
+
+
+def add_fused_stages(graph, resume_path, resume_text, job_description, sink=None, on_partial=None, backend=None,
+                     researcher=None):
+    """
+    Registers the fused pipeline:
+
+        validate (local only) ──> [research] ──> fused ──> visual / ats / profile / interview
+
+    The last four just hand out their part of the fused answer, so results and progress
+    events have the same names as in the staged graph.
+    """
+    def stage_validate(deps):
+        verdict, score, reason = classify_resume_text(resume_text)
+        if verdict is False:
+            print(f"⛔ STOPPING: This does not look like a resume. Reason: {reason}")
+            raise HaltPipeline(f"This does not look like a resume. Reason: {reason}")
+        return reason  # Unclear cases are left to the fused call's resume_check
+
+    def stage_fused(deps):
+        return run_fused_application(resume_path, resume_text, job_description, sink, on_partial, backend,
+                                     deps.get("research"))
+
+    graph.add_stage("validate", stage_validate)
+    fused_deps = ["validate"]
+    if researcher is not None:
+        graph.add_stage("research", lambda deps: run_company_research(researcher, job_description),
+                        depends_on=["validate"])
+        fused_deps.append("research")
+    graph.add_stage("fused", stage_fused, depends_on=fused_deps)
+    for stage in ("visual", "ats", "profile", "interview"):
+        graph.add_stage(stage, _publishing(stage, lambda deps, stage=stage: deps["fused"][stage], on_partial),
+                        depends_on=["fused"])
+
+
+def build_results_pack(results):
+    """Turns the raw stage results into the dictionary the UI expects."""
+    results_pack = {}
+
+    visual_report = results.get("visual")
+    if visual_report and visual_report.get('layout_risk', 'LOW') == "HIGH":
+        results_pack["visual_warning"] = visual_report
+
+    if results.get("ats"):
+        results_pack["ats_score"], results_pack["ats_report"] = results["ats"]
+
+    if results.get("profile"):
+        results_pack["feedback"] = results["profile"]["feedback"]
+        results_pack["cover_letter"] = results["profile"]["cover_letter"]
+
+    if results.get("interview"):
+        q_file, sol_file = results["interview"]
+        results_pack["interview_prep"] = q_file + "\n\n" + sol_file
+
     return results_pack
+
+
+STAGE_LABELS = {
+    "validate": "🕵️‍♀️ Checking the file is a resume",
+    "sanitize": "🔒 Hiding personal info",
+    "research": "🌐 Researching the company",
+    "fused": "⚡ One-call analysis",
+    "visual": "👁️ Visual layout check",
+    "ats": "🤖 ATS readability audit",
+    "profile": "🧠 Feedback & cover letter",
+    "interview": "❓ Interview prep",
+}
+
+
+def replay_stage(stage, result, sink=None, on_partial=None):
+    """
+    Re-writes the report files of a stage restored from a checkpoint (into this run's sink)
+    and publishes its results_pack entries, as if it had just run.
+    """
+    if stage == "visual":
+        save_visual_report(result, sink)
+    elif stage == "ats":
+        print(f"\n🤖 ATS Readability Score: {result[0]}/10")
+        save_to_file("ats_readability_report.txt", result[1], sink)
+    elif stage == "profile":
+        save_to_file("resume_feedback.txt", result["feedback"], sink)
+        save_to_file("cover_letter.txt", result["cover_letter"], sink)
+    elif stage == "interview":
+        save_to_file("interview_questions.txt", result[0], sink)
+        save_to_file("interview_solutions.txt", result[1], sink)
+    if on_partial is not None:
+        for key, value in build_results_pack({stage: result}).items():
+            on_partial(key, value)
+
+
+def application_run_id(resume_path, job_description, mode="staged", backend=None):
+    """
+    Run id for checkpoints: the same resume, JD, mode and prompt/model version give the same id,
+    so re-running a failed application resumes it. None when the PDF can't be read.
+    """
+    try:
+        key = fingerprint(resume_path)
+    except Exception as e:
+        print(f"⚠️ Could not fingerprint the resume: {e}")
+        return None
+    digest = hashlib.sha256()
+    for part in (key, job_description, mode, resume_store_version(backend)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+def _progress_reporter(on_progress):
+    """Adapts StageGraph events into one-line messages for on_progress(message)."""
+    if on_progress is None:
+        return None
+
+    def on_event(stage, status, seconds):
+        label = STAGE_LABELS.get(stage, stage)
+        if status == "started":
+            on_progress(f"{label}...")
+        elif status == "finished":
+            on_progress(f"{label} ✅ ({seconds:.1f}s)")
+        elif status == "restored":
+            on_progress(f"{label} ♻️ (from checkpoint)")
+        else:
+            on_progress(f"{label} ⚠️ failed ({seconds:.1f}s)")
+    return on_event
+
+
+def process_application(resume_path, resume_text, job_description, on_progress=None, sink=None, on_partial=None,
+                        backend=None, researcher=None, store=None, mode=None, run_id=None, checkpoints=None):
+    """
+    Orchestrates the process.
+    The stages run as a dependency graph, so the visual/ATS branch and the
+    Step 1 -> Step 2 branch hit Gemini in parallel once the resume is validated.
+    'on_progress(message)' is called as stages start and finish (used by the web app).
+    'on_partial(key, value)' gets results_pack entries as soon as they exist; Step 1 / Step 2
+    are streamed, so feedback, cover letter and questions arrive field by field.
+    'backend' replaces the default model for every stage (e.g. llm_backend.StubBackend for load tests).
+    'researcher' replaces the default company research (web_research.get_researcher(), off with COMPANY_RESEARCH=0).
+    'store' replaces the default resume analysis store (resume_store.get_resume_store(), off with RESUME_STORE=0).
+    'mode' is "staged" (default) or "fused" (one structured-output call, see add_fused_stages;
+    the resume store is not used); $PIPELINE_MODE sets the default.
+    Reports go to 'sink' (default: a fresh outputs/<run_id>/ folder, written in one batch at the end).
+    Every finished stage is checkpointed under 'run_id' (default: application_run_id()) in
+    'checkpoints' (default: checkpoints.get_checkpoint_store(), off with CHECKPOINTS=0). If the run
+    fails part-way, calling it again with the same input only re-runs the stages that didn't finish;
+    a complete run clears its checkpoints. results_pack["failed_stages"] lists what is left to retry.
+    The run is traced (see telemetry.py); results_pack["timings"] holds the per-span breakdown.
+    """
+    if sink is None:
+        sink = DirectorySink(OUTPUT_DIR)
+    if researcher is None:
+        researcher = get_researcher()
+    mode = mode or os.getenv("PIPELINE_MODE", "staged")
+    if mode not in PIPELINE_MODES:
+        raise ValueError(f"Unknown pipeline mode '{mode}' (expected one of {PIPELINE_MODES}).")
+    if store is None and mode == "staged":
+        store = get_resume_store()
+    if checkpoints is None:
+        checkpoints = get_checkpoint_store()
+    if run_id is None and checkpoints is not None:
+        run_id = application_run_id(resume_path, job_description, mode, backend)
+    checkpoint = (RunCheckpoint(checkpoints, run_id, redact_pii(resume_text))
+                  if checkpoints is not None and run_id else None)
+
+    with start_trace(getattr(sink, "run_id", None) or None) as trace:
+        with span("process_application"):
+            graph = StageGraph(on_event=_progress_reporter(on_progress), checkpoint=checkpoint,
+                               on_restore=lambda stage, result: replay_stage(stage, result, sink, on_partial))
+            if mode == "fused":
+                add_fused_stages(graph, resume_path, resume_text, job_description, sink, on_partial, backend,
+                                 researcher)
+            else:
+                add_resume_stages(graph, resume_path, resume_text, sink, on_partial, backend, store)
+                add_job_stages(graph, resume_text, job_description, sink, depends_on=["validate"],
+                               on_partial=on_partial, backend=backend, researcher=researcher)
+
+            results = graph.run()
+            print(f"⏱️ Stage timings (s): {graph.timings}")
+            with span("flush_reports"):
+                sink.flush()
+
+    failed_stages = graph.unfinished()
+    if graph.restored:
+        print(f"♻️ Restored from checkpoint: {', '.join(graph.restored)}")
+    if checkpoint is not None:
+        if failed_stages:
+            print(f"💾 Finished stages are checkpointed under run id {run_id}; "
+                  f"running again retries only: {', '.join(failed_stages)}")
+        else:
+            checkpoint.clear()
+
+    # Initialize a results dictionary to return to the UI
+    results_pack = build_results_pack(results)
+    if graph.halted is not None:
+        # Keep whatever stages already finished (e.g. the ATS report) next to the error
+        results_pack["fatal_error"] = str(graph.halted)
+    results_pack["stage_timings"] = graph.timings
+    results_pack["timings"] = trace.breakdown()
+    results_pack["run_id"] = run_id
+    results_pack["failed_stages"] = failed_stages
+    return results_pack
+
 # --- 4. Execution Entry Point ---
 
 if __name__ == "__main__":
@@ -613,9 +1376,10 @@ if __name__ == "__main__":
 
         if my_resume_content and job_desc_content:
             # ************** START CHANGE: Passing resume_path to function **************
-            process_application(resume_path, my_resume_content, job_desc_content)
+            run_sink = DirectorySink(OUTPUT_DIR)
+            process_application(resume_path, my_resume_content, job_desc_content, sink=run_sink)
             # ************** END CHANGE **************
 
-            print("\n--- 🏁 Done! Created files in 'outputs' directory ---")
+            print(f"\n--- 🏁 Done! Created files in '{run_sink.location}' directory ---")
     else:
         print(f"❌ Error: Missing input files in '{INPUT_DIR}' directory.")
\ No newline at end of file
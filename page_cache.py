@@ -0,0 +1,138 @@
+import os
+import sqlite3
+import threading
+import time
+
+from telemetry import METRICS
+
+
+class PageCache:
+    """
+    On-disk HTTP cache for scraped pages, keyed by URL (SQLite, survives restarts).
+    Stores the raw HTML, the extracted text and the validators (ETag / Last-Modified):
+    - younger than 'ttl_seconds': served without touching the network
+    - older: revalidated with a conditional request (a 304 costs no download or parse)
+    - the file is kept under 'max_bytes' by dropping the least recently used pages
+    Hosts that fail (timeouts, 5xx, 429) go on a negative list for 'failure_ttl_seconds',
+    so a batch of JDs for the same dead site doesn't wait for it over and over.
+    """
+
+    def __init__(self, db_path, ttl_seconds=24 * 3600, max_bytes=50 * 1024 * 1024, failure_ttl_seconds=600):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.failure_ttl_seconds = failure_ttl_seconds
+        self.stats = {"fresh_hits": 0, "revalidated": 0, "misses": 0, "stores": 0, "evictions": 0,
+                      "host_skips": 0}
+        self._lock = threading.Lock()
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "url TEXT PRIMARY KEY, fetched_at REAL, last_used REAL, status INTEGER, etag TEXT, "
+            "last_modified TEXT, html TEXT, text TEXT, extractor TEXT, size INTEGER)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS failing_hosts (host TEXT PRIMARY KEY, failed_at REAL, failures INTEGER, "
+            "error TEXT)"
+        )
+        self._db.commit()
+
+    def get(self, url):
+        """The stored entry as a dict (with 'fresh': bool), or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT fetched_at, status, etag, last_modified, html, text, extractor FROM pages WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            self._db.execute("UPDATE pages SET last_used = ? WHERE url = ?", (time.time(), url))
+            self._db.commit()
+        fetched_at, status, etag, last_modified, html, text, extractor = row
+        return {"url": url, "fetched_at": fetched_at, "status": status, "etag": etag,
+                "last_modified": last_modified, "html": html, "text": text, "extractor": extractor,
+                "fresh": time.time() - fetched_at < self.ttl_seconds}
+
+    def record_hit(self, kind):
+        """kind: "fresh_hits" (no request made) or "revalidated" (304)."""
+        with self._lock:
+            self.stats[kind] += 1
+        METRICS.inc("page_cache_hits_total", kind=kind)
+
+    def put(self, url, status, html="", text=None, etag=None, last_modified=None, extractor=None):
+        now = time.time()
+        size = len(html or "") + len(text or "")
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages (url, fetched_at, last_used, status, etag, last_modified, html, text, "
+                "extractor, size) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, now, now, status, etag, last_modified, html, text, extractor, size),
+            )
+            self.stats["stores"] += 1
+            self._evict()
+            self._db.commit()
+
+    def update_text(self, url, text, extractor):
+        """Re-extracted text for a stored page (the extractor changed, the HTML did not)."""
+        with self._lock:
+            self._db.execute("UPDATE pages SET text = ?, extractor = ? WHERE url = ?", (text, extractor, url))
+            self._db.commit()
+
+    def touch(self, url):
+        """A 304 answer: the stored copy is good for another TTL."""
+        with self._lock:
+            self._db.execute("UPDATE pages SET fetched_at = ?, last_used = ? WHERE url = ?",
+                             (time.time(), time.time(), url))
+            self._db.commit()
+
+    def _evict(self):
+        """Drops the least recently used pages until the stored bytes fit in 'max_bytes'."""
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        freed = 0
+        victims = []
+        for url, size in self._db.execute("SELECT url, size FROM pages ORDER BY last_used ASC"):
+            if total - freed <= self.max_bytes:
+                break
+            victims.append((url,))
+            freed += size or 0
+        self._db.executemany("DELETE FROM pages WHERE url = ?", victims)
+        self.stats["evictions"] += len(victims)
+
+    def mark_host_failed(self, host, error):
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO failing_hosts (host, failed_at, failures, error) VALUES (?, ?, 1, ?) "
+                "ON CONFLICT(host) DO UPDATE SET failed_at = excluded.failed_at, failures = failures + 1, "
+                "error = excluded.error",
+                (host, time.time(), str(error)[:500]),
+            )
+            self._db.commit()
+
+    def clear_host_failure(self, host):
+        with self._lock:
+            self._db.execute("DELETE FROM failing_hosts WHERE host = ?", (host,))
+            self._db.commit()
+
+    def host_is_failing(self, host):
+        """True while a recent failure of 'host' is inside the negative-cache window."""
+        with self._lock:
+            row = self._db.execute("SELECT failed_at FROM failing_hosts WHERE host = ?", (host,)).fetchone()
+            failing = row is not None and time.time() - row[0] < self.failure_ttl_seconds
+            if failing:
+                self.stats["host_skips"] += 1
+        if failing:
+            METRICS.inc("page_cache_host_skips_total")
+        return failing
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM pages")
+            self._db.execute("DELETE FROM failing_hosts")
+            self._db.commit()
@@ -0,0 +1,306 @@
+import hashlib
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+
+# PyMuPDF (fitz) and PIL are imported inside the functions that use them: together they
+# cost ~150 ms, which an app start or a cached-resume run should not pay.
+
+# Below this many characters the PDF is most likely an image scan
+MIN_TEXT_CHARS = 50
+
+# Words whose tops are this close (in points) are read as one line, like pdfplumber does
+LINE_TOLERANCE = 3
+
+# Long documents (portfolios, academic CVs) get their text extracted on a process pool.
+# Below the threshold, process start-up costs more than it saves.
+PARALLEL_PAGE_THRESHOLD = 16
+PAGES_PER_CHUNK = 8
+
+
+class ParsedResume:
+    """
+    Everything the pipeline needs from the PDF, produced by a single open:
+    - text: reading-order text, line by line across the page (the "ATS view")
+    - first_page_image: PIL raster of page 1 (72 dpi RGB), rendered on first access
+    - blocks: per-block layout [{"page", "bbox": (x0, y0, x1, y1), "text", "type"}]
+    - page_sizes: [(width, height)] per page
+    - page_words: PyMuPDF get_text("words") tuples per page (None for pages extracted on the pool)
+    The PyMuPDF document stays open for later renders and drawings (see open_document()).
+    """
+
+    def __init__(self, pdf_bytes, text, first_page_image, blocks, page_sizes, source_name=None, page_words=None,
+                 document=None):
+        self.pdf_bytes = pdf_bytes
+        self.text = text
+        self._first_page_image = first_page_image
+        self.blocks = blocks
+        self.page_sizes = page_sizes
+        self.source_name = source_name
+        self.page_words = page_words if page_words is not None else [None] * len(page_sizes)
+        self._document = document
+        self._document_lock = threading.Lock()
+
+    @contextmanager
+    def open_document(self):
+        """
+        The parsed PyMuPDF document (reopened from pdf_bytes if needed). PyMuPDF documents are
+        not thread-safe, so callers hold it exclusively for the 'with' block.
+        """
+        import fitz
+
+        with self._document_lock:
+            if self._document is None or self._document.is_closed:
+                self._document = fitz.open(stream=self.pdf_bytes, filetype="pdf")
+            yield self._document
+
+    @property
+    def first_page_image(self):
+        if self._first_page_image is None and self.page_sizes:
+            self._first_page_image = render_pages(self, max_pages=1)[0][0]
+        return self._first_page_image
+
+    @property
+    def page_count(self):
+        return len(self.page_sizes)
+
+    @property
+    def is_readable(self):
+        return len(self.text.strip()) >= MIN_TEXT_CHARS
+
+
+def _words_to_text(words):
+    """
+    Rebuilds text line by line across the full page width (sorted by top, then x).
+    This deliberately matches how simple ATS parsers read, so multi-column layouts
+    come out mixed exactly like they would for a real ATS.
+    """
+    lines = []
+    current = []
+    current_top = None
+    for word in sorted(words, key=lambda w: (round(w[1], 1), w[0])):
+        if current_top is not None and word[1] - current_top > LINE_TOLERANCE:
+            lines.append(current)
+            current = []
+        if not current:
+            current_top = word[1]
+        current.append(word)
+    if current:
+        lines.append(current)
+    return "\n".join(" ".join(w[4] for w in sorted(line, key=lambda w: w[0])) for line in lines)
+
+
+def _render_page(page, dpi=None, grayscale=False):
+    """
+    Renders straight from the pixmap samples (no PNG encode/decode round-trip).
+    dpi=None keeps PyMuPDF's default 72 dpi; 'grayscale' rasterizes to one channel directly.
+    """
+    import fitz
+    from PIL import Image
+
+    colorspace = fitz.csGRAY if grayscale else fitz.csRGB
+    pix = page.get_pixmap(dpi=dpi, colorspace=colorspace) if dpi else page.get_pixmap(colorspace=colorspace)
+    if grayscale:
+        mode = "LA" if pix.alpha else "L"
+    else:
+        mode = "RGBA" if pix.alpha else "RGB"
+    return Image.frombytes(mode, (pix.width, pix.height), pix.samples)
+
+
+def _read_bytes(source):
+    """Returns (pdf_bytes, source_name) for a path or bytes-like source."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source), None
+    with open(source, 'rb') as f:
+        return f.read(), source
+
+
+def _extract_page_range(pdf_bytes, start, stop):
+    """Process-pool worker: text of pages [start, stop)."""
+    import fitz
+
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        return [_words_to_text(doc[i].get_text("words")) for i in range(start, stop)]
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    """
+    One process pool for the whole app, created on first use. That first use is usually on a
+    worker thread (StageGraph, JobQueue, Streamlit), and forking a threaded process can copy a
+    held lock into the child, so workers are started by a fork server (spawned where there is none).
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _pool = ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=multiprocessing.get_context(method))
+        return _pool
+
+
+def _submit_page_chunks(pdf_bytes, page_count):
+    """Splits the pages into chunks and starts extracting them in parallel."""
+    pool = _get_pool()
+    return [
+        (start, pool.submit(_extract_page_range, pdf_bytes, start, min(start + PAGES_PER_CHUNK, page_count)))
+        for start in range(0, page_count, PAGES_PER_CHUNK)
+    ]
+
+
+def iter_page_texts(source):
+    """
+    Yields (page_no, text) in page order, each page as soon as it is ready.
+    Lets callers (censor check, prompt building) start before the last page is done.
+    """
+    import fitz
+
+    pdf_bytes, _ = _read_bytes(source)
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        page_count = doc.page_count
+        if page_count < PARALLEL_PAGE_THRESHOLD:
+            for page_no, page in enumerate(doc):
+                yield page_no, _words_to_text(page.get_text("words"))
+            return
+
+    chunks = _submit_page_chunks(pdf_bytes, page_count)
+    try:
+        for start, future in chunks:
+            for offset, page_text in enumerate(future.result()):
+                yield start + offset, page_text
+    finally:
+        # Consumer stopped early (e.g. enough text found): drop the chunks nobody needs
+        for _, future in chunks:
+            future.cancel()
+
+
+def _enough_text(page_texts, min_chars):
+    """Consumes page texts only until 'min_chars' of text were seen."""
+    seen = 0
+    for page_text in page_texts:
+        seen += len(page_text.strip())
+        if seen >= min_chars:
+            return True
+    return False
+
+
+def has_min_text(source, min_chars=MIN_TEXT_CHARS):
+    """Streaming censor check: stops reading as soon as 'min_chars' of text were seen."""
+    if isinstance(source, ParsedResume):
+        return len(source.text.strip()) >= min_chars
+    return _enough_text((page_text for _, page_text in iter_page_texts(source)), min_chars)
+
+
+def parse_resume(source, min_chars=None):
+    """
+    Opens a PDF once (from a path or raw bytes) and extracts text and layout. Nothing is
+    rendered here: the visual check renders its own compact pages (render_pages).
+    With 'min_chars', the open document first gets the streaming censor check (see has_min_text)
+    and None is returned for a PDF with less text, before any layout is extracted.
+    Raises on unreadable files; callers decide how to report that.
+    """
+    import fitz  # PyMuPDF: one library for text, layout and rendering
+
+    pdf_bytes, source_name = _read_bytes(source)
+
+    page_texts = []
+    page_words = []
+    blocks = []
+    page_sizes = []
+    censored_words = {}  # page_no -> words already read by the censor check
+
+    def censor_texts():
+        for page_no, page in enumerate(doc):
+            censored_words[page_no] = page.get_text("words")
+            yield _words_to_text(censored_words[page_no])
+
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        if min_chars is not None and not _enough_text(censor_texts(), min_chars):
+            doc.close()
+            return None
+
+        # Long documents: text runs on the pool while this process collects layout
+        chunks = _submit_page_chunks(pdf_bytes, doc.page_count) if doc.page_count >= PARALLEL_PAGE_THRESHOLD else None
+
+        for page_no, page in enumerate(doc):
+            page_sizes.append((page.rect.width, page.rect.height))
+            if chunks is None:
+                words = censored_words[page_no] if page_no in censored_words else page.get_text("words")
+                page_words.append(words)
+                page_texts.append(_words_to_text(words))
+            else:
+                page_words.append(None)
+            for x0, y0, x1, y1, block_text, _, block_type in page.get_text("blocks"):
+                blocks.append({
+                    "page": page_no,
+                    "bbox": (x0, y0, x1, y1),
+                    "text": block_text.strip(),
+                    "type": "image" if block_type == 1 else "text",
+                })
+
+        if chunks is not None:
+            page_texts = [page_text for _, future in chunks for page_text in future.result()]
+    except Exception:
+        doc.close()
+        raise
+
+    text = "\n".join(page_text for page_text in page_texts if page_text)
+    # The document is handed over, so renders and layout analysis don't reopen the file
+    return ParsedResume(pdf_bytes, text, None, blocks, page_sizes, source_name, page_words, document=doc)
+
+
+def render_pages(source, dpi=None, max_pages=None, grayscale=False):
+    """
+    PIL rasters of the first 'max_pages' pages (all of them when None), for a path, raw bytes
+    or ParsedResume (rendered from its already open document). Returns (images, total_page_count).
+    """
+    import fitz
+
+    if isinstance(source, ParsedResume):
+        opened = source.open_document()
+    else:
+        opened = fitz.open(stream=_read_bytes(source)[0], filetype="pdf")
+    with opened as doc:
+        count = doc.page_count if max_pages is None else min(max_pages, doc.page_count)
+        return [_render_page(doc[page_no], dpi, grayscale) for page_no in range(count)], doc.page_count
+
+
+# Small cache so read_pdf(), the visual check and repeated uploads share one parse of the same file
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_CACHE_SIZE = 8
+
+
+def load_resume(source, min_chars=None):
+    """
+    Returns a ParsedResume for a path, raw bytes / memoryview, or an existing ParsedResume.
+    Paths are cached by (path, mtime, size) and in-memory uploads by the sha256 of their
+    bytes, so repeated lookups (e.g. the same upload submitted again) don't re-parse.
+    With 'min_chars', returns None for a PDF with less text (see parse_resume).
+    """
+    if isinstance(source, ParsedResume):
+        return source if min_chars is None or has_min_text(source, min_chars) else None
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        key = ("sha256", hashlib.sha256(source).hexdigest())
+    else:
+        stat = os.stat(source)
+        key = (os.path.abspath(source), stat.st_mtime_ns, stat.st_size)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return load_resume(_cache[key], min_chars)
+
+    parsed = parse_resume(source, min_chars)
+    if parsed is None:
+        return None
+    with _cache_lock:
+        _cache[key] = parsed
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return parsed
@@ -0,0 +1,138 @@
+"""
+Single-pass PII redaction.
+
+All patterns live in one precompiled alternation, so a text is scanned once, left to
+right, whatever its size (linear time). Every hit is replaced by a numbered placeholder
+([EMAIL_1], [PHONE_1], ...); the same value always gets the same placeholder, and the
+span map lets the caller put the real values back into model output:
+
+    redaction = redact_pii(resume_text)
+    answer = ask_model(redaction.text)                  # model only ever sees placeholders
+    cover_letter = redaction.rehydrate(answer)          # contact details restored
+"""
+import re
+from collections import namedtuple
+
+# Order matters: earlier kinds win where patterns overlap (an email contains a domain,
+# a LinkedIn URL is also a URL, a 9-digit ID is also digits).
+PII_PATTERNS = [
+    # Every pattern is anchored at a token start (lookbehind / \b), so a long run of word
+    # characters is tried once rather than from every position (keeps the scan linear)
+    ("EMAIL", r"(?<![\w.+-])[\w.+-]+@[\w-]+(?:\.[\w-]+)*\.[A-Za-z]{2,}"),
+    ("LINKEDIN", r"(?<![\w./-])(?:https?://)?(?:[\w-]+\.)?linkedin\.com/(?:in|pub)/[\w%-]+/?"),
+    ("URL", r"(?:https?://|www\.)[^\s<>()\"']+[^\s<>()\"'.,;:!?]"
+            r"|\b(?:github\.com|gitlab\.com)/[\w.-]+(?:/[\w.-]+)?"),
+    # US SSN, UK National Insurance number, Israeli ID (9 digits, checked below)
+    ("ID", r"\b\d{3}-\d{2}-\d{4}\b|\b[A-CEGHJ-PR-TW-Z]{2}\s?\d{2}\s?\d{2}\s?\d{2}\s?[A-D]\b|\b\d{9}\b"),
+    ("PHONE", r"(?<![\w+])(?:(?:\+|00)\d{1,3}[\s.-]?)?(?:\(\d{1,4}\)[\s.-]?)?\d{2,4}(?:[\s.-]?\d{2,4}){1,4}(?![\w])"),
+    ("ADDRESS", r"\b\d{1,5}\s+(?:[A-Z][\w'.-]*\s+){1,4}"
+                r"(?:Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Lane|Ln|Drive|Dr|Way|Court|Ct|Place|Pl)\b\.?"
+                r"(?:,?\s+(?:Apt|Suite|Unit)\.?\s*\w+)?"
+                r"|(?:רחוב|רח['\u05f3]|שדרות|שד['\u05f3])\s*[\u0590-\u05ff\"' -]{2,30}?\s\d{1,4}"),
+]
+
+_PII_RE = re.compile("|".join(f"(?P<{kind}>{pattern})" for kind, pattern in PII_PATTERNS))
+_PHONE_RE = re.compile(dict(PII_PATTERNS)["PHONE"])
+_PLACEHOLDER_RE = re.compile(r"\[(?:%s)_\d+\]" % "|".join(kind for kind, _ in PII_PATTERNS))
+_NON_DIGITS_RE = re.compile(r"\D")
+_DIGIT_GROUPS_RE = re.compile(r"\d+")
+# A phone number is written like one: international prefix, leading 0, area code in
+# parentheses, groups joined by dashes / dots, NANP-style "415 555 0199" groups or one
+# bare run of 10+ digits. Other space-separated numbers ("1200 1500 2000 users") are metrics.
+_PHONE_SHAPE_RE = re.compile(r"^(?:\+|0)|\(|\d[.-]\d|^\d{3} \d{3} \d{4}$|^\d{10,}$")
+_YEAR_RE = re.compile(r"(?:19|20)\d\d")
+
+
+def _valid_israeli_id(digits):
+    """Teudat Zehut check digit (Luhn variant)."""
+    total = 0
+    for i, ch in enumerate(digits):
+        n = int(ch) * (1 + i % 2)
+        total += n - 9 if n > 9 else n
+    return total % 10 == 0
+
+
+def _is_pii(kind, value):
+    """Cheap checks on top of the regex to keep dates, years and plain numbers out."""
+    if kind == "PHONE":
+        # 9+ digits: rules out years / date ranges ("2015-2019") while keeping local numbers like 03-1234567
+        if not 9 <= len(_NON_DIGITS_RE.sub("", value)) <= 15 or not _PHONE_SHAPE_RE.search(value):
+            return False
+        # "2019-2020-2021" is a list of years, not a number
+        return not all(_YEAR_RE.fullmatch(group) for group in _DIGIT_GROUPS_RE.findall(value))
+    if kind == "ID" and value.isdigit():
+        return _valid_israeli_id(value)
+    return True
+
+
+PIISpan = namedtuple("PIISpan", "kind value placeholder start end")
+
+
+class Redaction:
+    """Redacted text, the span map (PIISpan per hit, original offsets) and placeholder -> value."""
+
+    def __init__(self, text, spans, mapping):
+        self.text = text
+        self.spans = spans
+        self.mapping = mapping
+        self._values_re = None
+        self._placeholders = None
+
+    def counts(self):
+        found = {}
+        for item in self.spans:
+            found[item.kind] = found.get(item.kind, 0) + 1
+        return found
+
+    def rehydrate(self, text):
+        """Puts the original values back wherever the model copied a placeholder."""
+        if not isinstance(text, str) or not self.mapping:
+            return text
+        return _PLACEHOLDER_RE.sub(lambda m: self.mapping.get(m.group(0), m.group(0)), text)
+
+    def redact_values(self, text):
+        """The reverse of rehydrate: replaces the original values found in 'text' with their placeholders."""
+        if not isinstance(text, str) or not self.mapping:
+            return text
+        if self._values_re is None:
+            by_value = {value: placeholder for placeholder, value in self.mapping.items()}
+            # Longest first, so a value that contains another is replaced whole
+            self._values_re = re.compile("|".join(re.escape(value) for value in sorted(by_value, key=len,
+                                                                                          reverse=True)))
+            self._placeholders = by_value
+        return self._values_re.sub(lambda m: self._placeholders[m.group(0)], text)
+
+
+def redact_pii(text):
+    """One scan over 'text'; returns a Redaction."""
+    pieces = []
+    spans = []
+    mapping = {}
+    by_value = {}
+    counters = {}
+    last = 0
+    for match in _PII_RE.finditer(text):
+        if match.start() < last:
+            continue  # Inside a phone number taken over from a failed ID match
+        kind = match.lastgroup
+        value = match.group(0)
+        if kind == "ID" and not _is_pii(kind, value):
+            # A 9-digit run that fails the ID checksum may still be a phone number ("036123456")
+            match = _PHONE_RE.match(text, match.start())
+            if match is None:
+                continue
+            kind, value = "PHONE", match.group(0)
+        if not _is_pii(kind, value):
+            continue
+        placeholder = by_value.get((kind, value))
+        if placeholder is None:
+            counters[kind] = counters.get(kind, 0) + 1
+            placeholder = f"[{kind}_{counters[kind]}]"
+            by_value[(kind, value)] = placeholder
+            mapping[placeholder] = value
+        pieces.append(text[last:match.start()])
+        pieces.append(placeholder)
+        spans.append(PIISpan(kind, value, placeholder, match.start(), match.end()))
+        last = match.end()
+    pieces.append(text[last:])
+    return Redaction("".join(pieces), spans, mapping)
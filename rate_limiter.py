@@ -0,0 +1,151 @@
+import random
+import re
+import threading
+import time
+
+from telemetry import METRICS
+from token_budget import estimate_tokens
+
+# HTTP codes worth retrying: quota window (429) and server-side hiccups (5xx)
+TRANSIENT_STATUS_CODES = {429, 500, 502, 503, 504}
+TRANSIENT_MARKERS = ("resource exhausted", "resourceexhausted", "service unavailable", "serviceunavailable",
+                     "deadline exceeded", "internal error")
+# Client errors without a 'code' still start their message with it: "429 Resource exhausted: ..."
+_LEADING_STATUS_RE = re.compile(r"^\s*(\d{3})\b")
+
+
+def error_status(e):
+    """HTTP status of a client error: its 'code', else a status at the start of its message (None if neither)."""
+    code = getattr(e, "code", None)
+    if isinstance(code, int):
+        return code
+    status = _LEADING_STATUS_RE.match(str(e))
+    return int(status.group(1)) if status else None
+
+
+def is_transient_error(e):
+    """True for errors that a short wait usually fixes (rate limit / 5xx)."""
+    status = error_status(e)
+    if status is not None:
+        return status in TRANSIENT_STATUS_CODES
+    message = f"{type(e).__name__} {e}".lower()
+    return any(marker in message for marker in TRANSIENT_MARKERS)
+
+
+class TokenBucket:
+    """Classic token bucket: holds up to 'capacity' tokens, refilled continuously."""
+
+    def __init__(self, capacity, refill_per_second, clock):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.clock = clock
+        self.tokens = capacity
+        self.updated_at = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_per_second)
+        self.updated_at = now
+
+    def wait_time(self, amount):
+        """Seconds until 'amount' tokens are available (0 if they are available now)."""
+        self._refill()
+        amount = min(amount, self.capacity)  # An oversize request waits for a full bucket, not forever
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.refill_per_second
+
+    def consume(self, amount):
+        # May go negative (oversize request / usage correction): later callers simply wait longer
+        self.tokens -= amount
+
+
+class RateLimiter:
+    """
+    Shared requests-per-minute + tokens-per-minute limiter.
+    Every thread that talks to the model goes through acquire(), so the whole
+    process stays under the quota ceiling instead of tripping 429s.
+    'clock' and 'sleep' are injectable so tests can use a FakeClock.
+    """
+
+    def __init__(self, requests_per_minute, tokens_per_minute, clock=time.monotonic, sleep=time.sleep):
+        self.clock = clock
+        self.sleep = sleep
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60.0, clock)
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60.0, clock)
+        self.stats = {"requests": 0, "throttled": 0, "waited_seconds": 0.0}
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """Blocks until one request and 'tokens' tokens fit in the current window."""
+        throttled = False
+        while True:
+            with self._lock:
+                wait = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+                if wait <= 0:
+                    self.requests.consume(1)
+                    self.tokens.consume(tokens)
+                    self.stats["requests"] += 1
+                    if throttled:
+                        self.stats["throttled"] += 1
+                        METRICS.inc("rate_limit_throttled_total")
+                    return
+                self.stats["waited_seconds"] += wait
+                METRICS.inc("rate_limit_wait_seconds_total", wait)
+            throttled = True
+            self.sleep(wait)
+
+    def record_usage(self, estimated_tokens, actual_tokens):
+        """Corrects the TPM bucket once the real token count of a call is known."""
+        if actual_tokens is None:
+            return
+        with self._lock:
+            self.tokens.consume(actual_tokens - estimated_tokens)
+
+
+class RateLimitedModel:
+    """
+    Wraps a model: every generate_content() waits for the shared limiter and
+    retries transient failures with jittered exponential backoff ("full jitter").
+    Non-transient errors, and transient ones that outlive 'max_retries', are re-raised.
+    """
+
+    def __init__(self, model, limiter, max_retries=5, base_delay=2.0, max_delay=60.0, rng=random.random):
+        self.model = model
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rng = rng
+        self.retries = 0
+
+    def backoff_delay(self, attempt):
+        """Random delay in [0, min(max_delay, base_delay * 2^attempt)]."""
+        return self.rng() * min(self.max_delay, self.base_delay * (2 ** attempt))
+
+    def generate_content(self, contents, **kwargs):
+        estimated = estimate_tokens(contents)
+        attempt = 0
+        while True:
+            self.limiter.acquire(estimated)
+            try:
+                response = self.model.generate_content(contents, **kwargs)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_transient_error(e):
+                    raise
+                delay = self.backoff_delay(attempt)
+                attempt += 1
+                self.retries += 1
+                METRICS.inc("model_retries_total")
+                print(f"⏳ Transient model error ({e}). Retry {attempt}/{self.max_retries} in {delay:.1f}s...")
+                self.limiter.sleep(delay)
+                continue
+
+            if not kwargs.get("stream"):
+                # A stream's usage is only known once it has been read; the estimate stands
+                usage = getattr(response, "usage_metadata", None)
+                self.limiter.record_usage(estimated, getattr(usage, "total_token_count", None))
+            return response
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
@@ -0,0 +1,93 @@
+"""
+Response schemas for structured output.
+
+The same dict is sent to Gemini as 'response_schema' (constrained decoding) and used to
+validate the parsed answer locally with jsonschema, so a malformed or truncated answer
+is caught before any report is written. Only the keywords both sides understand are used:
+type, properties, required, items, enum.
+"""
+EXPERIENCE_LEVELS = ["Entry-Level/Student", "Junior", "Mid-Level", "Senior"]
+
+INTERVIEW_ITEM_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "topic": {"type": "string"},
+        "type": {"type": "string", "enum": ["Theory", "LeetCode", "Scenario"]},
+        "proficiency_level": {"type": "string", "enum": ["MUST KNOW", "ADVANCED/BONUS"]},
+        "is_real": {"type": "boolean"},
+        "problem_name": {"type": "string"},
+        "verification_link": {"type": "string"},
+        "content": {"type": "string"},
+        "code_snippet": {"type": "string"},
+        "solution": {"type": "string"},
+        "complexity": {"type": "string"},
+    },
+    "required": ["topic", "type", "proficiency_level", "is_real", "problem_name", "verification_link", "content",
+                 "code_snippet", "solution", "complexity"],
+}
+
+# Everything one application needs, in one answer (see main.add_fused_stages)
+FUSED_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "resume_check": {
+            "type": "object",
+            "properties": {"is_resume": {"type": "boolean"}, "reason": {"type": "string"}},
+            "required": ["is_resume", "reason"],
+        },
+        "visual": {
+            "type": "object",
+            "properties": {
+                "layout_risk": {"type": "string", "enum": ["HIGH", "LOW"]},
+                "issue_detected": {"type": "string"},
+                "advice": {"type": "string"},
+            },
+            "required": ["layout_risk", "issue_detected", "advice"],
+        },
+        "ats": {
+            "type": "object",
+            "properties": {
+                "is_readable": {"type": "boolean"},
+                "score_1_to_10": {"type": "integer"},
+                "extracted_name": {"type": "string"},
+                "recommended_filename": {"type": "string"},
+                "critical_issues": {"type": "array", "items": {"type": "string"}},
+                "deduction_reasoning": {"type": "string"},
+            },
+            "required": ["is_readable", "score_1_to_10", "critical_issues", "deduction_reasoning"],
+        },
+        "profile": {
+            "type": "object",
+            "properties": {
+                "feedback": {"type": "string"},
+                "cover_letter": {"type": "string"},
+                "keywords": {"type": "array", "items": {"type": "string"}},
+                "experience_level": {"type": "string", "enum": EXPERIENCE_LEVELS},
+            },
+            "required": ["feedback", "cover_letter", "keywords", "experience_level"],
+        },
+        "interview_items": {"type": "array", "items": INTERVIEW_ITEM_SCHEMA},
+    },
+    "required": ["resume_check", "visual", "ats", "profile", "interview_items"],
+}
+
+
+class SchemaError(ValueError):
+    """The model answer parsed as JSON but does not match the schema."""
+
+
+def structured_output_config(schema):
+    """generate_content() kwargs asking for JSON constrained to 'schema'."""
+    return {"generation_config": {"response_mime_type": "application/json", "response_schema": schema}}
+
+
+def validate_response(data, schema):
+    """Returns 'data' if it matches 'schema', else raises SchemaError naming the first bad field."""
+    import jsonschema
+
+    try:
+        jsonschema.validate(data, schema)
+    except jsonschema.ValidationError as e:
+        location = "/".join(str(part) for part in e.absolute_path) or "<root>"
+        raise SchemaError(f"{location}: {e.message}") from None
+    return data
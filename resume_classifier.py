@@ -0,0 +1,113 @@
+"""
+Local, model-free "is this a resume?" check.
+
+Scores a text on four cheap signals, all matched with precompiled regexes:
+  1. Section headers on their own line ("Experience", "Education", "השכלה", ...)
+  2. Date ranges ("2019 - 2024", "Jan 2020 – Present")
+  3. Contact patterns (email, phone, LinkedIn/GitHub)
+  4. A small weighted n-gram table (resume phrases vs. JD / letter / invoice / article phrases)
+
+classify_resume_text() returns a verdict only when the score is clear-cut;
+ambiguous texts get None and the caller falls back to the LLM.
+"""
+import re
+
+# Only the head of the document is needed to recognise a resume
+MAX_CHARS = 3000
+
+# Score >= RESUME_THRESHOLD -> resume, score <= NOT_RESUME_THRESHOLD -> not a resume.
+# The negative side is stricter on purpose: wrongly rejecting a real CV blocks the user.
+RESUME_THRESHOLD = 6.0
+NOT_RESUME_THRESHOLD = 1.0
+
+SECTION_HEADERS = {
+    "experience": ("experience", "work experience", "professional experience", "employment",
+                   "employment history", "work history", "career history", "military service",
+                   "ניסיון", "ניסיון תעסוקתי", "ניסיון מקצועי", "שירות צבאי"),
+    "education": ("education", "academic background", "academic education", "השכלה"),
+    "skills": ("skills", "technical skills", "core skills", "key skills", "tech stack",
+               "technologies", "כישורים", "מיומנויות"),
+    "summary": ("summary", "professional summary", "profile", "about me", "objective", "תקציר", "פרופיל", "על עצמי"),
+    "projects": ("projects", "personal projects", "selected projects", "פרויקטים"),
+    "extras": ("certifications", "certificates", "languages", "volunteering", "awards", "publications",
+               "courses", "שפות", "התנדבות", "קורסים"),
+}
+_HEADER_LOOKUP = {phrase: category for category, phrases in SECTION_HEADERS.items() for phrase in phrases}
+_HEADER_RE = re.compile(
+    r'^[ \t•*#-]*(' + "|".join(sorted(map(re.escape, _HEADER_LOOKUP), key=len, reverse=True)) + r')\b[ \t:]*(?=$|[^\n]{0,30}$)',
+    re.IGNORECASE | re.MULTILINE,
+)
+
+_MONTH = r'(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?'
+_DATE = rf'(?:{_MONTH}\s*)?(?:\d{{1,2}}[/.])?(?:19|20)\d{{2}}'
+_DATE_RANGE_RE = re.compile(
+    rf'{_DATE}\s*(?:-|–|—|to|until|עד)\s*(?:{_DATE}|present|current|now|today|היום|כיום)',
+    re.IGNORECASE,
+)
+
+_CONTACT_PATTERNS = {
+    "email": re.compile(r'[\w.+-]+@[\w-]+\.[\w.-]+'),
+    "phone": re.compile(r'(?:\+?\d{1,3}[-.\s]?)?\(?\d{2,4}\)?[-.\s]?\d{3}[-.\s]?\d{3,4}'),
+    "profile": re.compile(r'linkedin\.com/|github\.com/|\blinkedin\b|\bgithub\b', re.IGNORECASE),
+}
+
+# Positive weights: typical resume phrasing. Negative: documents that get uploaded by mistake.
+NGRAM_WEIGHTS = {
+    "years of experience": 0.5, "responsible for": 0.5, "b.sc": 1.0, "bsc": 0.5, "m.sc": 1.0,
+    "bachelor": 1.0, "master's": 0.5, "gpa": 1.0, "graduated": 0.5, "intern": 0.5, "internship": 0.5,
+    "developed": 0.5, "led": 0.25, "managed": 0.25, "implemented": 0.5, "team lead": 0.5,
+    "references available": 1.0, "native": 0.25, "fluent": 0.5, "תואר": 1.0, "בוגר": 0.5,
+    # Job descriptions
+    "we are looking for": -3.0, "you will": -1.5, "requirements": -1.0, "responsibilities": -0.5,
+    "what we offer": -2.0, "apply now": -2.0, "benefits": -1.0, "the ideal candidate": -2.5,
+    "nice to have": -1.5, "about the role": -2.0, "join our team": -2.0, "about us": -1.0, "דרישות": -1.0,
+    # Letters
+    "dear hiring": -2.5, "dear sir": -2.0, "sincerely": -2.0, "best regards": -1.0, "i am writing": -2.0,
+    # Invoices / receipts
+    "invoice": -3.0, "subtotal": -3.0, "amount due": -3.0, "vat": -1.0, "receipt": -2.5, "payment terms": -2.5,
+    # Articles / papers / misc
+    "abstract": -2.0, "introduction": -1.0, "in this paper": -3.0, "references": -0.5, "chapter": -2.0,
+    "ingredients": -3.0, "preheat": -3.0, "terms and conditions": -3.0, "lorem ipsum": -3.0,
+}
+_NGRAM_RE = re.compile(
+    r'(?<!\w)(' + "|".join(sorted(map(re.escape, NGRAM_WEIGHTS), key=len, reverse=True)) + r')(?!\w)',
+    re.IGNORECASE,
+)
+
+
+def score_resume_text(text):
+    """Returns (score, signals) for the head of 'text'."""
+    head = text[:MAX_CHARS]
+
+    header_categories = {_HEADER_LOOKUP[m.group(1).lower()] for m in _HEADER_RE.finditer(head)}
+    date_ranges = len(_DATE_RANGE_RE.findall(head))
+    contacts = [name for name, pattern in _CONTACT_PATTERNS.items() if pattern.search(head)]
+    ngram_score = sum(NGRAM_WEIGHTS[m.group(1).lower()] for m in _NGRAM_RE.finditer(head))
+
+    score = (1.5 * min(len(header_categories), 4)
+             + 1.0 * min(date_ranges, 4)
+             + 1.0 * len(contacts)
+             + max(min(ngram_score, 3.0), -8.0))
+    signals = {
+        "sections": sorted(header_categories),
+        "date_ranges": date_ranges,
+        "contacts": contacts,
+        "ngram_score": round(ngram_score, 2),
+    }
+    return score, signals
+
+
+def classify_resume_text(text):
+    """
+    Returns (verdict, score, reason).
+    verdict is True/False when the local signals are decisive, None when ambiguous.
+    """
+    score, signals = score_resume_text(text)
+    summary = (f"{len(signals['sections'])} standard sections, {signals['date_ranges']} date ranges, "
+               f"contact: {', '.join(signals['contacts']) or 'none'}, phrase score {signals['ngram_score']}")
+
+    if score >= RESUME_THRESHOLD:
+        return True, score, f"Local check: looks like a resume ({summary})"
+    if score <= NOT_RESUME_THRESHOLD:
+        return False, score, f"Local check: no resume structure found ({summary})"
+    return None, score, f"Local check inconclusive ({summary})"
@@ -0,0 +1,148 @@
+"""
+Resume fingerprint store.
+
+The visual check and the Step 0 ATS audit only depend on the resume, so their results are
+kept on disk under a sha256 of the PDF bytes. Applying with the same file to another JD
+(web app or batch mode, even after a restart) reuses them instead of calling the model again:
+
+    record = store.get(fingerprint(pdf), version)   # None on a miss
+    store.put(fingerprint(pdf), version, {"sanitized": ..., "visual_report": ..., "ats": ...})
+
+'version' names the prompts (and model) that produced a record; a record written under
+another version is ignored on read and kept next to the new one (another process may use
+another model), so bumping main.RESUME_PROMPT_VERSION invalidates them all. Only the redacted resume text is kept,
+and records expire after 'max_age_seconds' (RESUME_STORE_DAYS, default 7).
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from pdf_ingest import ParsedResume
+from telemetry import METRICS
+
+RESUME_STORE_PATH = os.path.join(".cache", "resumes.sqlite")
+RECORD_FIELDS = ("sanitized", "visual_report", "ats")
+
+
+def fingerprint(source):
+    """sha256 of the PDF bytes, for a path, raw bytes or ParsedResume."""
+    if isinstance(source, ParsedResume):
+        data = source.pdf_bytes
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        data = source
+    else:
+        with open(source, 'rb') as f:
+            data = f.read()
+    return hashlib.sha256(data).hexdigest()
+
+
+class ResumeStore:
+    """
+    SQLite table of per-resume analysis records, trimmed to the 'max_entries' most recently used
+    and to records younger than 'max_age_seconds'.
+    """
+
+    def __init__(self, db_path, max_entries=1000, max_age_seconds=7 * 24 * 3600):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self.stats = {"hits": 0, "misses": 0, "stale": 0, "stores": 0, "evictions": 0, "expired": 0}
+        self._lock = threading.Lock()
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        # The first layout ('resumes') kept one record per resume whatever its version: it is only a cache
+        self._db.execute("DROP TABLE IF EXISTS resumes")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS resume_records ("
+            "fingerprint TEXT, version TEXT, created_at REAL, last_used REAL, record TEXT, "
+            "PRIMARY KEY (fingerprint, version))"
+        )
+        self._db.commit()
+        self.expire()
+
+    def get(self, key, version):
+        """The stored record dict, or None (unknown or expired resume, or written under another version)."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT record, created_at FROM resume_records WHERE fingerprint = ? AND version = ?", (key, version)
+            ).fetchone()
+            if row and time.time() - row[1] > self.max_age_seconds:
+                self._db.execute("DELETE FROM resume_records WHERE fingerprint = ? AND version = ?", (key, version))
+                self._db.commit()
+                self.stats["expired"] += 1
+                row = None
+            elif row is None and self._db.execute("SELECT 1 FROM resume_records WHERE fingerprint = ?",
+                                                  (key,)).fetchone():
+                # Only records of other versions (e.g. another model's): left in place for whoever uses them
+                self.stats["stale"] += 1
+            if row is None:
+                self.stats["misses"] += 1
+                METRICS.inc("resume_store_misses_total")
+                return None
+            self._db.execute("UPDATE resume_records SET last_used = ? WHERE fingerprint = ? AND version = ?",
+                             (time.time(), key, version))
+            self._db.commit()
+            self.stats["hits"] += 1
+        METRICS.inc("resume_store_hits_total")
+        return json.loads(row[0])
+
+    def put(self, key, version, record):
+        now = time.time()
+        payload = json.dumps({field: record.get(field) for field in RECORD_FIELDS}, ensure_ascii=False)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO resume_records (fingerprint, version, created_at, last_used, record) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, version, now, now, payload),
+            )
+            self.stats["stores"] += 1
+            overflow = self._db.execute("SELECT COUNT(*) FROM resume_records").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                cur = self._db.execute(
+                    "DELETE FROM resume_records WHERE rowid IN "
+                    "(SELECT rowid FROM resume_records ORDER BY last_used ASC LIMIT ?)",
+                    (overflow,),
+                )
+                self.stats["evictions"] += cur.rowcount
+            self._db.commit()
+
+    def expire(self):
+        """Drops records older than max_age_seconds. Returns the count."""
+        with self._lock:
+            cur = self._db.execute("DELETE FROM resume_records WHERE created_at < ?",
+                                   (time.time() - self.max_age_seconds,))
+            self._db.commit()
+            self.stats["expired"] += cur.rowcount
+            return cur.rowcount
+
+    def invalidate(self, version=None):
+        """Drops every record not written under 'version' (all of them when None). Returns the count."""
+        with self._lock:
+            if version is None:
+                cur = self._db.execute("DELETE FROM resume_records")
+            else:
+                cur = self._db.execute("DELETE FROM resume_records WHERE version != ?", (version,))
+            self._db.commit()
+            return cur.rowcount
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_resume_store():
+    """Process-wide ResumeStore, or None when RESUME_STORE=0 (every run re-checks the resume)."""
+    global _default_store
+    if os.getenv("RESUME_STORE", "1") == "0":
+        return None
+    with _default_store_lock:
+        if _default_store is None:
+            days = float(os.getenv("RESUME_STORE_DAYS", "7"))
+            _default_store = ResumeStore(RESUME_STORE_PATH, max_age_seconds=days * 24 * 3600)
+        return _default_store
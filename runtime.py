@@ -0,0 +1,72 @@
+"""
+Process-wide services for the pipeline, built on first use.
+
+Importing main (and so starting or rerunning the web app) constructs nothing: the rate
+limiter, the response cache (a SQLite file under cache_dir) and the model backend are
+created the first time a stage asks for them. Heavy third-party modules (google.generativeai,
+PyMuPDF, requests, jsonschema) are likewise imported inside the functions that use them.
+
+    runtime = RuntimeContext(".cache")
+    runtime.backend          # wrap(create_backend()) on first access, then reused
+    runtime.wrap(StubBackend())
+"""
+import os
+import threading
+
+from llm_backend import create_backend
+from llm_cache import CachedModel, ResponseCache
+from rate_limiter import RateLimitedModel, RateLimiter
+
+
+class RuntimeContext:
+    """Lazily built rate limiter, response cache and default backend, shared by every thread."""
+
+    def __init__(self, cache_dir=".cache", backend_factory=create_backend):
+        self.cache_dir = cache_dir
+        self.backend_factory = backend_factory
+        self._rate_limiter = None
+        self._response_cache = None
+        self._backend = None
+        self._lock = threading.RLock()
+
+    @property
+    def rate_limiter(self):
+        """Client-side quota guard (defaults = Flash free tier, override GEMINI_RPM / GEMINI_TPM in .env)."""
+        with self._lock:
+            if self._rate_limiter is None:
+                self._rate_limiter = RateLimiter(
+                    requests_per_minute=int(os.getenv("GEMINI_RPM", "15")),
+                    tokens_per_minute=int(os.getenv("GEMINI_TPM", "1000000")),
+                )
+            return self._rate_limiter
+
+    @property
+    def response_cache(self):
+        """Response cache so re-submitting the same resume/JD costs no quota."""
+        with self._lock:
+            if self._response_cache is None:
+                self._response_cache = ResponseCache(os.path.join(self.cache_dir, "llm_responses.sqlite"))
+            return self._response_cache
+
+    def wrap(self, backend):
+        """Puts the shared rate limiter and response cache in front of a raw backend."""
+        return CachedModel(RateLimitedModel(backend, self.rate_limiter), self.response_cache)
+
+    @property
+    def backend(self):
+        """The default backend (see llm_backend.create_backend), wrapped and built once."""
+        with self._lock:
+            if self._backend is None:
+                self._backend = self.wrap(self.backend_factory())
+            return self._backend
+
+    def is_built(self, name):
+        """True once the 'rate_limiter', 'response_cache' or 'backend' service exists."""
+        return getattr(self, f"_{name}") is not None
+
+    def reset(self):
+        """Drops every built service (e.g. after changing the environment); they are rebuilt on next use."""
+        with self._lock:
+            self._rate_limiter = None
+            self._response_cache = None
+            self._backend = None
@@ -0,0 +1,135 @@
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from telemetry import span
+
+
+class HaltPipeline(Exception):
+    """Raised by a stage to stop the whole run (e.g. not a resume, quota exhausted)."""
+
+
+class StageGraph:
+    """
+    Tiny dependency-graph executor for the pipeline stages.
+    Every stage declares the stages it needs; as soon as those are done it is
+    submitted to a thread pool, so independent Gemini calls overlap and the
+    run only takes as long as its critical path.
+    """
+
+    def __init__(self, max_workers=4, on_event=None, checkpoint=None, on_restore=None):
+        self.max_workers = max_workers
+        self.on_event = on_event  # Optional callback(stage_name, status, seconds) for progress UIs
+        # Optional checkpoints.RunCheckpoint: stages it holds a result for are not run again,
+        # every other stage's result (unless None) is saved to it as soon as the stage succeeds
+        self.checkpoint = checkpoint
+        self.on_restore = on_restore  # Optional callback(stage_name, result) for each restored stage
+        self._stages = {}  # name -> (func, depends_on), insertion order is topological
+        self.results = {}
+        self.errors = {}
+        self.skipped = []
+        self.restored = []
+        self.timings = {}
+        self.halted = None
+
+    def add_stage(self, name, func, depends_on=()):
+        """
+        Registers a stage. 'func' receives a dict {dependency_name: result}.
+        Dependencies must be added first, which also rules out cycles.
+        """
+        if name in self._stages:
+            raise ValueError(f"Stage '{name}' is already defined")
+        for dep in depends_on:
+            if dep not in self._stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dep}'")
+        self._stages[name] = (func, tuple(depends_on))
+
+    def _emit(self, name, status, seconds=None):
+        if self.on_event:
+            try:
+                self.on_event(name, status, seconds)
+            except Exception as e:
+                print(f"⚠️ Progress callback error: {e}")  # Never let the UI break the pipeline
+
+    def _timed(self, name, func, inputs):
+        start = time.perf_counter()
+        self._emit(name, "started")
+        status = "failed"
+        try:
+            with span(name, kind="stage"):
+                result = func(inputs)
+            status = "finished"
+            if self.checkpoint is not None and result is not None:
+                try:
+                    self.checkpoint.save(name, result)
+                except Exception as e:
+                    print(f"⚠️ Could not checkpoint stage '{name}': {e}")
+            return result
+        finally:
+            self.timings[name] = round(time.perf_counter() - start, 3)
+            self._emit(name, status, self.timings[name])
+
+    def _restore(self, name, result):
+        """Takes a stage's result from the checkpoint instead of running it."""
+        self.results[name] = result
+        self.restored.append(name)
+        self.timings[name] = 0.0
+        if self.on_restore:
+            try:
+                self.on_restore(name, result)
+            except Exception as e:
+                print(f"⚠️ Could not replay restored stage '{name}': {e}")
+        self._emit(name, "restored", 0.0)
+
+    def unfinished(self):
+        """Stages without a usable result after run(): failed, skipped, or returned None."""
+        return [name for name in self._stages
+                if name in self.errors or name in self.skipped or self.results.get(name) is None]
+
+    def run(self):
+        """Executes all stages and returns the results dict."""
+        start = time.perf_counter()
+        pending = dict(self._stages)
+        running = {}
+        saved = {}
+        if self.checkpoint is not None:
+            try:
+                saved = self.checkpoint.load()
+            except Exception as e:
+                print(f"⚠️ Could not load checkpoints: {e}")
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                for name, (func, deps) in list(pending.items()):
+                    if self.halted is not None or any(d in self.errors or d in self.skipped for d in deps):
+                        # A failed/skipped dependency means this stage can never run
+                        self.skipped.append(name)
+                        del pending[name]
+                    elif all(d in self.results for d in deps) and name in saved:
+                        # Insertion order is topological, so its dependents see the result in this same pass
+                        self._restore(name, saved[name])
+                        del pending[name]
+                    elif all(d in self.results for d in deps):
+                        inputs = {d: self.results[d] for d in deps}
+                        # Run in a copy of the caller's context, so spans land on the caller's trace
+                        context = contextvars.copy_context()
+                        running[pool.submit(context.run, self._timed, name, func, inputs)] = name
+                        del pending[name]
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        self.results[name] = future.result()
+                    except HaltPipeline as e:
+                        self.errors[name] = e
+                        if self.halted is None:
+                            self.halted = e
+                    except Exception as e:
+                        self.errors[name] = e
+
+        self.timings["total"] = round(time.perf_counter() - start, 3)
+        return self.results
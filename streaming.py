@@ -0,0 +1,137 @@
+"""
+Parsing of model responses.
+
+Step 1 / Step 2 answers are JSON; with stream=True the pipeline feeds every chunk
+into an IncrementalJSONParser and hands each completed top-level field (or array
+item) to the UI while the rest of the answer is still being generated.
+extract_json() is the one tolerant parser every stage uses on a complete answer.
+"""
+import json
+import re
+
+_decoder = json.JSONDecoder()
+
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL | re.IGNORECASE)
+_TRAILING_COMMA_RE = re.compile(r",(\s*[}\]])")
+# Document starts tried before giving up (each is one raw_decode, so a long prose answer stays cheap)
+MAX_JSON_STARTS = 4
+
+
+def _json_starts(text):
+    """Positions of the first few '{' / '[' in text order."""
+    starts = []
+    for match in re.finditer(r"[{\[]", text):
+        starts.append(match.start())
+        if len(starts) == MAX_JSON_STARTS:
+            break
+    return starts
+
+
+def extract_json(text):
+    """
+    The JSON document inside a model answer, tolerating what models wrap around it:
+    ```json fences, an intro sentence, trailing text after the document, trailing commas.
+    Raises json.JSONDecodeError when there is no complete document (e.g. a truncated answer).
+    """
+    text = (text or "").strip()
+    candidates = [text]
+    fenced = _FENCE_RE.search(text)
+    if fenced:
+        candidates.insert(0, fenced.group(1).strip())
+
+    first_error = None
+    for candidate in candidates:
+        for start in _json_starts(candidate):
+            document = candidate[start:]
+            for attempt in (document, _TRAILING_COMMA_RE.sub(r"\1", document)):
+                try:
+                    return _decoder.raw_decode(attempt)[0]
+                except json.JSONDecodeError as e:
+                    first_error = first_error or e
+    raise first_error or json.JSONDecodeError("No JSON document found", text, 0)
+
+
+class IncrementalJSONParser:
+    """
+    Consumes a model response chunk by chunk and reports each top-level member
+    as soon as it is complete, long before the whole JSON document has arrived:
+      - root object: (key, value) for every field
+      - root array:  (index, item) for every element
+    Anything before the first '{' or '[' (prose, ```json fences) is skipped.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.done = False
+        self._pos = 0
+        self._root = None  # '{' or '['
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = None
+        self._index = 0
+
+    def feed(self, chunk):
+        """Adds a chunk; returns the list of members completed by it."""
+        self.text += chunk
+        events = []
+        text = self.text
+        while self._pos < len(text) and not self.done:
+            ch = text[self._pos]
+            position = self._pos
+            self._pos += 1
+
+            if self._root is None:
+                if ch in '{[':
+                    self._root = ch
+                    self._depth = 1
+                    self._member_start = self._pos
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in '{[':
+                self._depth += 1
+            elif ch in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    self._close_member(position, events)
+                    self.done = True
+            elif ch == ',' and self._depth == 1:
+                self._close_member(position, events)
+                self._member_start = self._pos
+        return events
+
+    def _close_member(self, end, events):
+        segment = self.text[self._member_start:end].strip()
+        if not segment:
+            return
+        try:
+            if self._root == '[':
+                events.append((self._index, json.loads(segment)))
+                self._index += 1
+            else:
+                key, offset = _decoder.raw_decode(segment)
+                rest = segment[offset:].lstrip()
+                if rest.startswith(':'):
+                    events.append((key, json.loads(rest[1:])))
+        except json.JSONDecodeError:
+            # Malformed member: skip it here, the final full parse reports the error
+            pass
+
+
+def chunk_text(chunk):
+    """Text of one streamed chunk ('' for chunks without text, e.g. safety/finish metadata)."""
+    try:
+        return chunk.text or ""
+    except (ValueError, AttributeError):
+        return ""
@@ -0,0 +1,242 @@
+"""
+Tracing and metrics for the pipeline.
+
+    with start_trace(run_id) as trace:        # one per process_application() run
+        with span("read_pdf", pages=2):        # nested spans get a 'parent'
+            ...
+    METRICS.inc("model_calls_total", stage="profile")
+
+Spans are collected on the run's Trace (carried by a contextvar, so StageGraph worker
+threads report into the right run) and also feed the process-wide METRICS registry.
+
+Export:
+    TELEMETRY_FILE=traces.jsonl   one JSON line per finished run (trace + metrics snapshot)
+    METRICS_FILE=metrics.prom     Prometheus text format, rewritten after every run
+    METRICS_PORT=9464             serve the same text on http://localhost:9464/metrics
+"""
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from artifacts import atomic_write
+
+
+class MetricsRegistry:
+    """Thread-safe counters and duration summaries, keyed by (name, labels)."""
+
+    def __init__(self):
+        self.counters = {}
+        self.summaries = {}  # key -> {"count", "sum", "max"} in seconds
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            entry = self.summaries.setdefault(key, {"count": 0, "sum": 0.0, "max": 0.0})
+            entry["count"] += 1
+            entry["sum"] += seconds
+            entry["max"] = max(entry["max"], seconds)
+
+    def get(self, name, **labels):
+        with self._lock:
+            return self.counters.get(self._key(name, labels), 0)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.summaries.clear()
+
+    def snapshot(self):
+        """Plain-dict copy: {"counters": {...}, "summaries": {...}} with 'name{label="v"}' keys."""
+        with self._lock:
+            return {
+                "counters": {_series(name, labels): value for (name, labels), value in self.counters.items()},
+                "summaries": {_series(name, labels): dict(entry) for (name, labels), entry in self.summaries.items()},
+            }
+
+    def to_prometheus(self):
+        """Prometheus text exposition format (counters + summaries as _count/_sum)."""
+        lines = []
+        with self._lock:
+            for name in sorted({name for name, _ in self.counters}):
+                lines.append(f"# TYPE {name} counter")
+                for (series_name, labels), value in sorted(self.counters.items()):
+                    if series_name == name:
+                        lines.append(f"{_series(name, labels)} {value}")
+            for name in sorted({name for name, _ in self.summaries}):
+                lines.append(f"# TYPE {name} summary")
+                for (series_name, labels), entry in sorted(self.summaries.items()):
+                    if series_name == name:
+                        lines.append(f"{_series(name + '_count', labels)} {entry['count']}")
+                        lines.append(f"{_series(name + '_sum', labels)} {entry['sum']:.6f}")
+        return "\n".join(lines) + "\n"
+
+
+def _series(name, labels):
+    if not labels:
+        return name
+    rendered = ",".join(f'{key}="{value}"' for key, value in labels)
+    return f"{name}{{{rendered}}}"
+
+
+METRICS = MetricsRegistry()
+
+
+class Trace:
+    """All spans of one pipeline run."""
+
+    def __init__(self, run_id=None):
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.started_at = time.time()
+        self._origin = time.perf_counter()
+        self.spans = []
+        self._lock = threading.Lock()
+        self._next_id = 0
+
+    def _new_span_id(self):
+        with self._lock:
+            self._next_id += 1
+            return self._next_id
+
+    def add(self, record):
+        with self._lock:
+            self.spans.append(record)
+
+    def to_dict(self):
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s["start"])
+        return {"run_id": self.run_id, "started_at": self.started_at, "spans": spans}
+
+    def breakdown(self):
+        """[{"span", "seconds", "calls"}] summed per span name, slowest first (for the UI)."""
+        totals = {}
+        with self._lock:
+            for record in self.spans:
+                entry = totals.setdefault(record["name"], {"span": record["name"], "seconds": 0.0, "calls": 0})
+                entry["seconds"] += record["duration"]
+                entry["calls"] += 1
+        for entry in totals.values():
+            entry["seconds"] = round(entry["seconds"], 3)
+        return sorted(totals.values(), key=lambda e: e["seconds"], reverse=True)
+
+
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+@contextmanager
+def start_trace(run_id=None):
+    """Makes a new Trace current for this block; exports it when the block ends."""
+    trace = Trace(run_id)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        export(trace)
+
+
+@contextmanager
+def span(name, **attrs):
+    """
+    Times a block. Recorded on the current Trace (if any) and as the
+    'span_seconds{span=...}' summary; exceptions mark the span as failed and propagate.
+    """
+    trace = _current_trace.get()
+    span_id = trace._new_span_id() if trace else None
+    token = _current_span.set(span_id)
+    start = time.perf_counter()
+    status = "error"
+    try:
+        yield
+        status = "ok"
+    finally:
+        duration = time.perf_counter() - start
+        _current_span.reset(token)
+        METRICS.observe("span_seconds", duration, span=name)
+        if status == "error":
+            METRICS.inc("span_errors_total", span=name)
+        if trace is not None:
+            trace.add({"id": span_id, "parent": _current_span.get(), "name": name,
+                       "start": round(start - trace._origin, 6), "duration": round(duration, 6),
+                       "status": status, "attrs": attrs})
+
+
+def traced(name=None):
+    """Decorator form of span(): @traced() uses the function name."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name or func.__name__):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def export(trace):
+    """Writes the finished trace / metrics to the files configured in the environment."""
+    try:
+        trace_file = os.getenv("TELEMETRY_FILE")
+        if trace_file:
+            record = trace.to_dict()
+            record["metrics"] = METRICS.snapshot()["counters"]
+            with open(trace_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        metrics_file = os.getenv("METRICS_FILE")
+        if metrics_file:
+            atomic_write(metrics_file, METRICS.to_prometheus())
+    except Exception as e:
+        print(f"⚠️ Could not export telemetry: {e}")  # Never let metrics break a run
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = METRICS.to_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes every few seconds would flood the console
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def serve_metrics(port=None):
+    """Starts (once per process) a background /metrics endpoint. Returns the server or None."""
+    global _server
+    port = port or os.getenv("METRICS_PORT")
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer(("127.0.0.1", int(port)), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+            print(f"📈 Metrics on http://127.0.0.1:{port}/metrics")
+        return _server
@@ -0,0 +1,11 @@
+"""
+Offline test suite: no API key, network or real waiting (see fakes.py).
+
+    python -m pytest -q
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("COMPANY_RESEARCH", "0")
+os.environ.setdefault("LLM_BACKEND", "stub")
@@ -0,0 +1,44 @@
+import pytest
+
+from pii import redact_pii
+
+
+@pytest.mark.parametrize("text", [
+    "dana.levi@example.com",
+    "+972 54-123-4567",
+    "+1 (415) 555-0199",
+    "415 555 0199",
+    "4155550199",
+    "036123456",
+    "123-45-6789",
+    "linkedin.com/in/dana-levi",
+])
+def test_contact_details_are_redacted(text):
+    redaction = redact_pii(f"Contact: {text} (preferred)")
+    assert text not in redaction.text
+    assert redaction.spans
+
+
+@pytest.mark.parametrize("text", [
+    "2015-2019",
+    "2019 2020 2021",
+    "2019-2020-2021",
+    "served 1200 1500 2000 users",
+    "revenue 123456789",
+])
+def test_years_and_metrics_are_kept(text):
+    assert redact_pii(text).text == text
+
+
+def test_same_value_gets_the_same_placeholder():
+    redaction = redact_pii("a@example.com, b@example.com, a@example.com")
+    assert redaction.text == "[EMAIL_1], [EMAIL_2], [EMAIL_1]"
+
+
+def test_rehydrate_and_redact_values_round_trip():
+    redaction = redact_pii("Dana Levi\ndana.levi@example.com | 415 555 0199")
+    answer = "Sincerely,\nDana Levi\n[EMAIL_1] | [PHONE_1]"
+    letter = redaction.rehydrate(answer)
+    assert letter == "Sincerely,\nDana Levi\ndana.levi@example.com | 415 555 0199"
+    assert redaction.redact_values(letter) == answer
+    assert redaction.rehydrate("[EMAIL_9] stays") == "[EMAIL_9] stays"
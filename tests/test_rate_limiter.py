@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+import main
+from fakes import FakeClock, FakeModel
+from llm_backend import StubAPIError
+from rate_limiter import RateLimitedModel, RateLimiter, error_status, is_transient_error
+
+
+def _json_error(position):
+    try:
+        json.loads("{" + " " * (position - 1) + "x")
+    except ValueError as e:
+        return e
+
+
+def make_model(script, max_retries=5, rpm=60, tpm=1_000_000):
+    clock = FakeClock()
+    limiter = RateLimiter(requests_per_minute=rpm, tokens_per_minute=tpm, clock=clock, sleep=clock.sleep)
+    model = FakeModel(script)
+    return RateLimitedModel(model, limiter, max_retries=max_retries, rng=lambda: 1.0), model, clock
+
+
+@pytest.mark.parametrize("error, status", [
+    (StubAPIError(429), 429),
+    (Exception("503 Service unavailable"), 503),
+    (Exception("Prompt is 500 tokens over the limit"), None),
+    (Exception("Invalid model name gemini-1.5-flash-503"), None),
+])
+def test_error_status(error, status):
+    assert error_status(error) == status
+
+
+@pytest.mark.parametrize("error, transient", [
+    (StubAPIError(429), True),
+    (StubAPIError(504), True),
+    (StubAPIError(400), False),
+    (Exception("429 Resource exhausted: quota exceeded"), True),
+    (Exception("Service Unavailable, try again later"), True),
+    (Exception("400 Request payload is 5000 bytes over the limit"), False),
+    (ValueError("Prompt is 500 tokens over the limit"), False),
+])
+def test_is_transient_error(error, transient):
+    assert is_transient_error(error) is transient
+
+
+def test_quota_error_needs_a_429_status():
+    assert main._is_quota_error(StubAPIError(429))
+    assert main._is_quota_error(Exception("429 Resource exhausted"))
+    assert not main._is_quota_error(StubAPIError(503))
+    error = _json_error(429)
+    assert "429" in str(error)
+    assert not main._is_quota_error(error)
+
+
+def test_transient_errors_are_retried_with_backoff():
+    wrapped, model, clock = make_model([StubAPIError(429), StubAPIError(503), "{}"])
+    assert wrapped.generate_content("hi").text == "{}"
+    assert len(model.calls) == 3
+    assert wrapped.retries == 2
+    assert clock.sleeps == [2.0, 4.0]
+
+
+def test_other_errors_are_raised_at_once():
+    wrapped, model, _ = make_model([ValueError("bad request"), "{}"])
+    with pytest.raises(ValueError):
+        wrapped.generate_content("hi")
+    assert len(model.calls) == 1
+
+
+def test_retries_stop_after_max_retries():
+    wrapped, model, _ = make_model([StubAPIError(429)] * 5, max_retries=2)
+    with pytest.raises(StubAPIError):
+        wrapped.generate_content("hi")
+    assert len(model.calls) == 3
+
+
+def test_limiter_keeps_requests_under_the_rpm():
+    wrapped, _, clock = make_model(None, rpm=10)
+    sent_at = []
+    for _ in range(30):
+        wrapped.generate_content("hi")
+        sent_at.append(clock())
+    # The first 10 go out at once (full bucket), then one every 6 s
+    assert sent_at[9] == 0.0
+    assert sent_at[10] == pytest.approx(6.0)
+    assert sent_at[-1] == pytest.approx(120.0)
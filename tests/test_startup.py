@@ -0,0 +1,15 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_import_main_loads_no_heavy_modules():
+    # The check from benchmarks/bench_startup.py, in fresh interpreters. The import-time budget is
+    # generous here (shared CI machines are slow); the heavy-module check is the one that matters.
+    result = subprocess.run([sys.executable, os.path.join(ROOT, "benchmarks", "bench_startup.py"),
+                             "--check", "--runs", "1", "--no-app", "--max-ms", "5000"],
+                            cwd=ROOT, capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "heavy modules loaded by 'import main': none" in result.stdout
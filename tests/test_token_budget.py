@@ -0,0 +1,33 @@
+from token_budget import estimate_text_tokens, fit_to_budget
+
+LINE = "Backend developer: built REST APIs in Python, Django and PostgreSQL."
+
+
+def test_text_within_budget_is_unchanged():
+    text = "\n".join([LINE] * 3)
+    assert fit_to_budget(text, 1000) == text
+
+
+def test_whole_lines_are_kept_from_the_top():
+    text = "\n".join(f"{LINE} ({i})" for i in range(100))
+    result = fit_to_budget(text, 200)
+    kept = result.split("\n")[:-1]
+    assert result.endswith("\n... (truncated)")
+    assert kept == text.split("\n")[:len(kept)]
+    assert estimate_text_tokens("\n".join(kept)) <= 200
+
+
+def test_one_long_line_is_cut_at_a_word_boundary():
+    text = " ".join(f"Requirement{i} experience with Python, SQL and distributed systems." for i in range(700))
+    result = fit_to_budget(text, 2000)
+    head = result[:-len("\n... (truncated)")]
+    assert result.endswith("\n... (truncated)")
+    assert head and text.startswith(head)
+    assert text[len(head)] == " "
+    assert 1900 <= estimate_text_tokens(head) <= 2000
+
+
+def test_blank_first_lines_dont_hide_a_long_line():
+    text = "\n\n" + " ".join(["word"] * 500)
+    head = fit_to_budget(text, 50)[:-len("\n... (truncated)")]
+    assert "word" in head
@@ -0,0 +1,91 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from page_cache import PageCache
+from web_research import CompanyResearcher, HttpPool, fetch_page_text
+
+JOB_DESCRIPTION = "About Acme\nAcme is hiring a backend developer to build our Python platform."
+ABOUT_HTML = ("<html><body><main><h1>About Acme</h1>"
+              "<p>Acme was founded in 2012 and builds a logistics platform for 3 million users.</p>"
+              "</main></body></html>")
+SLOW_SECONDS = 0.8
+
+
+class StandInSite(BaseHTTPRequestHandler):
+    """Local stand-in for a company site: /about answers at once, /slow late, anything else is a 404."""
+
+    requests_seen = []
+
+    def do_GET(self):
+        self.requests_seen.append(self.path)
+        if self.path == "/slow":
+            time.sleep(SLOW_SECONDS)
+        if self.path not in ("/about", "/slow"):
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = ABOUT_HTML.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def site():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInSite)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return PageCache(str(tmp_path / "pages.sqlite"))
+
+
+def search_for(site, paths, delay=0.0):
+    def search(query, max_results):
+        time.sleep(delay)
+        return [{"href": site + path} for path in paths][:max_results]
+    return search
+
+
+def test_fetched_pages_are_cached(site, cache):
+    StandInSite.requests_seen.clear()
+    pool = HttpPool()
+    assert "logistics platform" in fetch_page_text(site + "/about", pool, cache)
+    assert "logistics platform" in fetch_page_text(site + "/about", pool, cache)
+    assert fetch_page_text(site + "/missing", pool, cache) is None
+    assert StandInSite.requests_seen == ["/about", "/missing"]
+
+
+def test_searches_and_fetches_share_one_deadline(site, cache):
+    # The searches use most of the budget, so the slow page can't make it; the fast one still can
+    researcher = CompanyResearcher(search=search_for(site, ["/about", "/slow"], delay=0.6), pool=HttpPool(),
+                                   cache=cache, deadline=1.0)
+    start = time.perf_counter()
+    context = researcher.research(JOB_DESCRIPTION)
+    assert time.perf_counter() - start < 1.0 + 0.3
+    assert "logistics platform" in context
+
+
+def test_worker_threads_are_reused_between_runs(cache):
+    threads = set()
+
+    def search(query, max_results):
+        threads.add(threading.get_ident())
+        return []
+
+    researcher = CompanyResearcher(search=search, cache=cache, max_workers=2)
+    for i in range(3):
+        researcher.research(f"About Acme{i}\nAcme{i} is hiring.")
+    assert len(threads) <= 2
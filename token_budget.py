@@ -0,0 +1,181 @@
+"""
+Local token estimation and prompt compaction.
+
+Each prompt section gets a per-stage token budget (STAGE_BUDGETS). Text is first
+compacted (whitespace, duplicate lines, job-board boilerplate) and only then cut,
+on a line boundary (a word boundary for one overlong line), if it still doesn't fit.
+UsageLog records estimated vs. actual token counts per stage so the budgets can be tuned.
+"""
+import re
+import threading
+
+# Token budgets for the variable part of each prompt (resume / JD text), tune freely.
+STAGE_BUDGETS = {
+    "validate": 300,        # Was a fixed 1000-char cut
+    "visual": 450,          # Was a fixed 1500-char cut
+    "ats": 1000,            # Was a fixed 3000-char cut
+    "profile_resume": 3000,
+    "profile_jd": 2000,
+}
+
+# Gemini bills an image up to 384x384 as 258 tokens; larger ones are cut into
+# 768x768 tiles of 258 tokens each. Unknown sizes count as one tile.
+IMAGE_TOKEN_ESTIMATE = 258
+IMAGE_TILE_SIZE = 768
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+_TOKEN_PIECE_RE = re.compile(r'\w+|[^\w\s]', re.UNICODE)
+
+# Lines that carry no signal for the model (mostly from scraped / pasted job posts)
+_BOILERPLATE_RE = re.compile(
+    r'equal opportunity|reasonable accommodation|without regard to (race|religion)|'
+    r'privacy (policy|notice)|cookie|all rights reserved|share this job|apply now|'
+    r'click here to apply|report this job|sign in to|©',
+    re.IGNORECASE,
+)
+_SPACES_RE = re.compile(r'[ \t\u00a0]+')
+_WORD_RE = re.compile(r'\S+')
+_BLANK_LINES_RE = re.compile(r'\n{3,}')
+
+
+def estimate_text_tokens(text):
+    """
+    Fast local estimate of Gemini tokens.
+    ASCII words cost ~1 token per 6 chars (at least 1), punctuation 1,
+    non-Latin words (e.g. Hebrew) ~1 token per 2.5 chars.
+    """
+    total = 0
+    for piece in _TOKEN_PIECE_RE.findall(text):
+        if piece.isascii():
+            total += 1 + len(piece) // 6
+        else:
+            total += max(1, round(len(piece) / 2.5))
+    return total
+
+
+def image_tokens(width, height):
+    """Gemini's token count for one image of this size."""
+    if width <= 384 and height <= 384:
+        return IMAGE_TOKEN_ESTIMATE
+    return -(-width // IMAGE_TILE_SIZE) * -(-height // IMAGE_TILE_SIZE) * IMAGE_TOKEN_ESTIMATE
+
+
+def _image_size(part):
+    """(width, height) of a PIL image or an inline PNG / lossless WebP blob, else None."""
+    if hasattr(part, "size") and hasattr(part, "mode"):
+        return part.size
+    if isinstance(part, dict):
+        data = part.get("data") or b""
+        if data[:8] == _PNG_SIGNATURE:
+            return int.from_bytes(data[16:20], "big"), int.from_bytes(data[20:24], "big")
+        if data[:4] == b"RIFF" and data[12:16] == b"VP8L":
+            # 14 bits each of width-1 and height-1, right after the 0x2f signature byte
+            bits = int.from_bytes(data[21:25], "little")
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    return None
+
+
+def estimate_tokens(contents):
+    """Estimate for a full generate_content() payload (text and/or images)."""
+    parts = contents if isinstance(contents, (list, tuple)) else [contents]
+    total = 0
+    for part in parts:
+        if isinstance(part, str):
+            total += estimate_text_tokens(part)
+        else:
+            size = _image_size(part)
+            total += image_tokens(*size) if size else IMAGE_TOKEN_ESTIMATE
+    return total
+
+
+def compact_text(text, aggressive=True):
+    """
+    Collapses whitespace, keeping line order. 'aggressive' also drops repeated lines
+    and boilerplate: use it for JDs, not for resume text that is evidence of parsing
+    quality (a repeated header/footer line IS the finding).
+    """
+    seen = set()
+    kept = []
+    for line in text.splitlines():
+        line = _SPACES_RE.sub(' ', line).strip()
+        if not line:
+            if kept and kept[-1] != "":
+                kept.append("")
+            continue
+        key = line.lower()
+        if aggressive:
+            if key in seen or _BOILERPLATE_RE.search(line):
+                continue
+            seen.add(key)
+        kept.append(line)
+    return _BLANK_LINES_RE.sub("\n\n", "\n".join(kept)).strip()
+
+
+def _cut_line(line, max_tokens):
+    """The longest start of 'line' that ends at a word boundary and fits in max_tokens."""
+    used = 0
+    end = 0
+    for word in _WORD_RE.finditer(line):
+        used += estimate_text_tokens(word.group(0))  # Token pieces never span whitespace
+        if used > max_tokens:
+            break
+        end = word.end()
+    return line[:end]
+
+
+def fit_to_budget(text, max_tokens):
+    """
+    Keeps whole lines from the top until the budget is used up. If not even the first
+    line fits (e.g. a JD pasted as one long line), that line is cut at a word boundary.
+    """
+    if estimate_text_tokens(text) <= max_tokens:
+        return text
+    kept = []
+    used = 0
+    for line in text.splitlines():
+        cost = estimate_text_tokens(line) + 1
+        if used + cost > max_tokens:
+            if not any(kept):
+                kept.append(_cut_line(line, max_tokens - used - 1))
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept) + "\n... (truncated)"
+
+
+def prepare_section(text, stage, aggressive=False):
+    """compact_text + fit_to_budget with the stage's configured budget."""
+    return fit_to_budget(compact_text(text, aggressive), STAGE_BUDGETS[stage])
+
+
+class UsageLog:
+    """Per-stage estimated vs. actual token counts (actual = response.usage_metadata)."""
+
+    def __init__(self):
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage, estimated, actual_prompt=None, actual_output=None):
+        with self._lock:
+            entry = self.stages.setdefault(stage, {"calls": 0, "estimated": 0, "measured_calls": 0,
+                                                   "measured_estimated": 0, "actual_prompt": 0, "actual_output": 0})
+            entry["calls"] += 1
+            entry["estimated"] += estimated
+            if actual_prompt is not None:
+                entry["measured_calls"] += 1
+                entry["measured_estimated"] += estimated
+                entry["actual_prompt"] += actual_prompt
+                entry["actual_output"] += actual_output or 0
+
+        actual = f"{actual_prompt} actual" if actual_prompt is not None else "no usage data (cached?)"
+        print(f"📏 [{stage}] prompt ~{estimated} tokens estimated / {actual}")
+
+    def summary(self):
+        """{stage: {..., "ratio": actual/estimated}} over the calls that reported usage."""
+        with self._lock:
+            report = {}
+            for stage, entry in self.stages.items():
+                report[stage] = dict(entry)
+                if entry["measured_estimated"]:
+                    report[stage]["ratio"] = round(entry["actual_prompt"] / entry["measured_estimated"], 2)
+            return report
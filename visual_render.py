@@ -0,0 +1,252 @@
+"""
+Compact page images for the visual ATS check.
+
+The layout judgment (columns, tables, skill bars, headers/footers) doesn't need a full-color
+72 dpi raster of page 1 only. render_for_visual() rasterizes the first pages at a lower DPI,
+reduces them to grayscale or a small palette, tiles several pages side by side into one
+image and encodes the result, so the request carries a known number of bytes:
+
+    rendered = render_for_visual(parsed_resume)
+    contents = [prompt, *rendered.parts]   # inline {"mime_type": "image/webp", "data": ...} blobs
+    print(rendered.describe())             # "2 of 3 pages in 1 image(s), 41.2 KB, ~516 image tokens"
+
+Each page also gets a perceptual hash (dHash). VisualVerdictCache keeps verdicts under that
+hash, so a near-identical revision of a resume (a changed date, a reworded bullet) reuses
+the previous verdict instead of another vision call.
+
+Settings (env): VISUAL_DPI, VISUAL_COLOR (gray | palette | rgb), VISUAL_MAX_PAGES,
+VISUAL_PAGES_PER_IMAGE, VISUAL_HASH_DISTANCE, VISUAL_CACHE=0 to disable the verdict cache.
+"""
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from pdf_ingest import render_pages
+from telemetry import METRICS
+from token_budget import image_tokens
+
+# 64 dpi keeps a Letter or A4 page inside one 768x768 Gemini tile (the text stays legible)
+VISUAL_DPI = 64
+COLOR_MODES = ("gray", "palette", "rgb")
+PALETTE_COLORS = 16
+VISUAL_MAX_PAGES = 2
+PAGES_PER_IMAGE = 2
+TILE_GAP = 8  # Gray gutter between tiled pages, so page boundaries stay visible
+
+# dHash grid per page: 16x16 = 256 bits
+HASH_SIZE = 16
+# Differing bits per page still read as "the same layout" (~5% of the hash)
+HASH_DISTANCE_PER_PAGE = 12
+
+VISUAL_CACHE_PATH = os.path.join(".cache", "visual_verdicts.sqlite")
+
+
+def visual_settings():
+    """Render settings from the environment, falling back to the module defaults."""
+    color = os.getenv("VISUAL_COLOR", "gray").lower()
+    if color not in COLOR_MODES:
+        print(f"⚠️ Unknown VISUAL_COLOR '{color}', using gray.")
+        color = "gray"
+    return {
+        "dpi": int(os.getenv("VISUAL_DPI", str(VISUAL_DPI))),
+        "color": color,
+        "max_pages": int(os.getenv("VISUAL_MAX_PAGES", str(VISUAL_MAX_PAGES))),
+        "pages_per_image": int(os.getenv("VISUAL_PAGES_PER_IMAGE", str(PAGES_PER_IMAGE))),
+    }
+
+
+class RenderedPages:
+    """The encoded images for one visual request, plus what they cost and the per-page hash."""
+
+    def __init__(self, parts, image_sizes, page_hash, pages_rendered, page_count):
+        self.parts = parts
+        self.image_sizes = image_sizes
+        self.page_hash = page_hash
+        self.pages_rendered = pages_rendered
+        self.page_count = page_count
+
+    @property
+    def payload_bytes(self):
+        return sum(len(part["data"]) for part in self.parts)
+
+    @property
+    def estimated_tokens(self):
+        return sum(image_tokens(width, height) for width, height in self.image_sizes)
+
+    def describe(self):
+        return (f"{self.pages_rendered} of {self.page_count} pages in {len(self.parts)} image(s), "
+                f"{self.payload_bytes / 1024:.1f} KB, ~{self.estimated_tokens} image tokens")
+
+    def __bool__(self):
+        return bool(self.parts)
+
+
+def reduce_colors(image, color):
+    """'gray' -> one channel, 'palette' -> PALETTE_COLORS colors, 'rgb' -> three channels (alpha dropped)."""
+    if color == "gray":
+        return image if image.mode == "L" else image.convert("L")
+    image = image if image.mode == "RGB" else image.convert("RGB")
+    if color == "palette":
+        return image.quantize(colors=PALETTE_COLORS)
+    return image
+
+
+def tile_pages(images, pages_per_image=PAGES_PER_IMAGE):
+    """Pastes the pages side by side, 'pages_per_image' per image (left to right = page order)."""
+    from PIL import Image
+
+    if pages_per_image <= 1:
+        return list(images)
+    tiles = []
+    for start in range(0, len(images), pages_per_image):
+        group = images[start:start + pages_per_image]
+        if len(group) == 1:
+            tiles.append(group[0])
+            continue
+        width = sum(image.width for image in group) + TILE_GAP * (len(group) - 1)
+        height = max(image.height for image in group)
+        canvas = Image.new(group[0].mode, (width, height), 128 if group[0].mode == "L" else (128, 128, 128))
+        x = 0
+        for image in group:
+            canvas.paste(image, (x, 0))
+            x += image.width + TILE_GAP
+        tiles.append(canvas)
+    return tiles
+
+
+def encode_image(image):
+    """
+    Lossless WebP, the format the Gemini SDK itself uses for PIL images; method=0 is ~6x
+    faster than the default and still about half the size of a PNG of the same page.
+    """
+    buffer = io.BytesIO()
+    image.save(buffer, format="WEBP", lossless=True, method=0)
+    return buffer.getvalue()
+
+
+def page_hash(image, size=HASH_SIZE):
+    """Difference hash of one page as hex: each bit says if a cell is darker than its right neighbour."""
+    from PIL import Image
+
+    small = image.convert("L").resize((size + 1, size), Image.LANCZOS)
+    pixels = list(small.getdata())
+    bits = 0
+    for row in range(size):
+        offset = row * (size + 1)
+        for col in range(size):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return f"{bits:0{size * size // 4}x}"
+
+
+def hash_distance(first, second):
+    """Differing bits between two page hashes ('-'-joined per page); None when the page counts differ."""
+    first_pages, second_pages = first.split("-"), second.split("-")
+    if len(first_pages) != len(second_pages):
+        return None
+    return sum(bin(int(a, 16) ^ int(b, 16)).count("1") for a, b in zip(first_pages, second_pages))
+
+
+def render_for_visual(source, dpi=None, color=None, max_pages=None, pages_per_image=None):
+    """
+    Renders, reduces, tiles and encodes the first pages of a path, raw bytes or ParsedResume.
+    Arguments left as None come from visual_settings().
+    """
+    settings = visual_settings()
+    dpi = dpi or settings["dpi"]
+    color = color or settings["color"]
+    max_pages = max_pages or settings["max_pages"]
+    pages_per_image = pages_per_image or settings["pages_per_image"]
+
+    pages, page_count = render_pages(source, dpi=dpi, max_pages=max_pages, grayscale=color == "gray")
+    # Tile on plain L / RGB pages, then quantize each tile (one palette per image)
+    pages = [reduce_colors(page, "gray" if color == "gray" else "rgb") for page in pages]
+    images = [reduce_colors(image, color) for image in tile_pages(pages, pages_per_image)]
+    parts = [{"mime_type": "image/webp", "data": encode_image(image)} for image in images]
+    return RenderedPages(parts, [image.size for image in images], "-".join(page_hash(page) for page in pages),
+                         len(pages), page_count)
+
+
+class VisualVerdictCache:
+    """
+    SQLite table of visual verdicts keyed by page hash. A lookup returns the verdict of the
+    closest stored layout with the same page count, if it is within 'max_distance_per_page' bits
+    per page. Trimmed to the 'max_entries' most recently used.
+    """
+
+    def __init__(self, db_path, max_entries=500, max_distance_per_page=HASH_DISTANCE_PER_PAGE):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_distance_per_page = max_distance_per_page
+        self.stats = {"exact_hits": 0, "near_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._lock = threading.Lock()
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS verdicts ("
+            "page_hash TEXT, version TEXT, pages INTEGER, created_at REAL, last_used REAL, verdict TEXT, "
+            "PRIMARY KEY (page_hash, version))"
+        )
+        self._db.commit()
+
+    def lookup(self, key, version):
+        """(verdict dict, distance in bits) for the closest matching layout, or None."""
+        pages = len(key.split("-"))
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT page_hash, verdict FROM verdicts WHERE version = ? AND pages = ?", (version, pages)
+            ).fetchall()
+            best = None
+            for stored_hash, verdict in rows:
+                distance = hash_distance(key, stored_hash)
+                if distance is not None and (best is None or distance < best[0]):
+                    best = (distance, stored_hash, verdict)
+            if best is None or best[0] > self.max_distance_per_page * pages:
+                self.stats["misses"] += 1
+                METRICS.inc("visual_cache_misses_total")
+                return None
+            self._db.execute("UPDATE verdicts SET last_used = ? WHERE page_hash = ? AND version = ?",
+                             (time.time(), best[1], version))
+            self._db.commit()
+            self.stats["exact_hits" if best[0] == 0 else "near_hits"] += 1
+        METRICS.inc("visual_cache_hits_total", match="exact" if best[0] == 0 else "near")
+        return json.loads(best[2]), best[0]
+
+    def put(self, key, version, verdict):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO verdicts (page_hash, version, pages, created_at, last_used, verdict) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, version, len(key.split("-")), now, now, json.dumps(verdict, ensure_ascii=False)),
+            )
+            self.stats["stores"] += 1
+            overflow = self._db.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                cur = self._db.execute(
+                    "DELETE FROM verdicts WHERE rowid IN (SELECT rowid FROM verdicts ORDER BY last_used ASC LIMIT ?)",
+                    (overflow,),
+                )
+                self.stats["evictions"] += cur.rowcount
+            self._db.commit()
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_visual_cache():
+    """Process-wide VisualVerdictCache, or None when VISUAL_CACHE=0 (every check calls the model)."""
+    global _default_cache
+    if os.getenv("VISUAL_CACHE", "1") == "0":
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            distance = int(os.getenv("VISUAL_HASH_DISTANCE", str(HASH_DISTANCE_PER_PAGE)))
+            _default_cache = VisualVerdictCache(VISUAL_CACHE_PATH, max_distance_per_page=distance)
+        return _default_cache
@@ -0,0 +1,329 @@
+"""
+Company research for Step 1.
+
+The company name is guessed from the JD, a few DuckDuckGo searches run in parallel,
+the top result pages are fetched in parallel over one pooled requests.Session
+(at most MAX_PER_HOST requests per host at a time, every request with a timeout),
+and the page text is condensed to the sentences that say something about the company.
+
+Pages and search results go through page_cache.PageCache (.cache/pages.sqlite), so
+looking up the same company again costs no network or parsing.
+
+Everything is injectable (search function, HttpPool, PageCache), so the stage can run
+against a local HTTP stand-in server:
+
+    researcher = CompanyResearcher(search=lambda query, n: [{"href": "http://127.0.0.1:8000/about"}])
+    researcher.research(job_description)
+"""
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+
+from html_text import extract_text
+from page_cache import PageCache
+from telemetry import METRICS, span
+from token_budget import estimate_text_tokens
+
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+              'Chrome/91.0.4472.124 Safari/537.36')
+MAX_PER_HOST = 2             # Concurrent requests to one host
+TIMEOUT = (3.05, 8)          # (connect, read) seconds per request
+PAGE_CHAR_LIMIT = 6000       # Text kept per fetched page
+RESEARCH_DEADLINE = 15       # Seconds the whole stage (searches + fetches) may take; slower pages are dropped
+MAX_PAGES = 4
+CONTEXT_TOKEN_BUDGET = 600   # Condensed company text handed to Step 1
+PAGE_CACHE_PATH = os.path.join(".cache", "pages.sqlite")
+EXTRACTOR_VERSION = "html_text-v1"  # Stored next to cached text; a new extractor re-extracts from the saved HTML
+
+# Sentences worth keeping besides the ones naming the company
+_SIGNAL_RE = re.compile(r'\b(mission|product|platform|customers?|founded|team|culture|values|build|'
+                        r'engineering|technology|funding|headquarter|million|users|clients)\b', re.IGNORECASE)
+_SENTENCE_RE = re.compile(r'(?<=[.!?])\s+')
+
+# "About Acme", "Acme is looking for", "join Acme", "at Acme, we" ...
+_COMPANY_PATTERNS = [
+    re.compile(r'^\s*(?:company|employer)\s*[:\-]\s*(?P<name>[^\n,|]{2,60})', re.IGNORECASE | re.MULTILINE),
+    re.compile(r'\babout\s+(?P<name>[A-Z][\w&.\'-]*(?:\s+[A-Z][\w&.\'-]*){0,3})\s*(?:\n|:)'),
+    re.compile(r'\b(?i:join|at)\s+(?P<name>[A-Z][\w&.\'-]*(?:\s+[A-Z][\w&.\'-]*){0,3})'
+               r'(?=\s*(?:,|!|\bwe\b|\bis\b|\'s\b|\byou\b))'),
+    re.compile(r'(?P<name>[A-Z][\w&.\'-]*(?:\s+[A-Z][\w&.\'-]*){0,3})\s+(?:is|are)\s+(?:looking|hiring|seeking)\b'),
+]
+_NOT_A_COMPANY = {"we", "our", "the", "you", "this", "team", "us", "the team", "our team", "the company", "the role"}
+
+
+def guess_company_name(job_description):
+    """Best-effort company name from the JD text, or None."""
+    for pattern in _COMPANY_PATTERNS:
+        for match in pattern.finditer(job_description):
+            name = match.group("name").strip(" .:-")
+            if name and name.lower() not in _NOT_A_COMPANY:
+                return name
+    return None
+
+
+class HttpPool:
+    """
+    One requests.Session (keep-alive connection pool) shared by all research threads,
+    with a per-host concurrency limit and a timeout on every request.
+    """
+
+    def __init__(self, max_per_host=MAX_PER_HOST, timeout=TIMEOUT, pool_size=16):
+        # requests / duckduckgo_search are only imported once research actually runs
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._host_slots = {}
+        self._lock = threading.Lock()
+
+    def _slot(self, url):
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._host_slots[host]
+
+    def get(self, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        with self._slot(url):
+            METRICS.inc("http_requests_total", host=urlsplit(url).netloc.lower())
+            return self.session.get(url, **kwargs)
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_http_pool():
+    """Process-wide HttpPool, created on first use."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = HttpPool()
+        return _default_pool
+
+
+_default_cache = None
+
+
+def get_page_cache():
+    """Process-wide PageCache, opened on first use."""
+    global _default_cache
+    with _default_pool_lock:
+        if _default_cache is None:
+            _default_cache = PageCache(PAGE_CACHE_PATH)
+        return _default_cache
+
+
+_ddgs = threading.local()
+
+
+def ddg_search(query, max_results=1):
+    """DuckDuckGo text search, reusing one DDGS client per (long-lived research) thread."""
+    if not hasattr(_ddgs, "client"):
+        from duckduckgo_search import DDGS
+
+        _ddgs.client = DDGS(timeout=TIMEOUT[1])
+    return list(_ddgs.client.text(query, max_results=max_results))
+
+
+def html_to_text(html, limit=PAGE_CHAR_LIMIT):
+    """Main-content text of a page, parsed only as far as 'limit' chars (see html_text)."""
+    return extract_text(html, limit)
+
+
+def _cached_text(cache, entry):
+    if entry["status"] != 200:
+        return None
+    if entry["extractor"] != EXTRACTOR_VERSION:
+        text = html_to_text(entry["html"])
+        cache.update_text(entry["url"], text, EXTRACTOR_VERSION)
+        return text
+    return entry["text"]
+
+
+def fetch_page_text(url, pool=None, cache=None):
+    """
+    Page text (up to PAGE_CHAR_LIMIT chars), or None when the page is unavailable
+    (non-200 answer, or its host is on the negative cache).
+    Fresh cached pages make no request; stale ones are revalidated with If-None-Match /
+    If-Modified-Since. Network errors propagate unless a stale copy can be served instead.
+    """
+    import requests
+
+    if cache is None:
+        cache = get_page_cache()
+    host = urlsplit(url).netloc.lower()
+    entry = cache.get(url)
+    if entry and entry["fresh"]:
+        cache.record_hit("fresh_hits")
+        return _cached_text(cache, entry)
+    if cache.host_is_failing(host):
+        return _cached_text(cache, entry) if entry else None
+
+    headers = {}
+    if entry and entry["status"] == 200:
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    try:
+        response = (pool or get_http_pool()).get(url, headers=headers)
+    except requests.RequestException as e:
+        cache.mark_host_failed(host, e)
+        if entry:
+            return _cached_text(cache, entry)  # A stale page beats no page
+        raise
+
+    if response.status_code == 304 and entry:
+        cache.touch(url)
+        cache.record_hit("revalidated")
+        return _cached_text(cache, entry)
+    if response.status_code == 429 or response.status_code >= 500:
+        cache.mark_host_failed(host, f"HTTP {response.status_code}")
+        return _cached_text(cache, entry) if entry else None
+
+    cache.clear_host_failure(host)
+    if response.status_code != 200:
+        cache.put(url, response.status_code)  # Remember the 404 as well
+        return None
+    text = html_to_text(response.text)
+    cache.put(url, 200, response.text, text, response.headers.get("ETag"), response.headers.get("Last-Modified"),
+              EXTRACTOR_VERSION)
+    return text
+
+
+def condense(texts, company, token_budget=CONTEXT_TOKEN_BUDGET):
+    """Keeps the sentences that name the company or carry a signal word, best first, within the budget."""
+    name = company.lower() if company else None
+    scored = []
+    seen = set()
+    for position, sentence in enumerate(s.strip() for text in texts for s in _SENTENCE_RE.split(text)):
+        key = sentence.lower()
+        if len(sentence) < 30 or key in seen:
+            continue
+        seen.add(key)
+        score = (2 if name and name in key else 0) + len(_SIGNAL_RE.findall(sentence))
+        if score:
+            scored.append((-score, position, sentence))
+
+    kept = []
+    used = 0
+    for _, position, sentence in sorted(scored):
+        cost = estimate_text_tokens(sentence)
+        if used + cost > token_budget:
+            continue
+        kept.append((position, sentence))
+        used += cost
+    return " ".join(sentence for _, sentence in sorted(kept))
+
+
+class CompanyResearcher:
+    """
+    Runs the searches and page fetches concurrently and returns condensed company text.
+    Its worker threads live as long as the researcher, so each keeps its DDGS client across runs.
+    """
+
+    def __init__(self, search=ddg_search, pool=None, cache=None, max_pages=MAX_PAGES, max_workers=8,
+                 deadline=RESEARCH_DEADLINE, clock=time.monotonic):
+        self.search = search
+        self.pool = pool
+        self.cache = cache
+        self.max_pages = max_pages
+        self.max_workers = max_workers
+        self.deadline = deadline
+        self.clock = clock
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="research")
+            return self._executor
+
+    def queries(self, company):
+        return [f"{company} company about", f"{company} engineering product news"]
+
+    def _search(self, query, max_results=3):
+        """Search results are cached next to the pages (same TTL), under a 'search:' key."""
+        cache = self.cache if self.cache is not None else get_page_cache()
+        key = f"search:{max_results}:{query}"
+        entry = cache.get(key)
+        if entry and entry["fresh"]:
+            cache.record_hit("fresh_hits")
+            return json.loads(entry["text"])
+        results = self.search(query, max_results)
+        cache.put(key, 200, text=json.dumps(results, ensure_ascii=False))
+        return results
+
+    def _gather(self, executor, func, items, deadline_at):
+        """Runs func over items on the executor; returns the results that finished by 'deadline_at', in order."""
+        futures = [executor.submit(func, item) for item in items]
+        done, _ = wait(futures, timeout=max(0.0, deadline_at - self.clock()))
+        results = []
+        for future in futures:
+            if future not in done:
+                METRICS.inc("research_timeouts_total")
+                continue
+            try:
+                results.append(future.result())
+            except Exception as e:
+                METRICS.inc("research_errors_total")
+                print(f"⚠️ Research request failed: {e}")
+        return results
+
+    def research(self, job_description):
+        """Condensed text about the company named in the JD ("" if unknown or nothing found)."""
+        company = guess_company_name(job_description)
+        if not company:
+            print("🌐 Company research skipped: no company name found in the JD.")
+            return ""
+
+        print(f"🌐 Researching '{company}'...")
+        with span("company_research", company=company):
+            deadline_at = self.clock() + self.deadline  # One budget: slow searches leave less time for pages
+            # Stragglers past the deadline are not waited for: every request has its own timeout
+            executor = self._get_executor()
+            with span("research_search"):
+                hits = self._gather(executor, self._search, self.queries(company), deadline_at)
+            urls = []
+            for result in (hit for batch in hits for hit in batch):
+                url = result.get("href") or result.get("url")
+                if url and url not in urls:
+                    urls.append(url)
+
+            with span("research_fetch", pages=min(len(urls), self.max_pages)):
+                pages = self._gather(executor, lambda url: fetch_page_text(url, self.pool, self.cache),
+                                     urls[:self.max_pages], deadline_at)
+
+            context = condense([page for page in pages if page], company)
+
+        print(f"🌐 Company research: {len(urls)} link(s), {len(pages)} page(s), {len(context)} chars kept.")
+        return context
+
+
+_default_researcher = None
+
+
+def get_researcher():
+    """The process-wide researcher, or None when COMPANY_RESEARCH=0 (e.g. offline runs)."""
+    global _default_researcher
+    if os.getenv("COMPANY_RESEARCH", "1") == "0":
+        return None
+    pool = get_http_pool()
+    with _default_pool_lock:
+        if _default_researcher is None:
+            _default_researcher = CompanyResearcher(pool=pool)
+        return _default_researcher